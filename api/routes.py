@@ -1,11 +1,21 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, Response, stream_with_context
 import os
 import json
 import re
+import base64
+import logging
+from queue import Empty
 from flask_restx import Api, Resource, Namespace, fields, reqparse
 
-from blockchain.contract import BlockchainNotifier
-from services.update_service import UpdateService
+from blockchain.contract import BlockchainNotifier, resolve_update_contract
+from blockchain.receipt_tracker import get_receipt_tracker
+from blockchain.update_index import get_update_index
+from services.update_service import UpdateService, BATCH_UPLOAD_MAX_ITEMS
+from services.job_service import get_job_manager, JobQueueFullError
+from services.audit_service import get_signature_auditor
+from ipfs.provider import get_dht_provider
+
+logger = logging.getLogger(__name__)
 
 # URL prefix 추가
 api_bp = Blueprint("api", __name__, url_prefix="/api")
@@ -55,6 +65,13 @@ upload_parser.add_argument(
     required=False,
     help='속성 정책 (예:  { "model": "VS500", "serial": "KMHEM42APXA75****", "date": "2015", "option": "EXCLUSIVE OR PRESTIGE" })',
 )
+upload_parser.add_argument(
+    "sync",
+    location="form",
+    type=str,
+    required=False,
+    help="true이면 작업 등록 없이 전체 파이프라인 완료 후 응답 (기존 방식)",
+)
 
 # 업로드 응답 모델 정의
 upload_response_model = manufacturer_ns.model(
@@ -70,6 +87,158 @@ upload_response_model = manufacturer_ns.model(
     },
 )
 
+# 배치 업로드 파서
+batch_upload_parser = reqparse.RequestParser()
+batch_upload_parser.add_argument(
+    "files",
+    location="files",
+    type="file",
+    action="append",
+    required=True,
+    help="업로드할 소프트웨어 파일 목록 (같은 필드 이름으로 여러 개)",
+)
+batch_upload_parser.add_argument(
+    "items",
+    location="form",
+    type=str,
+    required=True,
+    help='파일 순서대로 항목별 메타데이터 JSON 배열 (예: [{"version": "1.0.1", "description": "...", "price": "0.01", "policy": {"model": "VS500", "serial": "KMHEM42APXA75****"}}])',
+)
+
+# 배치 업로드 항목별 결과 모델
+batch_upload_item_model = manufacturer_ns.model(
+    "BatchUploadItem",
+    {
+        "index": fields.Integer(description="요청 내 항목 순서 (0부터)"),
+        "success": fields.Boolean(description="등록 성공 여부"),
+        "uid": fields.String(description="업데이트 ID"),
+        "ipfs_hash": fields.String(description="IPFS에 업로드된 파일 해시"),
+        "file_hash": fields.String(description="SHA3 해시값"),
+        "tx_hash": fields.String(description="블록체인 트랜잭션 해시"),
+        "version": fields.String(description="버전 정보"),
+        "signature": fields.String(description="업데이트 데이터에 대한 ECDSA 서명"),
+        "stage": fields.String(description="실패한 단계 (실패 시)"),
+        "error": fields.String(description="실패 사유 (실패 시)"),
+    },
+)
+
+batch_upload_response_model = manufacturer_ns.model(
+    "BatchUploadResponse",
+    {
+        "total": fields.Integer(description="요청 항목 수"),
+        "succeeded": fields.Integer(description="등록 성공 항목 수"),
+        "failed": fields.Integer(description="실패 항목 수"),
+        "results": fields.List(fields.Nested(batch_upload_item_model), description="항목별 결과 (요청 순서)"),
+    },
+)
+
+# 비동기 업로드 작업 접수 응답 모델
+upload_job_accepted_model = manufacturer_ns.model(
+    "UploadJobAccepted",
+    {
+        "job_id": fields.String(description="업로드 작업 ID"),
+        "status": fields.String(description="작업 상태 (queued)"),
+        "status_url": fields.String(description="작업 상태 조회 경로"),
+    },
+)
+
+# 업로드 작업 상태 응답 모델
+upload_job_model = manufacturer_ns.model(
+    "UploadJob",
+    {
+        "job_id": fields.String(description="업로드 작업 ID"),
+        "status": fields.String(description="queued / running / succeeded / failed / interrupted"),
+        "stages": fields.Raw(description="단계별 진행 상황 (encrypt, ipfs, cpabe, sign, register)"),
+        "result": fields.Nested(upload_response_model, allow_null=True, description="완료 시 업로드 결과"),
+        "error": fields.String(description="실패 사유"),
+        "created_at": fields.Float(description="작업 생성 시각 (epoch)"),
+        "updated_at": fields.Float(description="마지막 갱신 시각 (epoch)"),
+    },
+)
+
+# DHT provide 상태 응답 모델
+provide_status_model = manufacturer_ns.model(
+    "ProvideStatus",
+    {
+        "cid": fields.String(description="IPFS CID"),
+        "status": fields.String(description="queued / providing / retrying / provided / failed"),
+        "attempts": fields.Integer(description="시도 횟수"),
+        "last_error": fields.String(description="마지막 실패 사유"),
+        "updated_at": fields.Float(description="마지막 갱신 시각 (epoch)"),
+    },
+)
+
+# 트랜잭션 상태 응답 모델
+tx_status_model = manufacturer_ns.model(
+    "TransactionStatus",
+    {
+        "tx_hash": fields.String(description="전송한 트랜잭션 해시"),
+        "kind": fields.String(description="호출 함수 (registerUpdate / cancelUpdate)"),
+        "uid": fields.String(description="업데이트 ID"),
+        "nonce": fields.Integer(description="트랜잭션 nonce"),
+        "status": fields.String(description="pending / mined / reverted / dropped"),
+        "replaced_by": fields.String(description="수수료 인상으로 대체한 최신 트랜잭션 해시 (채굴 후에는 실제로 채굴된 대체 해시)"),
+        "block_number": fields.Integer(description="포함된 블록 번호"),
+        "gas_used": fields.Integer(description="사용한 가스"),
+        "effective_gas_price": fields.String(description="실제 가스 가격 (wei)"),
+        "submitted_at": fields.Float(description="전송 시각 (epoch)"),
+        "updated_at": fields.Float(description="마지막 갱신 시각 (epoch)"),
+    },
+)
+
+audit_item_model = manufacturer_ns.model(
+    "SignatureAuditItem",
+    {
+        "index": fields.Integer(description="업데이트 인덱스"),
+        "uid": fields.String(description="업데이트 ID"),
+        "status": fields.String(description="signer_mismatch / invalid_signature / missing_signature"),
+        "tx_hash": fields.String(description="registerUpdate 트랜잭션 해시"),
+        "signer": fields.String(description="서명에서 복원한 주소"),
+        "reason": fields.String(description="서명을 확인하지 못한 이유"),
+    },
+)
+
+audit_report_model = manufacturer_ns.model(
+    "SignatureAuditReport",
+    {
+        "block": fields.Integer(description="감사 기준 블록"),
+        "contract": fields.String(description="SoftwareUpdateContract 주소"),
+        "manufacturer": fields.String(description="기대 서명자 (컨트랙트 manufacturer)"),
+        "total": fields.Integer(description="등록된 업데이트 수"),
+        "ok": fields.Integer(description="서명이 manufacturer와 일치하는 업데이트 수"),
+        "cached": fields.Integer(description="이전 감사 결과를 재사용한 수"),
+        "unreadable": fields.Integer(description="조회에 실패한 업데이트 수"),
+        "mismatches": fields.List(fields.Nested(audit_item_model), description="불일치 또는 확인 불가 항목"),
+        "elapsed": fields.Float(description="소요 시간(초)"),
+    },
+)
+
+# 서명 감사 접수 응답 모델
+audit_accepted_model = manufacturer_ns.model(
+    "SignatureAuditAccepted",
+    {
+        "audit_id": fields.String(description="서명 감사 ID"),
+        "status": fields.String(description="감사 상태 (running)"),
+        "status_url": fields.String(description="감사 상태 조회 경로"),
+    },
+)
+
+# 서명 감사 상태 응답 모델
+audit_status_model = manufacturer_ns.model(
+    "SignatureAuditStatus",
+    {
+        "audit_id": fields.String(description="서명 감사 ID"),
+        "status": fields.String(description="running / succeeded / failed"),
+        "report": fields.Nested(audit_report_model, allow_null=True, description="완료 시 감사 보고서"),
+        "error": fields.String(description="실패 사유"),
+        "started_at": fields.Float(description="시작 시각 (epoch)"),
+        "finished_at": fields.Float(description="종료 시각 (epoch)"),
+    },
+)
+
+# SSE 연결 유지용 주석 전송 간격(초)
+TX_STREAM_HEARTBEAT = 15
+
 # 업데이트 취소 요청 파서
 cancel_parser = reqparse.RequestParser()
 cancel_parser.add_argument(
@@ -92,7 +261,7 @@ pagination_model = manufacturer_ns.model(
     {
         "current_page": fields.Integer(description="현재 페이지 번호"),
         "per_page": fields.Integer(description="페이지당 항목 수"),
-        "total_count": fields.Integer(description="전체 항목 수"),
+        "total_count": fields.Integer(description="전체 항목 수 (/updates는 취소되지 않은 항목만)"),
         "total_pages": fields.Integer(description="전체 페이지 수"),
         "has_next": fields.Boolean(description="다음 페이지 존재 여부"),
         "has_prev": fields.Boolean(description="이전 페이지 존재 여부"),
@@ -116,12 +285,24 @@ update_info_model = manufacturer_ns.model(
     },
 )
 
+# 커서 페이지 정보 모델
+cursor_model = manufacturer_ns.model(
+    "Cursor",
+    {
+        "next": fields.String(description="다음 페이지 커서 (after 값으로 전달, 마지막 페이지면 null)"),
+        "has_next": fields.Boolean(description="다음 페이지 존재 여부"),
+        "per_page": fields.Integer(description="페이지당 항목 수"),
+        "snapshot_block": fields.Integer(description="목록 기준 블록 번호"),
+    },
+)
+
 # 페이지네이션 업데이트 목록 응답 모델
 paginated_updates_model = manufacturer_ns.model(
     "PaginatedUpdates",
     {
         "updates": fields.List(fields.Nested(update_info_model), description="업데이트 목록"),
         "pagination": fields.Nested(pagination_model, description="페이지네이션 정보"),
+        "cursor": fields.Nested(cursor_model, description="커서 페이지 정보 (after 사용 시)"),
     },
 )
 
@@ -133,14 +314,102 @@ updates_parser.add_argument(
 updates_parser.add_argument(
     "limit", type=int, required=False, default=20, help="페이지당 항목 수 (기본 20, 최대 100)"
 )
+updates_parser.add_argument(
+    "after", type=str, required=False, default=None,
+    help="커서 페이지 조회 (빈 값이면 처음부터, 이후에는 응답의 cursor.next 값)",
+)
+
+
+class InvalidCursorError(ValueError):
+    """after 파라미터를 커서로 해석할 수 없음"""
+
+
+def _encode_cursor(last_index, snapshot_block):
+    """체인 인덱스와 스냅샷 블록을 URL에 안전한 불투명 문자열로 인코딩"""
+    raw = json.dumps({"i": last_index, "b": snapshot_block}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """커서 문자열 → (마지막 체인 인덱스, 스냅샷 블록). 빈 값이면 처음부터"""
+    if not cursor:
+        return -1, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        last_index, snapshot_block = int(data["i"]), int(data["b"])
+    except Exception:
+        raise InvalidCursorError("잘못된 커서입니다.")
+    if last_index < -1 or snapshot_block < 0:
+        raise InvalidCursorError("잘못된 커서입니다.")
+    return last_index, snapshot_block
+
+
+def _updates_response(include_invalid):
+    """
+    /updates, /updates/all 공통 처리.
+    - 로컬 인덱스가 동기화되어 있으면 인덱스에서 응답하고 ETag를 붙임
+      (If-None-Match가 일치하면 RPC 없이 304)
+    - 동기화 전이면 체인에서 직접 조회
+    """
+    args = updates_parser.parse_args()
+    page = args.get("page")
+    limit = args.get("limit", 20)
+    after = args.get("after")
+
+    # 로컬 인덱스가 체인과 동기화되어 있으면 RPC 없이 인덱스에서 응답
+    index = get_update_index()
+    etag = index.etag
+    if etag is not None:
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if request.if_none_match.contains(etag):
+            return "", 304, headers
+        if after is not None:
+            last_index, snapshot_block = _decode_cursor(after)
+            result = index.page_after(last_index, limit, include_invalid, snapshot_block)
+        elif page is None:
+            return {"updates": index.list_updates(include_invalid=include_invalid)}, 200, headers
+        else:
+            return index.paginate(page=page, limit=limit, include_invalid=include_invalid), 200, headers
+    else:
+        headers = {}
+        notifier = BlockchainNotifier()
+
+        if after is not None:
+            last_index, snapshot_block = _decode_cursor(after)
+            result = notifier.get_updates_after(last_index, limit, include_invalid, snapshot_block)
+        # 페이지 파라미터가 없으면 기존 방식으로 전체 조회 (하위 호환성)
+        elif page is None:
+            return {"updates": notifier.get_updates(include_invalid=include_invalid)}
+        else:
+            # 페이지네이션 조회
+            return notifier.get_updates_paginated(
+                page=page,
+                limit=limit,
+                include_invalid=include_invalid,
+            )
+
+    cursor = {
+        "next": (
+            _encode_cursor(result["last_index"], result["snapshot_block"])
+            if result["has_next"]
+            else None
+        ),
+        "has_next": result["has_next"],
+        "per_page": result["per_page"],
+        "snapshot_block": result["snapshot_block"],
+    }
+    return {"updates": result["updates"], "cursor": cursor}, 200, headers
 
 
 # ✅ 소프트웨어 업로드 API
 @manufacturer_ns.route("/upload")
 class SoftwareUpload(Resource):
     @manufacturer_ns.expect(upload_parser)  # ✅ metadata model 제거
-    @manufacturer_ns.response(200, "업로드 성공", upload_response_model)
-    @manufacturer_ns.doc(description="소프트웨어 업데이트 업로드 API")
+    @manufacturer_ns.response(202, "업로드 작업 접수", upload_job_accepted_model)
+    @manufacturer_ns.response(200, "업로드 성공 (sync=true)", upload_response_model)
+    @manufacturer_ns.response(503, "업로드 작업 대기열 초과")
+    @manufacturer_ns.doc(description="소프트웨어 업데이트 업로드 API. 기본은 비동기 처리 후 /jobs/<job_id>로 상태 조회")
     def post(self):
         try:
             # 파일이 없으면 에러 반환
@@ -158,21 +427,115 @@ class SoftwareUpload(Resource):
             key_dir = os.path.join(os.path.dirname(__file__), "../crypto/keys")
             cache_file = os.path.join(os.path.dirname(__file__), "../update_cache.json")
 
-            result = UpdateService.process_update_upload(
-                file,
-                version,
-                description,
-                price_eth,
-                policy_dict,
-                upload_folder,
-                key_dir,
-                cache_file,
+            # sync=true: 기존처럼 요청 스레드에서 전체 파이프라인 실행
+            if request.form.get("sync", "").lower() in ("1", "true", "yes"):
+                return UpdateService.process_update_upload(
+                    file,
+                    version,
+                    description,
+                    price_eth,
+                    policy_dict,
+                    upload_folder,
+                    key_dir,
+                    cache_file,
+                )
+
+            # 기본: 요청 본문 암호화/해시까지만 수행하고 나머지 단계는 작업으로 등록
+            upload = UpdateService.prepare_upload(
+                file, version, description, price_eth, policy_dict, upload_folder
             )
-            return result
+            try:
+                job_id = get_job_manager().submit(upload)
+            except JobQueueFullError as e:
+                stream = upload["ingest"].get("stream")
+                if stream is not None:
+                    stream.close()
+                return {"error": str(e)}, 503
+            return {
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"{api_bp.url_prefix}/manufacturer/jobs/{job_id}",
+            }, 202
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+# ✅ 배치 업로드 API
+@manufacturer_ns.route("/upload/batch")
+class SoftwareBatchUpload(Resource):
+    @manufacturer_ns.expect(batch_upload_parser)
+    @manufacturer_ns.response(200, "배치 처리 완료 (항목별 결과 포함)", batch_upload_response_model)
+    @manufacturer_ns.response(400, "잘못된 요청")
+    @manufacturer_ns.doc(
+        description="여러 소프트웨어 업데이트를 한 번에 등록. 항목별로 버전/설명/가격/정책을 지정하고 항목별 결과를 반환"
+    )
+    def post(self):
+        try:
+            files = request.files.getlist("files")
+            if not files:
+                return {"error": "파일이 제공되지 않았습니다."}, 400
+            if len(files) > BATCH_UPLOAD_MAX_ITEMS:
+                return {"error": f"한 번에 최대 {BATCH_UPLOAD_MAX_ITEMS}개까지 업로드할 수 있습니다."}, 400
+
+            try:
+                metadata = json.loads(request.form.get("items", "[]"))
+            except ValueError:
+                return {"error": "items는 JSON 배열이어야 합니다."}, 400
+            if not isinstance(metadata, list) or len(metadata) != len(files):
+                return {"error": "items 배열의 길이가 파일 수와 같아야 합니다."}, 400
+            if not all(isinstance(meta, dict) for meta in metadata):
+                return {"error": "items의 각 항목은 JSON 객체여야 합니다."}, 400
+
+            items = [
+                {
+                    "file": file,
+                    "version": str(meta.get("version", "")),
+                    "description": str(meta.get("description", "")),
+                    "price": str(meta.get("price", "0")),
+                    "policy": meta.get("policy") or {},
+                }
+                for file, meta in zip(files, metadata)
+            ]
+            upload_folder = os.path.join(os.path.dirname(__file__), "../uploads")
+            results = UpdateService.process_batch_upload(items, upload_folder)
+
+            succeeded = sum(1 for result in results if result.get("success"))
+            return {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "results": results,
+            }, 200
         except Exception as e:
             return {"error": str(e)}, 500
 
 
+# ✅ 업로드 작업 상태 조회 API
+@manufacturer_ns.route("/jobs/<string:job_id>")
+class UploadJobStatus(Resource):
+    @manufacturer_ns.response(200, "작업 상태 조회 성공", upload_job_model)
+    @manufacturer_ns.response(404, "작업 없음")
+    @manufacturer_ns.doc(description="비동기 업로드 작업의 단계별 진행 상황 및 최종 결과(uid, CID, tx 해시) 조회")
+    def get(self, job_id):
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return {"error": "작업을 찾을 수 없습니다."}, 404
+        return job
+
+
+# ✅ IPFS DHT 공지 상태 조회 API
+@manufacturer_ns.route("/ipfs/provide/<string:cid>")
+class ProvideStatus(Resource):
+    @manufacturer_ns.response(200, "DHT provide 상태 조회 성공", provide_status_model)
+    @manufacturer_ns.response(404, "provide 요청 기록 없음")
+    @manufacturer_ns.doc(description="업로드된 CID의 백그라운드 DHT provide 진행 상태 조회")
+    def get(self, cid):
+        status = get_dht_provider().status(cid)
+        if status is None:
+            return {"error": "해당 CID의 provide 요청 기록이 없습니다."}, 404
+        return status
+
+
 # ✅ 소프트웨어 업데이트 목록 조회 API (페이지네이션 지원)
 @manufacturer_ns.route("/updates")
 class SoftwareList(Resource):
@@ -185,34 +548,22 @@ class SoftwareList(Resource):
         쿼리 파라미터:
         - page: 페이지 번호 (1부터 시작, 생략시 전체 조회)
         - limit: 페이지당 항목 수 (기본 20, 최대 100)
+        - after: 커서 (빈 값이면 처음부터, 이후 응답의 cursor.next 값)
         
         예시:
         - /updates (전체 조회, 기존 방식과 호환)
         - /updates?page=1&limit=20 (1페이지, 20개씩)
         - /updates?page=2&limit=10 (2페이지, 10개씩)
+        - /updates?after=&limit=20 (커서 방식 첫 페이지, 이후 cursor.next를 after로 전달)
+
+        응답의 ETag를 If-None-Match로 보내면 목록이 바뀌지 않은 경우 304 반환
         """
     )
     def get(self):
         try:
-            args = updates_parser.parse_args()
-            page = args.get('page')
-            limit = args.get('limit', 20)
-            
-            notifier = BlockchainNotifier()
-            
-            # 페이지 파라미터가 없으면 기존 방식으로 전체 조회 (하위 호환성)
-            if page is None:
-                updates = notifier.get_updates(include_invalid=False)
-                return {"updates": updates}
-            
-            # 페이지네이션 조회
-            result = notifier.get_updates_paginated(
-                page=page, 
-                limit=limit, 
-                include_invalid=False
-            )
-            return result
-            
+            return _updates_response(include_invalid=False)
+        except InvalidCursorError as e:
+            return {"error": str(e), "updates": []}, 400
         except Exception as e:
             return {"error": str(e), "updates": []}, 500
 
@@ -229,35 +580,116 @@ class SoftwareListAll(Resource):
         쿼리 파라미터:
         - page: 페이지 번호 (1부터 시작, 생략시 전체 조회)
         - limit: 페이지당 항목 수 (기본 20, 최대 100)
+        - after: 커서 (빈 값이면 처음부터, 이후 응답의 cursor.next 값)
         
         각 업데이트에 isValid 필드 포함
         """
     )
     def get(self):
         try:
-            args = updates_parser.parse_args()
-            page = args.get('page')
-            limit = args.get('limit', 20)
-            
-            notifier = BlockchainNotifier()
-            
-            # 페이지 파라미터가 없으면 기존 방식으로 전체 조회 (하위 호환성)
-            if page is None:
-                updates = notifier.get_updates(include_invalid=True)
-                return {"updates": updates}
-            
-            # 페이지네이션 조회
-            result = notifier.get_updates_paginated(
-                page=page, 
-                limit=limit, 
-                include_invalid=True
-            )
-            return result
-            
+            return _updates_response(include_invalid=True)
+        except InvalidCursorError as e:
+            return {"error": str(e), "updates": []}, 400
         except Exception as e:
             return {"error": str(e), "updates": []}, 500
 
 
+def _receipt_tracker():
+    """ReceiptTracker (이전 실행에서 남은 대기 트랜잭션도 추적되도록 Web3 연결 지정)"""
+    tracker = get_receipt_tracker()
+    if tracker.web3 is None:
+        try:
+            tracker.attach(resolve_update_contract()["web3"])
+        except Exception as e:
+            # 체인 연결 실패해도 저장된 상태 조회는 가능
+            logger.warning(f"트랜잭션 추적 시작 실패: {e}")
+    return tracker
+
+
+# ✅ 트랜잭션 상태 변경 스트림 (SSE)
+@manufacturer_ns.route("/tx/stream")
+class TransactionStream(Resource):
+    @manufacturer_ns.doc(
+        description="등록/취소 트랜잭션 상태 변경을 server-sent events(text/event-stream)로 전달. 이벤트 data는 /tx/<tx_hash> 응답과 같은 JSON"
+    )
+    def get(self):
+        tracker = _receipt_tracker()
+        events = tracker.subscribe()
+
+        def generate():
+            try:
+                yield ": connected\n\n"
+                while True:
+                    try:
+                        event = events.get(timeout=TX_STREAM_HEARTBEAT)
+                    except Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event['status']}\nid: {event['tx_hash']}\ndata: {json.dumps(event)}\n\n"
+            finally:
+                tracker.unsubscribe(events)
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+# ✅ 트랜잭션 상태 조회 API
+@manufacturer_ns.route("/tx/<string:tx_hash>")
+class TransactionStatus(Resource):
+    @manufacturer_ns.response(200, "트랜잭션 상태 조회 성공", tx_status_model)
+    @manufacturer_ns.response(404, "추적 중인 트랜잭션 아님")
+    @manufacturer_ns.doc(description="등록/취소 트랜잭션의 채굴 여부, 블록 번호, 사용 가스 조회 (수수료 인상 전 원래 해시로도 조회 가능)")
+    def get(self, tx_hash):
+        status = _receipt_tracker().get(tx_hash)
+        if status is None:
+            return {"error": "추적 중인 트랜잭션이 아닙니다."}, 404
+        return status
+
+
+# ✅ 온체인 서명 감사 API
+@manufacturer_ns.route("/audit/signatures")
+class SignatureAudit(Resource):
+    @manufacturer_ns.response(202, "서명 감사 시작", audit_accepted_model)
+    @manufacturer_ns.doc(
+        description="등록된 모든 업데이트의 서명을 sign_message와 같은 인코딩으로 다시 계산해 복원한 서명자를 "
+        "컨트랙트 manufacturer와 비교. 백그라운드에서 실행하고 /audit/signatures/<audit_id>로 결과 조회 "
+        "(이미 실행 중이면 그 감사의 id 반환). 이전 감사 결과는 (uid, 등록 블록)별로 재사용. "
+        "CLI: python -m services.audit_service"
+    )
+    def post(self):
+        audit_id = get_signature_auditor().start()
+        return {
+            "audit_id": audit_id,
+            "status": "running",
+            "status_url": f"{api_bp.url_prefix}/manufacturer/audit/signatures/{audit_id}",
+        }, 202
+
+    @manufacturer_ns.response(200, "마지막 서명 감사 상태", audit_status_model)
+    @manufacturer_ns.response(404, "시작한 감사 없음")
+    @manufacturer_ns.doc(description="마지막으로 시작한 서명 감사의 상태와 보고서 조회")
+    def get(self):
+        status = get_signature_auditor().status()
+        if status is None:
+            return {"error": "시작한 서명 감사가 없습니다."}, 404
+        return status
+
+
+# ✅ 서명 감사 상태 조회 API
+@manufacturer_ns.route("/audit/signatures/<string:audit_id>")
+class SignatureAuditStatus(Resource):
+    @manufacturer_ns.response(200, "서명 감사 상태 조회 성공", audit_status_model)
+    @manufacturer_ns.response(404, "감사 없음")
+    @manufacturer_ns.doc(description="서명 감사 진행 상태와 완료 시 보고서 조회")
+    def get(self, audit_id):
+        status = get_signature_auditor().status(audit_id)
+        if status is None:
+            return {"error": "감사를 찾을 수 없습니다."}, 404
+        return status
+
+
 # ✅ 업데이트 취소 API
 @manufacturer_ns.route("/cancel")
 class CancelUpdate(Resource):
@@ -0,0 +1,108 @@
+"""
+페어링 곡선별 CP-ABE(BSW07) 성능 비교: setup / keygen / encrypt / decrypt 지연 시간과 암호문 크기.
+
+    python -m benchmarks.cpabe_curves [--curves SS512,MNT224] [--leaves 1,2,4,8,16] [--rounds 5]
+
+- 정책은 리프 수 n에 대해 "ATTR1 and ATTR2 and ... and ATTRn" (복호화 시 모든 리프 사용)
+- keygen 속성 집합은 정책의 모든 속성
+- 시간은 rounds회 반복한 중앙값(ms), 크기는 JSON / 바이너리(encryptedKey 온체인 형식) 바이트
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from charm.toolbox.pairinggroup import GT  # noqa: E402
+from crypto.cpabe.cpabe import CPABETools, SUPPORTED_CURVES  # noqa: E402
+from crypto.cpabe.codec import FORMAT_BINARY, FORMAT_JSON  # noqa: E402
+
+DEFAULT_LEAVES = (1, 2, 4, 8, 16)
+
+
+def _median_ms(fn, rounds):
+    samples = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_curve(curve, leaves, rounds, work_dir):
+    cpabe = CPABETools(curve)
+    group = cpabe.get_group()
+    public_key_file = os.path.join(work_dir, f"{curve}_public_key.bin")
+    master_key_file = os.path.join(work_dir, f"{curve}_master_key.bin")
+    device_key_file = os.path.join(work_dir, f"{curve}_device_key.bin")
+
+    setup_ms, ok = _median_ms(lambda: cpabe.setup(public_key_file, master_key_file), rounds)
+    if not ok:
+        raise RuntimeError(f"{curve} setup 실패")
+    pk = cpabe.load_public_key(public_key_file)
+
+    rows = []
+    for n in leaves:
+        attributes = [f"ATTR{i}" for i in range(1, n + 1)]
+        policy = " and ".join(attributes)
+
+        keygen_ms, sk = _median_ms(
+            lambda: cpabe.generate_device_secret_key(
+                public_key_file, master_key_file, attributes, device_key_file
+            ),
+            rounds,
+        )
+        if sk is None:
+            raise RuntimeError(f"{curve} keygen 실패")
+
+        message = group.random(GT)
+        encrypt_ms, as_binary = _median_ms(
+            lambda: cpabe.encrypt(message, policy, public_key_file, output_format=FORMAT_BINARY), rounds
+        )
+        as_json = cpabe.encrypt(message, policy, public_key_file, output_format=FORMAT_JSON)
+
+        ciphertext = cpabe.load_ciphertext(as_binary)
+        decrypt_ms, recovered = _median_ms(lambda: cpabe.cpabe.decrypt(pk, sk, ciphertext), rounds)
+        if recovered != message:
+            raise RuntimeError(f"{curve} 복호화 결과가 원문과 다릅니다 (leaves={n})")
+
+        rows.append((n, keygen_ms, encrypt_ms, decrypt_ms, len(as_json.encode()), len(as_binary)))
+    return setup_ms, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--curves", default="SS512,MNT224", help=f"쉼표로 구분 (지원: {','.join(SUPPORTED_CURVES)})")
+    parser.add_argument("--leaves", default=",".join(str(n) for n in DEFAULT_LEAVES))
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    curves = [c.strip().upper() for c in args.curves.split(",") if c.strip()]
+    leaves = [int(n) for n in args.leaves.split(",") if n.strip()]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for curve in curves:
+            try:
+                setup_ms, rows = bench_curve(curve, leaves, max(1, args.rounds), work_dir)
+            except Exception as e:
+                print(f"[{curve}] 측정 실패: {e}\n")
+                continue
+
+            print(f"[{curve}] setup {setup_ms:.1f} ms")
+            header = f"{'leaves':>6} {'keygen ms':>10} {'encrypt ms':>11} {'decrypt ms':>11} {'json B':>8} {'binary B':>9}"
+            print(header)
+            print("-" * len(header))
+            for n, keygen_ms, encrypt_ms, decrypt_ms, json_size, binary_size in rows:
+                print(
+                    f"{n:>6} {keygen_ms:>10.1f} {encrypt_ms:>11.1f} {decrypt_ms:>11.1f} "
+                    f"{json_size:>8} {binary_size:>9}"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    main()
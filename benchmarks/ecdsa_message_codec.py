@@ -0,0 +1,81 @@
+"""
+서명 메시지 직렬화 비교: ECDSATools.serialize_message(JSON) vs encode_message(결정적 바이너리).
+
+    python -m benchmarks.ecdsa_message_codec [--iterations 20000]
+
+- 왕복(round-trip) 결과가 원본과 같은지 먼저 확인한 뒤
+- 메시지 종류별 크기와 인코딩/디코딩 처리량(ops/s)을 출력
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from charm.toolbox.pairinggroup import G1, GT  # noqa: E402
+from crypto.ecdsa.ecdsa import ECDSATools, GLOBAL_GROUP  # noqa: E402
+
+
+def sample_messages():
+    update = {
+        "uid": "firmware.bin_1.2.3",
+        "ipfs_hash": "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG",
+        "encrypted_key": os.urandom(700),
+        "hash_of_update": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+        "description": "보안 패치 및 성능 개선",
+        "price": 10**16,
+        "version": "1.2.3",
+    }
+    return {
+        "update": update,
+        "update+attributes": dict(update, attributes={"K4", "ATLANTICBLUE", "EXCLUSIVE", "PRESTIGE"}),
+        "update+elements": dict(update, C=GLOBAL_GROUP.random(G1), C_tilde=GLOBAL_GROUP.random(GT)),
+    }
+
+
+def _normalize(value):
+    """비교용: tuple → list (두 코덱 모두 배열을 list로 복원)"""
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def _throughput(fn, arg, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return iterations / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    header = f"{'message':<20} {'json B':>7} {'bin B':>7} {'json enc/s':>11} {'bin enc/s':>10} {'json dec/s':>11} {'bin dec/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, message in sample_messages().items():
+        as_json = ECDSATools.serialize_message(message)
+        as_binary = ECDSATools.encode_message(message)
+
+        # 왕복 확인 (바이너리는 결정적이어야 하므로 다시 인코딩한 바이트도 같아야 함)
+        decoded = ECDSATools.decode_message(as_binary)
+        assert _normalize(decoded) == _normalize(message), f"{name}: 바이너리 왕복 결과가 다릅니다"
+        assert ECDSATools.encode_message(decoded) == as_binary, f"{name}: 재인코딩 결과가 다릅니다"
+        ECDSATools.deserialize_message(as_json)
+
+        print(
+            f"{name:<20} {len(as_json):>7} {len(as_binary):>7} "
+            f"{_throughput(ECDSATools.serialize_message, message, args.iterations):>11.0f} "
+            f"{_throughput(ECDSATools.encode_message, message, args.iterations):>10.0f} "
+            f"{_throughput(ECDSATools.deserialize_message, as_json, args.iterations):>11.0f} "
+            f"{_throughput(ECDSATools.decode_message, as_binary, args.iterations):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
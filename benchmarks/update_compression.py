@@ -0,0 +1,147 @@
+"""
+암호화 전 압축 비교: 코덱/레벨별 압축률과 업로드 경로에 추가되는 지연 시간.
+
+    python -m benchmarks.update_compression [--files a.bin,b.img] [--codecs none,zstd:3,zstd:9,lzma:6] [--rounds 3]
+
+- 각 이미지를 StreamingEncryptor(압축 + AES CBC)로 암호화하는 시간을 압축 없음(none)과 비교
+- 복호화 → 해제 결과가 원본과 같은지 먼저 확인
+- --files를 주지 않으면 대표 이미지를 합성해 사용
+  (firmware: 코드/테이블/0 패딩/압축된 리소스 혼합, text: 설정·로그형 텍스트, random: 압축 불가)
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Crypto.Cipher import AES  # noqa: E402
+from Crypto.Util.Padding import unpad  # noqa: E402
+from crypto.symmetric.symmetric import SymmetricCrypto  # noqa: E402
+from crypto.symmetric.compression import (  # noqa: E402
+    CompressionError,
+    new_compressor,
+    new_decompressor,
+    resolve_compression,
+)
+
+DEFAULT_CODECS = "none,zstd:3,zstd:9,zstd:19,lzma:1,lzma:6"
+SAMPLE_SIZE = 32 * 1024 * 1024
+
+
+def _firmware_like(size, rng):
+    """명령어 패턴이 반복되는 코드 영역 + 룩업 테이블 + 0 패딩 + 이미 압축된 리소스"""
+    opcodes = [rng.randbytes(4) for _ in range(256)]
+    out = bytearray()
+    while len(out) < size:
+        section = rng.random()
+        length = rng.randint(64 * 1024, 1024 * 1024)
+        if section < 0.5:
+            out += b"".join(opcodes[int(rng.paretovariate(1.2)) % 256] for _ in range(length // 4))
+        elif section < 0.65:
+            out += bytes(range(256)) * (length // 256)
+        elif section < 0.8:
+            out += b"\x00" * length if rng.random() < 0.5 else b"\xff" * length
+        else:
+            out += rng.randbytes(length // 4)
+    return bytes(out[:size])
+
+
+def _text_like(size, rng):
+    words = [b"config", b"vehicle", b"ecu", b"timeout", b"=", b"true", b"false", b"0x1F", b"brake", b"update"]
+    lines = []
+    total = 0
+    while total < size:
+        line = b" ".join(rng.choice(words) for _ in range(rng.randint(3, 12))) + b"\n"
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)[:size]
+
+
+def sample_images(size=SAMPLE_SIZE):
+    rng = random.Random(1234)
+    return {
+        "firmware": _firmware_like(size, rng),
+        "text": _text_like(size // 4, rng),
+        "random": rng.randbytes(size // 4),
+    }
+
+
+def _encrypt(data, key, codec, level):
+    out = io.BytesIO()
+    SymmetricCrypto.encrypt_stream(io.BytesIO(data), out, key, compressor=new_compressor(codec, level))
+    return out.getvalue()
+
+
+def _roundtrip(ciphertext, key, codec):
+    plaintext = unpad(AES.new(key, AES.MODE_CBC, ciphertext[:16]).decrypt(ciphertext[16:]), AES.block_size)
+    decompressor = new_decompressor(codec)
+    return decompressor.decompress(plaintext) if decompressor is not None else plaintext
+
+
+def _median_ms(fn, rounds):
+    samples = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def _parse_codecs(text):
+    codecs = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        codec, _, level = item.partition(":")
+        try:
+            codecs.append(resolve_compression(codec, level or None))
+        except CompressionError as e:
+            print(f"[{item}] 건너뜀: {e}")
+    return codecs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", default="", help="쉼표로 구분한 대표 이미지 경로 (없으면 합성 이미지)")
+    parser.add_argument("--codecs", default=DEFAULT_CODECS, help="codec[:level]을 쉼표로 구분")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.files:
+        images = {}
+        for path in (p.strip() for p in args.files.split(",") if p.strip()):
+            with open(path, "rb") as f:
+                images[os.path.basename(path)] = f.read()
+    else:
+        images = sample_images()
+    codecs = _parse_codecs(args.codecs)
+    rounds = max(1, args.rounds)
+    key = os.urandom(32)
+
+    for name, data in images.items():
+        baseline_ms, _ = _median_ms(lambda: _encrypt(data, key, "none", None), rounds)
+        print(f"[{name}] {len(data) / 1e6:.1f} MB, 압축 없이 암호화 {baseline_ms:.0f} ms")
+        header = f"{'codec':<10} {'enc MB':>8} {'ratio':>7} {'saved MB':>9} {'enc ms':>8} {'added ms':>9} {'MB/s':>7}"
+        print(header)
+        print("-" * len(header))
+        for codec, level in codecs:
+            label = codec if level is None else f"{codec}:{level}"
+            elapsed_ms, ciphertext = _median_ms(lambda: _encrypt(data, key, codec, level), rounds)
+            if _roundtrip(ciphertext, key, codec) != data:
+                raise RuntimeError(f"{name} {label}: 복호화/해제 결과가 원본과 다릅니다")
+            print(
+                f"{label:<10} {len(ciphertext) / 1e6:>8.2f} {len(data) / len(ciphertext):>7.2f} "
+                f"{(len(data) - len(ciphertext)) / 1e6:>9.2f} {elapsed_ms:>8.0f} "
+                f"{elapsed_ms - baseline_ms:>9.0f} {len(data) / 1e6 / (elapsed_ms / 1000):>7.1f}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import logging
+import threading
+import requests
+from eth_abi import decode as abi_decode
+from eth_utils import to_checksum_address
+from eth_utils.abi import get_abi_output_types
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC 배치 요청 / Multicall 한 번에 묶는 호출 수
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "100"))
+# Multicall3 주소. 지정하지 않으면 표준 배포 주소에 코드가 있는지 확인해 자동 사용
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+# "auto" | "multicall" | "batch" | "sequential"
+RPC_READ_MODE = os.getenv("RPC_READ_MODE", "auto").lower()
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+# RPC 엔드포인트별 읽기 방식 판별 결과 캐시 (Multicall 배포 여부 / 배치 지원 여부)
+_mode_cache = {}
+_mode_lock = threading.Lock()
+
+_FAILED = object()
+
+
+class UpdateBatchReader:
+    """
+    getUpdateIdByIndex / getUpdateInfo 를 인덱스 범위 단위로 묶어서 읽는 클래스.
+    - Multicall3가 배포되어 있으면 aggregate3(allowFailure=True) 한 번에 최대 RPC_BATCH_SIZE개 호출
+    - 없으면 eth_call JSON-RPC 배치 요청 사용
+    - 실패한 항목만 개별 eth_call로 다시 시도
+    """
+
+    def __init__(self, web3, contract, batch_size=RPC_BATCH_SIZE):
+        self.web3 = web3
+        self.contract = contract
+        self.batch_size = batch_size
+        self.endpoint = getattr(web3.provider, "endpoint_uri", None)
+        self._session = requests.Session()
+
+    # ---- 공개 API ----
+
+    def get_count(self, block="latest"):
+        return self.contract.functions.getUpdateCount().call(block_identifier=block)
+
+    def read_range(self, start, end, block="latest"):
+        """
+        인덱스 [start, end) 범위의 (idx, uid, info) 목록 반환.
+        - 조회에 최종 실패한 항목은 uid 또는 info가 None
+        """
+        indices = list(range(start, end))
+        if not indices:
+            return []
+        uids = self.call_many("getUpdateIdByIndex", [(idx,) for idx in indices], block)
+        info_targets = [(i, uid) for i, uid in enumerate(uids) if uid is not None]
+        infos = self.call_many("getUpdateInfo", [(uid,) for _, uid in info_targets], block)
+
+        info_by_pos = {i: info for (i, _), info in zip(info_targets, infos)}
+        return [(idx, uids[i], info_by_pos.get(i)) for i, idx in enumerate(indices)]
+
+    def read_uids(self, uids, block="latest"):
+        """uid 목록의 getUpdateInfo 결과 반환 (실패한 항목은 None)"""
+        return self.call_many("getUpdateInfo", [(uid,) for uid in uids], block)
+
+    def call_many(self, fn_name, args_list, block="latest"):
+        """같은 view 함수를 여러 인자로 호출한 결과 목록 (실패한 항목은 None)"""
+        fn_abi = self.contract.get_function_by_name(fn_name).abi
+        output_types = get_abi_output_types(fn_abi)
+        block_param = self._block_param(block)
+
+        results = []
+        mode = self._read_mode()
+        for offset in range(0, len(args_list), self.batch_size):
+            chunk = args_list[offset:offset + self.batch_size]
+            calldata = [self.contract.encode_abi(fn_name, args=list(args)) for args in chunk]
+            raw = None
+            if mode == "multicall":
+                raw = self._multicall(calldata, block)
+            elif mode == "batch":
+                raw = self._rpc_batch(calldata, block_param)
+            if raw is None:
+                raw = [_FAILED] * len(chunk)
+
+            for args, data in zip(chunk, raw):
+                if data is not _FAILED:
+                    try:
+                        results.append(_unwrap(abi_decode(output_types, data)))
+                        continue
+                    except Exception as e:
+                        logger.warning(f"{fn_name}{tuple(args)} 응답 디코딩 실패: {e}")
+                results.append(self._single_call(fn_name, args, block))
+        return results
+
+    # ---- 내부 구현 ----
+
+    def _read_mode(self):
+        if RPC_READ_MODE != "auto":
+            return RPC_READ_MODE
+        with _mode_lock:
+            mode = _mode_cache.get(self.endpoint)
+            if mode is None:
+                mode = "batch" if self.endpoint else "sequential"
+                try:
+                    if MULTICALL3_ADDRESS and self.web3.eth.get_code(to_checksum_address(MULTICALL3_ADDRESS)):
+                        mode = "multicall"
+                except Exception as e:
+                    logger.warning(f"Multicall3 배포 여부 확인 실패: {e}")
+                logger.info(f"업데이트 목록 읽기 방식: {mode} ({self.endpoint})")
+                _mode_cache[self.endpoint] = mode
+            return mode
+
+    def _block_param(self, block):
+        if isinstance(block, int):
+            return hex(block)
+        return block
+
+    def _multicall(self, calldata, block):
+        multicall = self.web3.eth.contract(
+            address=to_checksum_address(MULTICALL3_ADDRESS), abi=MULTICALL3_ABI
+        )
+        calls = [(self.contract.address, True, Web3.to_bytes(hexstr=data)) for data in calldata]
+        try:
+            returned = multicall.functions.aggregate3(calls).call(block_identifier=block)
+        except Exception as e:
+            logger.warning(f"Multicall 조회 실패, 개별 조회로 대체: {e}")
+            return None
+        return [data if success and data else _FAILED for success, data in returned]
+
+    def _rpc_batch(self, calldata, block_param):
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "eth_call",
+                "params": [{"to": self.contract.address, "data": data}, block_param],
+            }
+            for i, data in enumerate(calldata)
+        ]
+        try:
+            resp = self._session.post(self.endpoint, json=payload, timeout=30)
+            resp.raise_for_status()
+            body = resp.json()
+        except Exception as e:
+            logger.warning(f"JSON-RPC 배치 요청 실패, 개별 조회로 대체: {e}")
+            return None
+        if not isinstance(body, list):
+            # 배치를 지원하지 않는 노드는 단일 오류 객체를 반환함
+            logger.warning(f"JSON-RPC 배치 미지원 응답, 개별 조회로 전환: {str(body)[:200]}")
+            with _mode_lock:
+                _mode_cache[self.endpoint] = "sequential"
+            return None
+
+        raw = [_FAILED] * len(calldata)
+        for item in body:
+            idx = item.get("id")
+            result = item.get("result")
+            if isinstance(idx, int) and 0 <= idx < len(raw) and result and "error" not in item:
+                raw[idx] = Web3.to_bytes(hexstr=result)
+        return raw
+
+    def _single_call(self, fn_name, args, block):
+        try:
+            return self.contract.get_function_by_name(fn_name)(*args).call(block_identifier=block)
+        except Exception as e:
+            logger.warning(f"{fn_name}{tuple(args)} 조회 실패: {e}")
+            return None
+
+
+def _unwrap(decoded):
+    """web3 call()과 같은 형태로 변환 (출력 1개는 값 그대로, 여러 개는 리스트)"""
+    if len(decoded) == 1:
+        return decoded[0]
+    return list(decoded)
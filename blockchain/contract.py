@@ -1,52 +1,160 @@
 import json
 import os
+import time
 import base64
 import binascii
+import logging
+import threading
 from web3 import Web3
 from eth_account import Account  # [추가]
-
-# 블록체인 스마트컨트랙트 연동 모듈 (예시)
-class BlockchainNotifier:
-    def __init__(
-        self,
-        provider_url=None,
-        registry_info_path=None,
-        account_address=None,
-        private_key=None,
-    ):
-        # provider_url 기본값
-        if provider_url is None:
-            provider_url = os.environ.get(
-                "BLOCKCHAIN_PROVIDER", "http://localhost:8545"
-            )
-        self.web3 = Web3(Web3.HTTPProvider(provider_url))
-
-        # AddressRegistry 정보 경로
-        if registry_info_path is None:
-            registry_info_path = os.path.join(
-                os.path.dirname(__file__), "registry_address.json"
-            )
+from blockchain.batch_reader import UpdateBatchReader
+from blockchain.nonce_manager import get_nonce_manager, is_nonce_error
+from blockchain.fee_strategy import get_fee_strategy, get_gas_estimator, get_fee_bumper
+from blockchain.receipt_tracker import get_receipt_tracker
+
+logger = logging.getLogger(__name__)
+
+# 레지스트리에서 조회하는 컨트랙트 이름
+UPDATE_CONTRACT_NAME = "SoftwareUpdateContract"
+# 조회한 컨트랙트 주소/ABI 및 manufacturer 캐시 유지 시간(초)
+CONTRACT_CACHE_TTL = float(os.getenv("CONTRACT_CACHE_TTL", "300"))
+# 레지스트리 주소 변경 이벤트 확인 주기(초)
+REGISTRY_POLL_INTERVAL = float(os.getenv("REGISTRY_EVENT_POLL_INTERVAL", "5"))
+
+# AddressRegistry 정보 기본 경로
+DEFAULT_REGISTRY_INFO_PATH = os.path.join(os.path.dirname(__file__), "registry_address.json")
+
+# (provider_url, registry_info_path) → 조회 결과
+_resolved_contracts = {}
+_resolved_lock = threading.Lock()
+_registry_watchers = {}
+
+
+def default_provider_url():
+    """환경 변수의 블록체인 RPC 주소 (기본값 localhost)"""
+    return os.environ.get("BLOCKCHAIN_PROVIDER", "http://localhost:8545")
+
+
+def resolve_update_contract(provider_url=None, registry_info_path=None):
+    """
+    레지스트리에서 SoftwareUpdateContract 주소/ABI를 조회해 프로세스 전역으로 캐시.
+    - CONTRACT_CACHE_TTL 동안 같은 Web3 연결과 컨트랙트 핸들을 재사용
+    - 레지스트리가 ContractAddressUpdated 이벤트를 발생시키면 즉시 무효화
+    """
+    if provider_url is None:
+        provider_url = default_provider_url()
+    if registry_info_path is None:
+        registry_info_path = DEFAULT_REGISTRY_INFO_PATH
+    key = (provider_url, os.path.abspath(registry_info_path))
+    with _resolved_lock:
+        entry = _resolved_contracts.get(key)
+        if entry is not None and time.time() - entry["resolved_at"] < CONTRACT_CACHE_TTL:
+            return entry
+
+        web3 = entry["web3"] if entry is not None else Web3(Web3.HTTPProvider(provider_url))
 
         # AddressRegistry 주소/ABI 로드
         with open(registry_info_path, "r") as f:
             reg_info = json.load(f)
-        registry_address = reg_info["address"]
-        registry_abi = reg_info["abi"]
-        registry_contract = self.web3.eth.contract(
-            address=registry_address, abi=registry_abi
+        registry_contract = web3.eth.contract(
+            address=reg_info["address"], abi=reg_info["abi"]
         )
 
         # SoftwareUpdateContract 주소와 ABI를 레지스트리에서 직접 조회
+        from_block = web3.eth.block_number
         update_address = registry_contract.functions.getContractAddress(
-            "SoftwareUpdateContract"
+            UPDATE_CONTRACT_NAME
         ).call()
         update_abi_json = registry_contract.functions.getAbi(
-            "SoftwareUpdateContract"
+            UPDATE_CONTRACT_NAME
         ).call()
         update_abi = json.loads(update_abi_json)
 
-        # contract 핸들러 생성
-        self.contract = self.web3.eth.contract(address=update_address, abi=update_abi)
+        contract = web3.eth.contract(address=update_address, abi=update_abi)
+        entry = {
+            "web3": web3,
+            "registry": registry_contract,
+            "contract": contract,
+            "reader": UpdateBatchReader(web3, contract),
+            "manufacturer": None,
+            "chain_id": entry["chain_id"] if entry is not None else None,
+            "resolved_at": time.time(),
+        }
+        _resolved_contracts[key] = entry
+        _start_registry_watcher(key, entry, from_block)
+        return entry
+
+
+def invalidate_update_contract(key=None):
+    """캐시된 컨트랙트 조회 결과 삭제 (key가 없으면 전체)"""
+    with _resolved_lock:
+        if key is None:
+            _resolved_contracts.clear()
+        else:
+            _resolved_contracts.pop(key, None)
+
+
+def _start_registry_watcher(key, entry, from_block):
+    """레지스트리의 ContractAddressUpdated 이벤트를 폴링하는 스레드 (key당 1개)"""
+    watcher = _registry_watchers.get(key)
+    if watcher is not None and watcher.is_alive():
+        return
+    watcher = threading.Thread(
+        target=_watch_registry,
+        args=(key, entry["web3"], entry["registry"], from_block),
+        name="registry-watcher",
+        daemon=True,
+    )
+    _registry_watchers[key] = watcher
+    watcher.start()
+
+
+def _watch_registry(key, web3, registry_contract, from_block):
+    event = registry_contract.events.ContractAddressUpdated()
+    topic = Web3.keccak(text="ContractAddressUpdated(string,address,uint256)")
+    next_block = from_block
+    while True:
+        time.sleep(REGISTRY_POLL_INTERVAL)
+        try:
+            head = web3.eth.block_number
+            if head < next_block:
+                continue
+            logs = web3.eth.get_logs(
+                {
+                    "address": registry_contract.address,
+                    "fromBlock": next_block,
+                    "toBlock": head,
+                    "topics": [topic],
+                }
+            )
+            for log in logs:
+                if event.process_log(log)["args"]["name"] == UPDATE_CONTRACT_NAME:
+                    logger.info(
+                        f"레지스트리 주소 변경 감지 (block {log['blockNumber']}) → 컨트랙트 캐시 무효화"
+                    )
+                    invalidate_update_contract(key)
+                    break
+            next_block = head + 1
+        except Exception as e:
+            logger.warning(f"레지스트리 이벤트 조회 실패: {e}")
+
+
+# 블록체인 스마트컨트랙트 연동 모듈 (예시)
+class BlockchainNotifier:
+    def __init__(
+        self,
+        provider_url=None,
+        registry_info_path=None,
+        account_address=None,
+        private_key=None,
+    ):
+        # contract 핸들러 (provider_url/registry_info_path 미지정 시 기본값 사용): 레지스트리 조회 결과를 프로세스 전역 캐시에서 가져옴
+        resolved = resolve_update_contract(provider_url, registry_info_path)
+        self._resolved = resolved
+        self.web3 = resolved["web3"]
+        self.contract = resolved["contract"]
+        # 목록 조회용 배치 리더 (Multicall3 / JSON-RPC 배치)
+        self.reader = resolved["reader"]
 
         # 계정 정보: 환경 변수에서 가져오거나 전달받음
         self.private_key = private_key or os.environ.get("BLOCKCHAIN_PRIVATE_KEY")
@@ -66,8 +174,12 @@ class BlockchainNotifier:
             )
 
         # [추가] 사전 검증: manufacturer와 sender가 같은지 확인해 조기에 명확히 실패
+        # manufacturer 주소는 컨트랙트 캐시와 함께 보관하여 매 요청마다 조회하지 않음
         try:
-            manufacturer = self.contract.functions.manufacturer().call()
+            manufacturer = resolved["manufacturer"]
+            if manufacturer is None:
+                manufacturer = self.contract.functions.manufacturer().call()
+                resolved["manufacturer"] = manufacturer
             if self.account_address.lower() != manufacturer.lower():
                 raise RuntimeError(
                     f"[registerUpdate 사전검증 실패] 트랜잭션 송신자({self.account_address})가 "
@@ -125,9 +237,6 @@ class BlockchainNotifier:
                 except Exception:
                     signature = signature.encode()
 
-        # [추가] 체인ID/가스가격/가스 추정으로 안정화
-        chain_id = self.web3.eth.chain_id
-        gas_price = self.web3.to_wei("20", "gwei")
         # 먼저 call data 구성
         func = self.contract.functions.registerUpdate(
             uid,
@@ -139,43 +248,79 @@ class BlockchainNotifier:
             version,
             signature,       # ✅ raw bytes
         )
-        # 가스 추정 (sender 지정)
         try:
-            estimated_gas = func.estimate_gas({"from": self.account_address})
-        except Exception:
-            estimated_gas = 2_000_000  # 추정 실패시 보수적 상한
-
-        tx = func.build_transaction(
-            {
-                "from": self.account_address,
-                "nonce": self.web3.eth.get_transaction_count(self.account_address),
-                "gas": estimated_gas,
-                "gasPrice": gas_price,
-                "chainId": chain_id,  # [추가] EIP-155 안전
-            }
-        )
+            return self._send_transaction(func)
+        except ValueError as e:
+            # [추가] JSON-RPC 오류 메시지를 그대로 노출 (리버트 사유 등)
+            raise RuntimeError(f"send_raw_transaction error: {e}")
+
+    def _send_transaction(self, func):
+        """
+        컨트랙트 함수 호출 트랜잭션을 서명해 전송하고 tx_hash 반환.
+        - 가스 한도: 같은 함수에서 calldata가 더 길지 않은 추정값만 재사용 (추정 실패는 리버트 가능성이 높아 오류로 올림)
+        - 수수료: 캐시된 eth_feeHistory 기반 EIP-1559 수수료 (미지원 체인은 legacy gasPrice)
+        - nonce는 프로세스 전역 NonceManager에서 받아 동시 전송 시에도 겹치지 않음
+        - 다른 프로세스가 같은 nonce를 먼저 사용한 경우 재동기화 후 한 번 더 시도
+        - 전송 후 채굴이 늦어지면 FeeBumper가 수수료를 올려 다시 전송
+        - 채굴 결과는 ReceiptTracker가 추적 (/tx/<tx_hash>로 조회)
+        """
+        calldata = self.contract.encode_abi(func.fn_name, args=func.args, kwargs=func.kwargs or None)
+        gas = get_gas_estimator().estimate(func, self.account_address, calldata)
+        fees = get_fee_strategy(self.web3).fees()
 
         # [추가] 잔액 체크 (가스비 부족 시 깔끔한 에러)
         try:
             balance = self.web3.eth.get_balance(self.account_address)
-            max_cost = tx["gas"] * tx["gasPrice"]
-            if balance < max_cost:
-                raise RuntimeError(
-                    f"Insufficient funds: balance={balance}, needed≈{max_cost}"
-                )
         except Exception:
-            pass  # 네트워크별 get_balance 실패 시 그냥 진행
-
-        # 서명 및 전송
-        signed_tx = self.web3.eth.account.sign_transaction(
-            tx, private_key=self.private_key
-        )
-        try:
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            balance = None  # 네트워크별 get_balance 실패 시 그냥 진행
+        max_cost = gas * get_fee_strategy(self.web3).max_fee_per_gas(fees)
+        if balance is not None and balance < max_cost:
+            raise RuntimeError(f"Insufficient funds: balance={balance}, needed≈{max_cost}")
+
+        # [추가] EIP-155 안전 (체인 ID는 컨트랙트 캐시와 함께 보관)
+        chain_id = self._resolved["chain_id"]
+        if chain_id is None:
+            chain_id = self.web3.eth.chain_id
+            self._resolved["chain_id"] = chain_id
+
+        nonces = get_nonce_manager(self.web3, self.account_address)
+        for attempt in range(2):
+            nonce = nonces.allocate()
+            try:
+                tx = func.build_transaction(
+                    {
+                        "from": self.account_address,
+                        "nonce": nonce,
+                        "gas": gas,
+                        "chainId": chain_id,
+                        **fees,
+                    }
+                )
+                signed_tx = self.web3.eth.account.sign_transaction(
+                    tx, private_key=self.private_key
+                )
+                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception as e:
+                nonces.release(nonce, e)
+                if attempt == 0 and is_nonce_error(e):
+                    logger.warning(f"nonce {nonce} 충돌, 재동기화 후 재시도: {e}")
+                    continue
+                raise
+            nonces.mark_sent(nonce, tx_hash, signed_tx.raw_transaction, tx=tx)
+            get_fee_bumper(self.web3, self.account_address, self.private_key)
+
+            # 채굴/리버트 여부는 ReceiptTracker가 블록 단위로 묶어서 확인
+            tracker = get_receipt_tracker()
+            tracker.attach(self.web3)
+            tracker.track(
+                tx_hash,
+                kind=func.fn_name,
+                uid=func.args[0] if func.args else None,
+                sender=self.account_address,
+                nonce=nonce,
+                to=self.contract.address,
+            )
             return tx_hash
-        except ValueError as e:
-            # [추가] JSON-RPC 오류 메시지를 그대로 노출 (리버트 사유 등)
-            raise RuntimeError(f"send_raw_transaction error: {e}")
 
     def get_all_updates(self):
         """
@@ -186,16 +331,18 @@ class BlockchainNotifier:
         """
         updates = []
         try:
-            update_count = self.contract.functions.getUpdateCount().call()
+            update_count = self.reader.get_count()
             print(f"블록체인에서 조회된 업데이트 수: {update_count}")
 
-            for idx in range(update_count):
+            # uid/정보를 인덱스 범위 단위로 묶어서 조회
+            for idx, uid, info in self.reader.read_range(0, update_count):
                 try:
-                    uid = self.contract.functions.getUpdateIdByIndex(idx).call()
+                    if uid is None or info is None:
+                        print(f"인덱스 {idx}의 업데이트 조회 실패")
+                        continue
                     print(f"인덱스 {idx}의 UID: {uid}")
 
                     # 스마트 컨트랙트에서 반환하는 데이터 형식에 맞게 처리
-                    info = self.contract.functions.getUpdateInfo(uid).call()
                     print(f"UID {uid}의 원본 정보: {info}")
 
                     # 리스트 형식으로 반환되는 경우 (배열 반환)
@@ -250,11 +397,11 @@ class BlockchainNotifier:
         """
         updates = []
         try:
-            update_count = self.contract.functions.getUpdateCount().call()
-            for idx in range(update_count):
+            update_count = self.reader.get_count()
+            for idx, uid, info in self.reader.read_range(0, update_count):
                 try:
-                    uid = self.contract.functions.getUpdateIdByIndex(idx).call()
-                    info = self.contract.functions.getUpdateInfo(uid).call()
+                    if uid is None or info is None:
+                        continue
                     # info: [ipfsHash, encryptedKey, hashOfUpdate, description, price, version, isValid]
                     is_valid = info[6] if len(info) > 6 else True
                     update_info = {
@@ -281,20 +428,7 @@ class BlockchainNotifier:
         블록체인 SoftwareUpdateContract의 cancelUpdate(uid) 함수 호출
         제조사(관리자)만 호출 가능
         """
-        tx = self.contract.functions.cancelUpdate(uid).build_transaction(
-            {
-                "from": self.account_address,
-                "nonce": self.web3.eth.get_transaction_count(self.account_address),
-                "gas": 200000,  # 적절한 가스 한도
-                "gasPrice": self.web3.to_wei("20", "gwei"),
-                "chainId": self.web3.eth.chain_id,  # [추가]
-            }
-        )
-        signed_tx = self.web3.eth.account.sign_transaction(
-            tx, private_key=self.private_key
-        )
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        return tx_hash
+        return self._send_transaction(self.contract.functions.cancelUpdate(uid))
 
     def get_updates_paginated(self, page=1, limit=20, include_invalid=False):
         """
@@ -318,47 +452,50 @@ class BlockchainNotifier:
 
         updates = []
         try:
-            # 전체 업데이트 개수 조회
-            total_count = self.contract.functions.getUpdateCount().call()
-
-            # 페이지네이션 계산
+            # 페이지 계산 도중 새 등록/취소가 섞이지 않도록 같은 블록 기준으로 조회
+            block = self.web3.eth.block_number
+            count = self.reader.get_count(block=block)
             start_index = (page - 1) * limit
-            end_index = min(start_index + limit, total_count)
+
+            if include_invalid:
+                # 취소된 항목도 포함하면 인덱스 범위가 곧 페이지
+                total_count = count
+                entries = self.reader.read_range(
+                    start_index, min(start_index + limit, count), block=block
+                )
+            else:
+                # 유효한 항목 기준으로 페이지를 채우고 전체 개수도 유효 항목만 셈
+                # (로컬 업데이트 인덱스 동기화 전에만 쓰이는 경로라 배치 단위로 끝까지 확인)
+                total_count = 0
+                entries = []
+                for batch_start in range(0, count, self.reader.batch_size):
+                    batch_end = min(batch_start + self.reader.batch_size, count)
+                    for idx, uid, info in self.reader.read_range(batch_start, batch_end, block=block):
+                        if uid is None or info is None:
+                            print(f"인덱스 {idx}의 업데이트 조회 실패")
+                            continue
+                        if not (info[6] if len(info) > 6 else True):
+                            continue
+                        if start_index <= total_count < start_index + limit:
+                            entries.append((idx, uid, info))
+                        total_count += 1
 
             # 전체 페이지 수 계산
             total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
 
-            # 요청한 페이지가 범위를 벗어난 경우
-            if start_index >= total_count and total_count > 0:
-                return {
-                    "updates": [],
-                    "pagination": {
-                        "current_page": page,
-                        "per_page": limit,
-                        "total_count": total_count,
-                        "total_pages": total_pages,
-                        "has_next": False,
-                        "has_prev": page > 1,
-                    },
-                }
-
             print(
-                f"페이지네이션 조회: 페이지 {page}, 범위 {start_index}~{end_index-1}, 전체 {total_count}개"
+                f"페이지네이션 조회: 페이지 {page}, 블록 {block}, 전체 {total_count}개"
             )
 
-            # 지정된 범위의 업데이트만 조회
-            for idx in range(start_index, end_index):
+            for idx, uid, info in entries:
                 try:
-                    uid = self.contract.functions.getUpdateIdByIndex(idx).call()
-                    info = self.contract.functions.getUpdateInfo(uid).call()
+                    if uid is None or info is None:
+                        print(f"인덱스 {idx}의 업데이트 조회 실패")
+                        continue
 
                     # info: [ipfsHash, encryptedKey, hashOfUpdate, description, price, version, isValid]
                     is_valid = info[6] if len(info) > 6 else True
 
-                    # include_invalid가 False면 유효한 업데이트만 포함
-                    if not include_invalid and not is_valid:
-                        continue
-
                     update_info = {
                         "uid": uid,
                         "ipfs_hash": info[0] if len(info) > 0 else "",
@@ -385,8 +522,8 @@ class BlockchainNotifier:
                 "total_pages": total_pages,
                 "has_next": page < total_pages,
                 "has_prev": page > 1,
-                "start_index": start_index + 1 if total_count > 0 else 0,
-                "end_index": min(start_index + len(updates), total_count),
+                "start_index": start_index + 1 if total_count > 0 and start_index < total_count else 0,
+                "end_index": start_index + len(updates) if updates else 0,
             }
 
             return {"updates": updates, "pagination": pagination_info}
@@ -406,3 +543,72 @@ class BlockchainNotifier:
                     "end_index": 0,
                 },
             }
+
+    def get_updates_after(self, after_index=-1, limit=20, include_invalid=False, snapshot_block=None):
+        """
+        커서 방식 업데이트 목록 조회 (체인 직접 조회)
+
+        Args:
+            after_index (int): 이 체인 인덱스 다음 항목부터 조회 (-1이면 처음부터)
+            limit (int): 페이지당 항목 수 (기본 20, 최대 100)
+            include_invalid (bool): 취소된 업데이트 포함 여부
+            snapshot_block (int): 조회 기준 블록 (미지정 시 최신 블록). 같은 스냅샷으로
+                이어서 조회하면 스크롤 도중 새로 등록된 항목이 끼어들지 않음
+
+        Returns:
+            dict: {"updates", "last_index", "snapshot_block", "has_next", "per_page"}
+        """
+        if limit < 1:
+            limit = 20
+        if limit > 100:  # 최대 100개로 제한
+            limit = 100
+        if snapshot_block is None:
+            snapshot_block = self.web3.eth.block_number
+
+        count = self.reader.get_count(block=snapshot_block)
+        updates = []
+        last_index = after_index
+        has_next = False
+        batch_start = after_index + 1
+        while batch_start < count and not has_next:
+            batch_end = min(batch_start + self.reader.batch_size, count)
+            for idx, uid, info in self.reader.read_range(batch_start, batch_end, block=snapshot_block):
+                if uid is None or info is None:
+                    # 건너뛰면 커서 이후 항목이 누락되므로 실패 지점 앞에서 페이지를 끊음
+                    print(f"인덱스 {idx}의 업데이트 조회 실패")
+                    has_next = True
+                    break
+
+                # info: [ipfsHash, encryptedKey, hashOfUpdate, description, price, version, isValid]
+                is_valid = info[6] if len(info) > 6 else True
+                if not include_invalid and not is_valid:
+                    last_index = idx
+                    continue
+                if len(updates) == limit:
+                    has_next = True
+                    break
+
+                updates.append(
+                    {
+                        "uid": uid,
+                        "ipfs_hash": info[0] if len(info) > 0 else "",
+                        "encrypted_key": (
+                            base64.b64encode(info[1]).decode() if info[1] else ""
+                        ),
+                        "hash_of_update": info[2] if len(info) > 2 else "",
+                        "description": info[3] if len(info) > 3 else "",
+                        "price": float(info[4]) / 1e18 if len(info) > 4 else 0,
+                        "version": info[5] if len(info) > 5 else "",
+                        "isValid": is_valid,
+                    }
+                )
+                last_index = idx
+            batch_start = batch_end
+
+        return {
+            "updates": updates,
+            "last_index": last_index,
+            "snapshot_block": snapshot_block,
+            "has_next": has_next,
+            "per_page": limit,
+        }
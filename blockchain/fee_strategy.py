@@ -0,0 +1,255 @@
+import os
+import time
+import logging
+import threading
+from blockchain.nonce_manager import get_nonce_manager, is_nonce_error
+from blockchain.receipt_tracker import get_receipt_tracker
+
+logger = logging.getLogger(__name__)
+
+# eth_feeHistory로 살펴보는 최근 블록 수와 우선 수수료(tip) 백분위
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "20"))
+FEE_PRIORITY_PERCENTILE = float(os.getenv("FEE_PRIORITY_PERCENTILE", "50"))
+# 조회한 수수료 정보 캐시 유지 시간(초)
+FEE_CACHE_TTL = float(os.getenv("FEE_CACHE_TTL", "12"))
+# 최소 우선 수수료 / 최대 수수료 상한 (gwei, 상한 0이면 제한 없음)
+FEE_MIN_PRIORITY_GWEI = float(os.getenv("FEE_MIN_PRIORITY_GWEI", "1"))
+FEE_MAX_GWEI = float(os.getenv("FEE_MAX_GWEI", "0"))
+# 가스 추정값에 곱하는 여유 비율, 같은 함수에서 calldata가 더 크지 않을 때 추정값 재사용 시간(초)
+GAS_ESTIMATE_MARGIN = float(os.getenv("GAS_ESTIMATE_MARGIN", "1.2"))
+GAS_ESTIMATE_TTL = float(os.getenv("GAS_ESTIMATE_TTL", "600"))
+# 함수별로 보관하는 (calldata 길이, 가스) 추정 기록 수
+GAS_ESTIMATE_ENTRIES = 32
+# 이 블록 수만큼 채굴되지 않으면 수수료를 올려 같은 nonce로 다시 전송 (0이면 사용 안 함)
+FEE_BUMP_AFTER_BLOCKS = int(os.getenv("FEE_BUMP_AFTER_BLOCKS", "3"))
+FEE_MAX_BUMPS = int(os.getenv("FEE_MAX_BUMPS", "5"))
+# 노드가 대체 트랜잭션을 받아들이는 최소 인상폭(10%)보다 조금 크게
+FEE_BUMP_RATIO = 1.125
+FEE_REPLACEMENT_MIN_PERCENT = 110
+FEE_BUMP_POLL_INTERVAL = 3
+
+GWEI = 10**9
+
+
+class FeeStrategy:
+    """
+    트랜잭션 수수료 필드 결정 (RPC 엔드포인트별 공유, 스레드 안전).
+    - 최신 블록에 baseFeePerGas가 있으면 EIP-1559(type 2) 수수료:
+      최근 FEE_HISTORY_BLOCKS 블록의 tip 백분위 중앙값 + 다음 블록 base fee의 2배를 최대 수수료로 사용
+    - base fee가 없는 체인(구버전 ganache 등)은 eth_gasPrice 기반 legacy 수수료
+    - 조회 결과는 FEE_CACHE_TTL 동안 재사용
+    """
+
+    def __init__(self, web3):
+        self.web3 = web3
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+        self._eip1559 = None
+
+    def fees(self):
+        """build_transaction에 넣을 수수료 필드 dict"""
+        with self._lock:
+            if self._cached is None or time.time() - self._cached_at >= FEE_CACHE_TTL:
+                self._cached = self._fetch()
+                self._cached_at = time.time()
+            return dict(self._cached)
+
+    def max_fee_per_gas(self, fees):
+        return fees.get("maxFeePerGas", fees.get("gasPrice", 0))
+
+    def _fetch(self):
+        if self._eip1559 is None:
+            latest = self.web3.eth.get_block("latest")
+            self._eip1559 = latest.get("baseFeePerGas") is not None
+            logger.info(f"수수료 방식: {'EIP-1559' if self._eip1559 else 'legacy'}")
+
+        if self._eip1559:
+            try:
+                history = self.web3.eth.fee_history(
+                    FEE_HISTORY_BLOCKS, "latest", [FEE_PRIORITY_PERCENTILE]
+                )
+                # baseFeePerGas 마지막 값은 다음 블록의 base fee
+                next_base_fee = history["baseFeePerGas"][-1]
+                tips = sorted(r[0] for r in history.get("reward") or [] if r and r[0] > 0)
+                tip = tips[len(tips) // 2] if tips else 0
+                tip = max(tip, int(FEE_MIN_PRIORITY_GWEI * GWEI))
+                max_fee = 2 * next_base_fee + tip
+                if FEE_MAX_GWEI > 0:
+                    max_fee = min(max_fee, int(FEE_MAX_GWEI * GWEI))
+                    tip = min(tip, max_fee)
+                return {"type": 2, "maxFeePerGas": max_fee, "maxPriorityFeePerGas": tip}
+            except Exception as e:
+                logger.warning(f"eth_feeHistory 조회 실패, legacy 수수료 사용: {e}")
+
+        gas_price = self.web3.eth.gas_price
+        if FEE_MAX_GWEI > 0:
+            gas_price = min(gas_price, int(FEE_MAX_GWEI * GWEI))
+        return {"gasPrice": gas_price}
+
+
+class GasEstimator:
+    """
+    가스 한도 추정 캐시.
+    - 함수별로 (calldata 길이, 가스) 추정 기록을 GAS_ESTIMATE_TTL 동안 보관
+    - 새 calldata 길이 이상으로 추정한 기록이 있을 때만 재사용 (더 긴 calldata는 저장 비용이 커서 항상 다시 추정)
+    - 재사용할 때도 eth_call로 한 번 실행해 리버트될 트랜잭션(중복 uid 등)은 전송 전에 실패 처리
+    - 추정 실패(대부분 리버트)는 숨기지 않고 오류로 올림
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}  # fn_name → [(calldata 바이트 수, gas, 추정 시각)]
+
+    def estimate(self, func, sender, calldata):
+        """calldata: 0x hex 문자열 또는 bytes (contract.encode_abi 결과)"""
+        length = len(calldata) // 2 - 1 if isinstance(calldata, str) else len(calldata)
+        now = time.time()
+        with self._lock:
+            entries = [e for e in self._cache.get(func.fn_name, ()) if now - e[2] < GAS_ESTIMATE_TTL]
+            self._cache[func.fn_name] = entries
+            covering = [e for e in entries if e[0] >= length]
+        if covering:
+            try:
+                func.call({"from": sender})
+            except Exception as e:
+                raise RuntimeError(f"{func.fn_name} 사전 실행 실패 (트랜잭션이 리버트될 수 있음): {e}")
+            # calldata 길이가 가장 가까운 기록의 추정값
+            return min(covering, key=lambda e: e[0])[1]
+
+        try:
+            estimated = func.estimate_gas({"from": sender})
+        except Exception as e:
+            raise RuntimeError(f"{func.fn_name} 가스 추정 실패 (트랜잭션이 리버트될 수 있음): {e}")
+        gas = int(estimated * GAS_ESTIMATE_MARGIN)
+        with self._lock:
+            entries = self._cache.setdefault(func.fn_name, [])
+            entries.append((length, gas, time.time()))
+            del entries[:-GAS_ESTIMATE_ENTRIES]
+        return gas
+
+
+class FeeBumper:
+    """
+    FEE_BUMP_AFTER_BLOCKS 블록 동안 채굴되지 않은 트랜잭션을 수수료를 올려 같은 nonce로 다시 전송(RBF).
+    - 전송한 트랜잭션은 NonceManager가 추적하고, 원래 tx_hash → 최신 대체 tx_hash를 기록
+    """
+
+    def __init__(self, web3, address, private_key):
+        self.web3 = web3
+        self.address = address
+        self.private_key = private_key
+        self.nonces = get_nonce_manager(web3, address)
+        self._lock = threading.Lock()
+        self._seen = {}  # tx_hash → (처음 확인한 블록, 인상 횟수)
+        self._replacements = {}  # 대체된 tx_hash → 대체한 tx_hash
+        self._thread = threading.Thread(target=self._run, name="fee-bumper", daemon=True)
+        self._thread.start()
+
+    def current_hash(self, tx_hash):
+        """수수료 인상으로 대체된 경우 가장 최근 tx_hash"""
+        with self._lock:
+            while tx_hash in self._replacements:
+                tx_hash = self._replacements[tx_hash]
+        return tx_hash
+
+    def _run(self):
+        while True:
+            time.sleep(FEE_BUMP_POLL_INTERVAL)
+            try:
+                self._check()
+            except Exception as e:
+                logger.warning(f"수수료 인상 확인 실패: {e}")
+
+    def _check(self):
+        pending = self.nonces.sent_entries()
+        # 채굴되어 추적이 끝난 트랜잭션 정리
+        live = {entry["tx_hash"] for _, entry in pending}
+        for tx_hash in [h for h in self._seen if h not in live]:
+            del self._seen[tx_hash]
+        if not pending:
+            return
+        block = self.web3.eth.block_number
+        mined = self.web3.eth.get_transaction_count(self.address, "latest")
+        for nonce, entry in pending:
+            if nonce < mined or entry.get("tx") is None:
+                continue
+            first_block, bumps = self._seen.setdefault(entry["tx_hash"], (block, entry.get("bumps", 0)))
+            if block - first_block < FEE_BUMP_AFTER_BLOCKS or bumps >= FEE_MAX_BUMPS:
+                continue
+            self._bump(nonce, entry, bumps + 1)
+
+    def _bump(self, nonce, entry, bumps):
+        tx = dict(entry["tx"])
+        current = get_fee_strategy(self.web3).fees()
+        cap = int(FEE_MAX_GWEI * GWEI) if FEE_MAX_GWEI > 0 else None
+        if "maxFeePerGas" in tx:
+            tip = max(int(tx["maxPriorityFeePerGas"] * FEE_BUMP_RATIO) + 1, current.get("maxPriorityFeePerGas", 0))
+            max_fee = max(int(tx["maxFeePerGas"] * FEE_BUMP_RATIO) + 1, current.get("maxFeePerGas", 0), tip)
+            if cap is not None:
+                max_fee = min(max_fee, cap)
+                tip = min(tip, max_fee)
+            bumped = {"maxPriorityFeePerGas": tip, "maxFeePerGas": max_fee}
+        else:
+            gas_price = max(int(tx["gasPrice"] * FEE_BUMP_RATIO) + 1, current.get("gasPrice", 0))
+            bumped = {"gasPrice": gas_price if cap is None else min(gas_price, cap)}
+
+        # 상한에 걸려 노드의 최소 인상폭(10%)을 넘지 못하면 대체 트랜잭션이 거부되므로 보내지 않고 계속 대기
+        if any(value * 100 < tx[field] * FEE_REPLACEMENT_MIN_PERCENT for field, value in bumped.items()):
+            logger.info(f"수수료 상한(FEE_MAX_GWEI={FEE_MAX_GWEI:g})에 도달해 인상하지 않음: nonce={nonce}")
+            self._seen[entry["tx_hash"]] = (self.web3.eth.block_number, bumps - 1)
+            return
+        tx.update(bumped)
+
+        signed = self.web3.eth.account.sign_transaction(tx, private_key=self.private_key)
+        try:
+            new_hash = self.web3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception as e:
+            if is_nonce_error(e) and "underpriced" not in str(e).lower():
+                # 그 사이에 원래 트랜잭션이 채굴됨
+                return
+            logger.warning(f"수수료 인상 전송 실패: nonce={nonce} - {e}")
+            self._seen[entry["tx_hash"]] = (self.web3.eth.block_number, bumps)
+            return
+
+        logger.info(f"수수료 인상 재전송({bumps}회): nonce={nonce} {entry['tx_hash'].hex()} → {new_hash.hex()}")
+        with self._lock:
+            self._replacements[entry["tx_hash"]] = new_hash
+        get_receipt_tracker().replaced(entry["tx_hash"], new_hash)
+        self._seen.pop(entry["tx_hash"], None)
+        self._seen[new_hash] = (self.web3.eth.block_number, bumps)
+        self.nonces.mark_sent(nonce, new_hash, signed.raw_transaction, tx=tx, bumps=bumps)
+
+
+_strategies = {}
+_estimator = GasEstimator()
+_bumpers = {}
+_fee_lock = threading.Lock()
+
+
+def get_fee_strategy(web3):
+    """RPC 엔드포인트별 프로세스 전역 FeeStrategy"""
+    key = getattr(web3.provider, "endpoint_uri", None)
+    with _fee_lock:
+        strategy = _strategies.get(key)
+        if strategy is None:
+            strategy = FeeStrategy(web3)
+            _strategies[key] = strategy
+        return strategy
+
+
+def get_gas_estimator():
+    return _estimator
+
+
+def get_fee_bumper(web3, address, private_key):
+    """(RPC 엔드포인트, 계정)별 FeeBumper. FEE_BUMP_AFTER_BLOCKS가 0이면 None"""
+    if FEE_BUMP_AFTER_BLOCKS <= 0:
+        return None
+    key = (getattr(web3.provider, "endpoint_uri", None), address.lower())
+    with _fee_lock:
+        bumper = _bumpers.get(key)
+        if bumper is None:
+            bumper = FeeBumper(web3, address, private_key)
+            _bumpers[key] = bumper
+        return bumper
@@ -0,0 +1,177 @@
+import os
+import time
+import heapq
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 체인의 nonce 상태와 주기적으로 다시 맞추는 간격(초)
+NONCE_RESYNC_INTERVAL = float(os.getenv("NONCE_RESYNC_INTERVAL", "30"))
+# 전송한 트랜잭션이 이 시간(초) 동안 pending nonce에 반영되지 않으면 유실로 보고 재전송
+NONCE_DROP_TIMEOUT = float(os.getenv("NONCE_DROP_TIMEOUT", "120"))
+
+NONCE_RESERVED = "reserved"
+NONCE_SENT = "sent"
+
+# 노드가 nonce 충돌을 알리는 오류 메시지 (geth / ganache / hardhat / anvil)
+_NONCE_ERRORS = (
+    "nonce too low",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+    "nonce has already been used",
+    "transaction already imported",
+)
+
+
+def is_nonce_error(error):
+    """send_raw_transaction 오류가 nonce 충돌(다른 곳에서 이미 사용된 nonce)인지 여부"""
+    message = str(error).lower()
+    return any(text in message for text in _NONCE_ERRORS)
+
+
+class NonceManager:
+    """
+    한 계정의 트랜잭션 nonce를 프로세스 안에서 순서대로 나눠주는 관리자 (스레드 안전).
+    - allocate()로 받은 nonce는 전송 성공 시 mark_sent(), 실패 시 release()로 반드시 돌려줌
+    - 전송 전에 실패해 비게 된 nonce는 다음 allocate()에서 먼저 재사용해 빈 칸을 남기지 않음
+    - 주기적으로 또는 nonce 충돌 시 체인의 latest/pending nonce와 다시 맞춤
+      (채굴된 항목 정리, 유실된 트랜잭션 재전송, 다른 프로세스가 쓴 nonce 건너뛰기)
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next = None  # 아직 한 번도 나눠주지 않은 가장 작은 nonce
+        self._free = []  # 전송 전에 반환되어 다시 쓸 nonce (최소 힙)
+        self._tracked = {}  # nonce → {"state", "tx_hash", "raw", "sent_at"}
+        self._last_sync = 0.0
+        self._needs_sync = True
+
+    def allocate(self):
+        """다음에 사용할 nonce 예약"""
+        with self._lock:
+            if self._needs_sync or time.time() - self._last_sync >= NONCE_RESYNC_INTERVAL:
+                self._resync()
+            if self._free:
+                nonce = heapq.heappop(self._free)
+            else:
+                nonce = self._next
+                self._next += 1
+            self._tracked[nonce] = {"state": NONCE_RESERVED, "tx_hash": None, "raw": None, "sent_at": None}
+            return nonce
+
+    def mark_sent(self, nonce, tx_hash, raw_transaction, tx=None, bumps=0):
+        """
+        nonce를 사용한 트랜잭션이 노드에 전달됨.
+        - 유실 시 재전송용 서명 원본과 수수료 인상용 트랜잭션 필드를 함께 보관
+        - 같은 nonce로 다시 호출하면 대체 트랜잭션으로 교체
+        """
+        with self._lock:
+            self._tracked[nonce] = {
+                "state": NONCE_SENT,
+                "tx_hash": tx_hash,
+                "raw": raw_transaction,
+                "tx": tx,
+                "bumps": bumps,
+                "sent_at": time.time(),
+            }
+
+    def release(self, nonce, error=None):
+        """
+        전송하지 못한 nonce 반환.
+        - nonce 충돌 오류면 이미 다른 곳에서 쓰인 nonce이므로 재사용하지 않고 다음 할당 때 재동기화
+        - 그 외에는 다음 할당에서 다시 사용
+        """
+        with self._lock:
+            self._tracked.pop(nonce, None)
+            if error is not None and is_nonce_error(error):
+                self._needs_sync = True
+                return
+            if nonce == self._next - 1:
+                self._next -= 1
+            else:
+                heapq.heappush(self._free, nonce)
+
+    def sent_entries(self):
+        """전송 후 아직 채굴이 확인되지 않은 (nonce, 항목 사본) 목록"""
+        with self._lock:
+            return sorted(
+                (nonce, dict(entry))
+                for nonce, entry in self._tracked.items()
+                if entry["state"] == NONCE_SENT
+            )
+
+    def resync(self):
+        with self._lock:
+            self._resync()
+
+    def _resync(self):
+        mined = self.web3.eth.get_transaction_count(self.address, "latest")
+        chain_pending = self.web3.eth.get_transaction_count(self.address, "pending")
+
+        # 채굴(또는 같은 nonce의 다른 트랜잭션으로 대체)된 항목 정리
+        for nonce in [n for n in self._tracked if n < mined]:
+            del self._tracked[nonce]
+
+        # 노드 mempool에서 사라진 트랜잭션 재전송. 재전송이 거부되면 빈 nonce로 처리
+        now = time.time()
+        for nonce in sorted(self._tracked):
+            entry = self._tracked[nonce]
+            if entry["state"] != NONCE_SENT or nonce < chain_pending:
+                continue
+            if now - entry["sent_at"] < NONCE_DROP_TIMEOUT:
+                continue
+            try:
+                self.web3.eth.send_raw_transaction(entry["raw"])
+                entry["sent_at"] = now
+                logger.warning(f"유실된 트랜잭션 재전송: nonce={nonce} tx={_hex(entry['tx_hash'])}")
+            except Exception as e:
+                if is_nonce_error(e):
+                    # 이미 mempool에 있거나 다른 트랜잭션이 사용함
+                    entry["sent_at"] = now
+                    continue
+                logger.error(f"트랜잭션 유실, nonce {nonce} 재사용: {_hex(entry['tx_hash'])} - {e}")
+                del self._tracked[nonce]
+
+        # 다음 nonce: 체인 pending 값과 이 프로세스가 쓰고 있는 nonce 중 큰 값 이후
+        floor = max(mined, chain_pending)
+        self._next = max([floor] + [n + 1 for n in self._tracked])
+        # floor 이상에서 사용 중이 아닌 nonce는 먼저 채워야 하는 빈 칸
+        self._free = [n for n in range(floor, self._next) if n not in self._tracked]
+        heapq.heapify(self._free)
+
+        self._last_sync = now
+        self._needs_sync = False
+
+    def status(self):
+        with self._lock:
+            return {
+                "address": self.address,
+                "next_nonce": self._next,
+                "gaps": sorted(self._free),
+                "reserved": sorted(n for n, e in self._tracked.items() if e["state"] == NONCE_RESERVED),
+                "pending": sorted(n for n, e in self._tracked.items() if e["state"] == NONCE_SENT),
+                "last_sync": self._last_sync,
+            }
+
+
+def _hex(value):
+    return value.hex() if hasattr(value, "hex") else str(value)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(web3, address):
+    """(RPC 엔드포인트, 계정)별 프로세스 전역 NonceManager"""
+    key = (getattr(web3.provider, "endpoint_uri", None), address.lower())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = NonceManager(web3, address)
+            _managers[key] = manager
+        return manager
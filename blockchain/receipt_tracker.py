@@ -0,0 +1,360 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+import requests
+from web3.exceptions import TransactionNotFound
+
+logger = logging.getLogger(__name__)
+
+# 트랜잭션 상태 저장 SQLite 경로
+TX_TRACKER_DB = os.getenv(
+    "TX_TRACKER_DB", os.path.join(os.path.dirname(__file__), "../tx_status.db")
+)
+# 새 블록 확인 주기(초). 영수증은 새 블록이 나왔을 때만 묶어서 조회
+TX_TRACKER_POLL_INTERVAL = float(os.getenv("TX_TRACKER_POLL_INTERVAL", "2"))
+# JSON-RPC 배치 한 번에 조회하는 영수증 수
+TX_RECEIPT_BATCH_SIZE = int(os.getenv("TX_RECEIPT_BATCH_SIZE", "100"))
+# SSE 구독자별 대기 이벤트 최대 수 (느린 구독자는 오래된 이벤트부터 버림)
+TX_EVENT_QUEUE_MAX = 1000
+
+TX_PENDING = "pending"
+TX_MINED = "mined"
+TX_REVERTED = "reverted"
+TX_DROPPED = "dropped"
+
+
+def normalize_tx_hash(tx_hash):
+    """bytes/HexBytes/문자열 tx 해시를 소문자 0x 문자열로 통일"""
+    if isinstance(tx_hash, (bytes, bytearray)):
+        tx_hash = bytes(tx_hash).hex()
+    tx_hash = str(tx_hash).lower()
+    return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+
+
+class ReceiptTracker:
+    """
+    전송한 등록/취소 트랜잭션의 채굴 여부를 백그라운드에서 추적.
+    - 새 블록마다 대기 중인 트랜잭션 영수증을 JSON-RPC 배치 한 번으로 조회
+    - 결과(mined / reverted / dropped, 블록 번호, gasUsed)를 SQLite에 기록
+    - 수수료 인상으로 대체된 트랜잭션은 원래 해시와 모든 대체 해시로 조회 가능
+      (어느 대체 트랜잭션이 채굴될지 모르므로 대체 해시는 tx_replacements에 모두 보관하고 함께 확인)
+    - 상태 변경은 subscribe()로 받은 큐에 이벤트로 전달 (SSE 스트림용)
+    """
+
+    def __init__(self, db_path=TX_TRACKER_DB):
+        self.db_path = db_path
+        self.web3 = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._subscribers = []
+        self._session = requests.Session()
+        self._batch_supported = True
+        self._last_block = None
+        self._thread = None
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transactions (
+                    tx_hash TEXT PRIMARY KEY,
+                    kind TEXT,
+                    uid TEXT,
+                    sender TEXT,
+                    to_address TEXT,
+                    nonce INTEGER,
+                    status TEXT NOT NULL,
+                    replaced_by TEXT,
+                    block_number INTEGER,
+                    gas_used INTEGER,
+                    effective_gas_price TEXT,
+                    submitted_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # to_address 컬럼이 없던 이전 DB 파일은 컬럼만 추가 (기존 행은 수신 컨트랙트를 알 수 없음)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+            if "to_address" not in columns:
+                conn.execute("ALTER TABLE transactions ADD COLUMN to_address TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS transactions_status ON transactions (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS transactions_replaced_by ON transactions (replaced_by)")
+            # 원래 트랜잭션 해시 → 수수료 인상으로 보낸 모든 대체 해시
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tx_replacements (
+                    replacement TEXT PRIMARY KEY,
+                    tx_hash TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tx_replacements_tx_hash ON tx_replacements (tx_hash)")
+            # 이전 DB 파일은 마지막 대체 해시만 남아 있으므로 그것만 옮김
+            conn.execute(
+                "INSERT OR IGNORE INTO tx_replacements (replacement, tx_hash, created_at) "
+                "SELECT replaced_by, tx_hash, updated_at FROM transactions WHERE replaced_by IS NOT NULL"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def attach(self, web3):
+        """추적에 사용할 Web3 연결 지정 후 백그라운드 스레드 시작 (최초 1회)"""
+        with self._lock:
+            if self.web3 is None:
+                self.web3 = web3
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+                self._thread.start()
+
+    # ---- 등록 ----
+
+    def track(self, tx_hash, kind=None, uid=None, sender=None, nonce=None, to=None):
+        """전송 직후 호출. 다음 블록부터 영수증을 확인 (to: 호출한 컨트랙트 주소)"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO transactions (tx_hash, kind, uid, sender, to_address, nonce, status, "
+                "submitted_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tx_hash, kind, uid, sender, to.lower() if to else None, nonce, TX_PENDING, now, now),
+            )
+        self._publish(self.get(tx_hash))
+        self._wakeup.set()
+
+    def replaced(self, old_hash, new_hash):
+        """수수료 인상으로 같은 nonce의 새 트랜잭션이 전송됨 (old_hash는 원래 해시 또는 이전 대체 해시)"""
+        old_hash, new_hash = normalize_tx_hash(old_hash), normalize_tx_hash(new_hash)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT tx_hash FROM transactions WHERE tx_hash = ? "
+                "UNION SELECT tx_hash FROM tx_replacements WHERE replacement = ? LIMIT 1",
+                (old_hash, old_hash),
+            ).fetchone()
+            if row is None:
+                return
+            conn.execute(
+                "INSERT OR IGNORE INTO tx_replacements (replacement, tx_hash, created_at) VALUES (?, ?, ?)",
+                (new_hash, row[0], now),
+            )
+            conn.execute(
+                "UPDATE transactions SET replaced_by = ?, updated_at = ? WHERE tx_hash = ?", (new_hash, now, row[0])
+            )
+
+    # ---- 조회 ----
+
+    def get(self, tx_hash):
+        """tx 해시(원래 해시 또는 대체 해시)의 상태 (없으면 None)"""
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM transactions WHERE tx_hash = ? OR tx_hash = "
+                "(SELECT tx_hash FROM tx_replacements WHERE replacement = ?) LIMIT 1",
+                (tx_hash, tx_hash),
+            ).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def mined_by_uid(self, kind, to):
+        """
+        to 컨트랙트로 보낸 kind 트랜잭션 중 채굴된 항목의 uid → (채굴된 tx 해시, 블록 번호)
+        - 채굴이 확인되면 replaced_by에는 실제로 채굴된 대체 해시가 남음
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT uid, COALESCE(replaced_by, tx_hash), block_number FROM transactions "
+                "WHERE kind = ? AND status = ? AND to_address = ? AND uid IS NOT NULL ORDER BY block_number",
+                (kind, TX_MINED, to.lower()),
+            ).fetchall()
+        return {uid: (tx_hash, block_number) for uid, tx_hash, block_number in rows}
+
+    def subscribe(self):
+        """상태 변경 이벤트를 받을 큐 등록"""
+        q = queue.Queue(maxsize=TX_EVENT_QUEUE_MAX)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _publish(self, event):
+        if event is None:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    # ---- 백그라운드 추적 ----
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(TX_TRACKER_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"트랜잭션 영수증 확인 실패: {e}")
+
+    def poll_once(self):
+        """새 블록이 나왔으면 대기 중인 트랜잭션 영수증을 한 번에 조회해 상태 갱신"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            pending = conn.execute(
+                "SELECT * FROM transactions WHERE status = ?", (TX_PENDING,)
+            ).fetchall()
+        if not pending:
+            return
+
+        block = self.web3.eth.block_number
+        if block == self._last_block:
+            return
+        self._last_block = block
+
+        # 원래 해시와 모든 대체 해시를 조회 (어느 것이든 먼저 채굴될 수 있음)
+        candidates = {row["tx_hash"]: [row["tx_hash"]] for row in pending}
+        with self._connect() as conn:
+            replacements = conn.execute(
+                "SELECT r.tx_hash, r.replacement FROM tx_replacements r "
+                "JOIN transactions t ON t.tx_hash = r.tx_hash WHERE t.status = ? ORDER BY r.created_at DESC",
+                (TX_PENDING,),
+            ).fetchall()
+        for tx_hash, replacement in replacements:
+            if tx_hash in candidates:
+                candidates[tx_hash].insert(-1, replacement)
+        receipts = self._fetch_receipts([h for hashes in candidates.values() for h in hashes])
+
+        mined_nonces = {}
+        for row in pending:
+            hashes = candidates[row["tx_hash"]]
+            receipt = next((receipts[h] for h in hashes if h in receipts), None)
+            if receipt is not None:
+                status = TX_MINED if int(receipt["status"], 16) == 1 else TX_REVERTED
+                self._finish(
+                    row["tx_hash"],
+                    status,
+                    block_number=int(receipt["blockNumber"], 16),
+                    gas_used=int(receipt["gasUsed"], 16),
+                    effective_gas_price=str(int(receipt.get("effectiveGasPrice") or "0x0", 16)),
+                    mined_hash=receipt["transactionHash"].lower(),
+                )
+                continue
+
+            # 영수증이 없는데 계정 nonce가 이미 지나갔으면 다른 트랜잭션이 그 nonce를 사용함
+            sender, nonce = row["sender"], row["nonce"]
+            if sender is None or nonce is None:
+                continue
+            if sender not in mined_nonces:
+                mined_nonces[sender] = self.web3.eth.get_transaction_count(sender, "latest")
+            if nonce < mined_nonces[sender]:
+                # 그 사이에 채굴되었을 수 있으므로 한 번 더 확인
+                again = self._fetch_receipts(hashes)
+                if not again:
+                    self._finish(row["tx_hash"], TX_DROPPED)
+
+    def _finish(self, tx_hash, status, mined_hash=None, **fields):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE transactions SET status = ?, block_number = ?, gas_used = ?, "
+                "effective_gas_price = ?, updated_at = ? WHERE tx_hash = ?",
+                (
+                    status,
+                    fields.get("block_number"),
+                    fields.get("gas_used"),
+                    fields.get("effective_gas_price"),
+                    time.time(),
+                    tx_hash,
+                ),
+            )
+            # replaced_by를 실제로 채굴된 해시로 맞춤 (원래 트랜잭션이 채굴되었으면 비움)
+            if mined_hash is not None:
+                conn.execute(
+                    "UPDATE transactions SET replaced_by = ? WHERE tx_hash = ?",
+                    (None if mined_hash == tx_hash else mined_hash, tx_hash),
+                )
+        log = logger.info if status == TX_MINED else logger.warning
+        log(f"트랜잭션 {status}: {tx_hash} (block={fields.get('block_number')}, gasUsed={fields.get('gas_used')})")
+        self._publish(self.get(tx_hash))
+
+    def _fetch_receipts(self, hashes):
+        """tx 해시 → 영수증(raw JSON-RPC 형식). 아직 채굴되지 않은 해시는 포함되지 않음"""
+        receipts = {}
+        endpoint = getattr(self.web3.provider, "endpoint_uri", None)
+        for offset in range(0, len(hashes), TX_RECEIPT_BATCH_SIZE):
+            chunk = hashes[offset:offset + TX_RECEIPT_BATCH_SIZE]
+            if self._batch_supported and endpoint:
+                payload = [
+                    {"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionReceipt", "params": [h]}
+                    for i, h in enumerate(chunk)
+                ]
+                try:
+                    resp = self._session.post(endpoint, json=payload, timeout=30)
+                    resp.raise_for_status()
+                    body = resp.json()
+                    if isinstance(body, list):
+                        for item in body:
+                            idx = item.get("id")
+                            if isinstance(idx, int) and 0 <= idx < len(chunk) and item.get("result"):
+                                receipts[chunk[idx]] = item["result"]
+                        continue
+                    logger.warning("JSON-RPC 배치 미지원 응답, 영수증을 개별 조회로 전환")
+                    self._batch_supported = False
+                except Exception as e:
+                    logger.warning(f"영수증 배치 조회 실패, 개별 조회로 대체: {e}")
+
+            for h in chunk:
+                try:
+                    receipt = self.web3.eth.get_transaction_receipt(h)
+                except TransactionNotFound:
+                    continue
+                receipts[h] = {
+                    "status": hex(receipt["status"]),
+                    "blockNumber": hex(receipt["blockNumber"]),
+                    "gasUsed": hex(receipt["gasUsed"]),
+                    "effectiveGasPrice": hex(receipt.get("effectiveGasPrice") or 0),
+                    "transactionHash": normalize_tx_hash(receipt["transactionHash"]),
+                }
+        return receipts
+
+
+def _row_to_dict(row):
+    return {
+        "tx_hash": row["tx_hash"],
+        "kind": row["kind"],
+        "uid": row["uid"],
+        "nonce": row["nonce"],
+        "status": row["status"],
+        "replaced_by": row["replaced_by"],
+        "block_number": row["block_number"],
+        "gas_used": row["gas_used"],
+        "effective_gas_price": row["effective_gas_price"],
+        "submitted_at": row["submitted_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_receipt_tracker():
+    """프로세스 전역 ReceiptTracker (최초 호출 시 생성)"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ReceiptTracker()
+        return _tracker
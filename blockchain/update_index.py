@@ -0,0 +1,449 @@
+import os
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from eth_utils import event_abi_to_log_topic
+from blockchain.contract import resolve_update_contract
+
+logger = logging.getLogger(__name__)
+
+# 로컬 업데이트 인덱스(SQLite) 경로
+UPDATE_INDEX_PATH = os.getenv(
+    "UPDATE_INDEX_PATH", os.path.join(os.path.dirname(__file__), "../update_index.db")
+)
+# 이 깊이만큼 확정된 블록까지만 인덱스에 반영 (reorg 대비)
+UPDATE_INDEX_CONFIRMATIONS = int(os.getenv("UPDATE_INDEX_CONFIRMATIONS", "2"))
+# 체인 동기화 주기(초)
+UPDATE_INDEX_POLL_INTERVAL = float(os.getenv("UPDATE_INDEX_POLL_INTERVAL", "3"))
+# eth_getLogs 한 번에 조회하는 블록 범위
+UPDATE_INDEX_LOG_RANGE = int(os.getenv("UPDATE_INDEX_LOG_RANGE", "5000"))
+# reorg 감지를 위해 보관하는 최근 체크포인트 블록 해시 수
+BLOCK_HASH_HISTORY = 128
+
+
+class UpdateIndex:
+    """
+    SoftwareUpdateContract 업데이트 목록을 로컬 SQLite에 유지하는 인덱스.
+    - 저장된 체크포인트 블록 이후의 컨트랙트 이벤트를 따라가며 갱신
+      (새 인덱스는 getUpdateCount 기준으로 추가, uid가 담긴 이벤트는 해당 항목 재조회)
+    - UPDATE_INDEX_CONFIRMATIONS 블록 이상 확정된 상태만 반영
+    - 체크포인트 블록 해시가 바뀌면 reorg로 보고 공통 조상까지 되돌린 뒤 다시 동기화
+    - 유효한 업데이트의 순번(valid_rank)을 함께 유지해 유효 항목 기준 페이지를 바로 조회
+    """
+
+    def __init__(self, db_path=UPDATE_INDEX_PATH, confirmations=UPDATE_INDEX_CONFIRMATIONS):
+        self.db_path = db_path
+        self.confirmations = confirmations
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS updates (
+                    idx INTEGER PRIMARY KEY,
+                    uid TEXT NOT NULL,
+                    ipfs_hash TEXT,
+                    encrypted_key BLOB,
+                    hash_of_update TEXT,
+                    description TEXT,
+                    price TEXT,
+                    version TEXT,
+                    is_valid INTEGER NOT NULL,
+                    block_number INTEGER NOT NULL,
+                    valid_rank INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS updates_uid ON updates (uid);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS block_hashes (
+                    number INTEGER PRIMARY KEY,
+                    hash TEXT NOT NULL
+                );
+                """
+            )
+            # valid_rank 컬럼이 없던 이전 인덱스 파일은 컬럼을 추가하고 순번을 새로 매김
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(updates)")}
+            if "valid_rank" not in columns:
+                conn.execute("ALTER TABLE updates ADD COLUMN valid_rank INTEGER")
+                self._renumber(conn, 0)
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS updates_valid_rank ON updates (valid_rank)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    # ---- 동기화 상태 ----
+
+    def _get_state(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, conn, key, value):
+        conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, None if value is None else str(value)),
+        )
+
+    @property
+    def checkpoint(self):
+        """인덱스에 반영된 마지막 확정 블록 번호 (동기화 전이면 None)"""
+        with self._connect() as conn:
+            value = self._get_state(conn, "checkpoint_block")
+        return int(value) if value is not None else None
+
+    @property
+    def ready(self):
+        return self.checkpoint is not None
+
+    @property
+    def etag(self):
+        """
+        목록 응답용 ETag 값: 컨트랙트 주소와 목록 내용이 마지막으로 바뀐 확정 블록 번호.
+        - 로컬 DB만 읽으므로 RPC 호출 없이 조건부 요청(If-None-Match)을 판단할 수 있음
+        - 동기화 전이면 None
+        """
+        with self._connect() as conn:
+            address = self._get_state(conn, "contract_address")
+            changed = self._get_state(conn, "changed_block")
+        if address is None or changed is None:
+            return None
+        return f"{address}-{changed}"
+
+    # ---- 체인 동기화 ----
+
+    def sync_once(self):
+        """확정된 최신 블록까지 인덱스를 갱신. 반영한 체크포인트 블록 번호 반환"""
+        resolved = resolve_update_contract()
+        web3, contract, reader = resolved["web3"], resolved["contract"], resolved["reader"]
+
+        with self._lock, self._connect() as conn:
+            # 레지스트리가 다른 컨트랙트를 가리키게 되면 인덱스를 처음부터 다시 구성
+            if self._get_state(conn, "contract_address") != contract.address:
+                logger.info(f"업데이트 인덱스 초기화: 컨트랙트 {contract.address}")
+                conn.execute("DELETE FROM updates")
+                conn.execute("DELETE FROM block_hashes")
+                conn.execute("DELETE FROM sync_state")
+                self._set_state(conn, "contract_address", contract.address)
+
+            target = web3.eth.block_number - self.confirmations
+            if target < 0:
+                return None
+
+            checkpoint = self._get_state(conn, "checkpoint_block")
+            checkpoint = int(checkpoint) if checkpoint is not None else None
+            refresh_all = False
+
+            if checkpoint is not None:
+                ancestor = self._find_common_ancestor(conn, web3, checkpoint)
+                if ancestor != checkpoint:
+                    logger.warning(f"reorg 감지: 체크포인트 {checkpoint} → {ancestor}로 되돌림")
+                    self._rollback(conn, ancestor)
+                    # 보관 범위를 넘는 reorg면 처음부터 다시 적재
+                    checkpoint = ancestor if ancestor >= 0 else None
+                    # 되돌린 구간의 취소 이벤트가 무효가 되었을 수 있으므로 유효성 전체 재확인
+                    refresh_all = True
+                if checkpoint is not None and target <= checkpoint and not refresh_all:
+                    return checkpoint
+
+            # 유효 순번(valid_rank)을 다시 매겨야 하는 가장 앞쪽 인덱스
+            dirty_from = 0 if refresh_all else None
+
+            refresh_uids = set()
+            if checkpoint is not None:
+                uids, needs_full = self._scan_events(web3, contract, checkpoint + 1, target)
+                refresh_uids |= uids
+                refresh_all = refresh_all or needs_full
+
+            # 새로 등록된 항목 추가 (체크포인트가 없으면 전체 적재)
+            known = conn.execute("SELECT COALESCE(MAX(idx) + 1, 0) FROM updates").fetchone()[0]
+            count = reader.get_count(block=target)
+            for idx, uid, info in reader.read_range(known, count, block=target):
+                if uid is None or info is None:
+                    # 빈 칸을 남기지 않도록 실패 지점에서 멈추고 다음 동기화 때 이어서 조회
+                    logger.warning(f"인덱스 {idx} 조회 실패, 다음 동기화에서 재시도")
+                    break
+                self._upsert(conn, idx, uid, info, target)
+                refresh_uids.discard(uid)
+                dirty_from = idx if dirty_from is None else min(dirty_from, idx)
+
+            # 이벤트로 변경이 감지된 기존 항목 갱신
+            if refresh_all:
+                refresh_uids = {row[0] for row in conn.execute("SELECT uid FROM updates")}
+            if refresh_uids:
+                uid_list = sorted(refresh_uids)
+                for uid, info in zip(uid_list, reader.read_uids(uid_list, block=target)):
+                    if info is None:
+                        continue
+                    changed_idx = self._refresh(conn, uid, info)
+                    if changed_idx is not None:
+                        dirty_from = changed_idx if dirty_from is None else min(dirty_from, changed_idx)
+
+            if dirty_from is not None:
+                self._renumber(conn, dirty_from)
+
+            # 목록 내용이 바뀐 블록 기록 (ETag 기준)
+            if checkpoint is None or refresh_uids or dirty_from is not None:
+                self._set_state(conn, "changed_block", target)
+
+            block_hash = web3.eth.get_block(target)["hash"].hex()
+            conn.execute(
+                "INSERT OR REPLACE INTO block_hashes (number, hash) VALUES (?, ?)",
+                (target, block_hash),
+            )
+            conn.execute(
+                "DELETE FROM block_hashes WHERE number NOT IN "
+                "(SELECT number FROM block_hashes ORDER BY number DESC LIMIT ?)",
+                (BLOCK_HASH_HISTORY,),
+            )
+            self._set_state(conn, "checkpoint_block", target)
+            return target
+
+    def _find_common_ancestor(self, conn, web3, checkpoint):
+        """저장된 블록 해시 중 현재 체인과 일치하는 가장 최근 블록 번호"""
+        rows = conn.execute(
+            "SELECT number, hash FROM block_hashes WHERE number <= ? ORDER BY number DESC",
+            (checkpoint,),
+        ).fetchall()
+        for number, stored_hash in rows:
+            if web3.eth.get_block(number)["hash"].hex() == stored_hash:
+                return number
+        # 보관 범위를 넘는 reorg: 처음부터 다시 적재
+        return -1
+
+    def _rollback(self, conn, ancestor):
+        conn.execute("DELETE FROM updates WHERE block_number > ?", (ancestor,))
+        conn.execute("DELETE FROM block_hashes WHERE number > ?", (ancestor,))
+        if ancestor < 0:
+            conn.execute("DELETE FROM sync_state WHERE key = 'checkpoint_block'")
+
+    def _scan_events(self, web3, contract, from_block, to_block):
+        """
+        구간 내 컨트랙트 이벤트에서 갱신이 필요한 uid 수집.
+        - uid 문자열을 해석할 수 없는 취소 이벤트가 있으면 전체 유효성 재확인 필요로 표시
+        """
+        events = {}
+        for abi in contract.abi:
+            if abi.get("type") == "event":
+                events[event_abi_to_log_topic(abi)] = contract.events[abi["name"]]()
+
+        uids, needs_full = set(), False
+        start = from_block
+        while start <= to_block:
+            end = min(start + UPDATE_INDEX_LOG_RANGE - 1, to_block)
+            logs = web3.eth.get_logs({"address": contract.address, "fromBlock": start, "toBlock": end})
+            for log in logs:
+                event = events.get(bytes(log["topics"][0])) if log["topics"] else None
+                if event is None:
+                    continue
+                try:
+                    decoded = event.process_log(log)
+                except Exception:
+                    continue
+                uid = decoded["args"].get("uid")
+                if isinstance(uid, str):
+                    uids.add(uid)
+                elif "cancel" in decoded["event"].lower():
+                    needs_full = True
+            start = end + 1
+        return uids, needs_full
+
+    def _upsert(self, conn, idx, uid, info, block_number):
+        conn.execute(
+            "INSERT OR REPLACE INTO updates (idx, uid, ipfs_hash, encrypted_key, hash_of_update, "
+            "description, price, version, is_valid, block_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (idx, uid, *_info_columns(info), block_number),
+        )
+
+    def _refresh(self, conn, uid, info):
+        """uid 항목 갱신. 유효 여부가 바뀌었으면 해당 인덱스 반환"""
+        columns = _info_columns(info)
+        row = conn.execute("SELECT idx, is_valid FROM updates WHERE uid = ?", (uid,)).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE updates SET ipfs_hash = ?, encrypted_key = ?, hash_of_update = ?, description = ?, "
+            "price = ?, version = ?, is_valid = ? WHERE uid = ?",
+            (*columns, uid),
+        )
+        return row[0] if row[1] != columns[-1] else None
+
+    def _renumber(self, conn, from_idx):
+        """
+        from_idx 이후 항목의 valid_rank(유효한 업데이트 중 0부터 시작하는 순번)를 다시 매김.
+        - 앞쪽 항목의 순번은 바뀌지 않으므로 변경 지점 이후만 갱신
+        - 유효하지 않은 항목은 NULL
+        """
+        rank = conn.execute(
+            "SELECT COUNT(*) FROM updates WHERE idx < ? AND is_valid = 1", (from_idx,)
+        ).fetchone()[0]
+        rows = conn.execute(
+            "SELECT idx, is_valid FROM updates WHERE idx >= ? ORDER BY idx", (from_idx,)
+        ).fetchall()
+        # UNIQUE 인덱스 충돌을 피하려고 먼저 비운 뒤 다시 채움
+        conn.execute("UPDATE updates SET valid_rank = NULL WHERE idx >= ?", (from_idx,))
+        ranks = []
+        for idx, is_valid in rows:
+            if is_valid:
+                ranks.append((rank, idx))
+                rank += 1
+        conn.executemany("UPDATE updates SET valid_rank = ? WHERE idx = ?", ranks)
+
+    # ---- 조회 ----
+
+    def list_updates(self, include_invalid=False):
+        """BlockchainNotifier.get_updates와 같은 형식의 목록"""
+        query = "SELECT * FROM updates"
+        if not include_invalid:
+            query += " WHERE is_valid = 1"
+        query += " ORDER BY idx"
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(query).fetchall()
+        return [_row_to_update(row, with_hash=False) for row in rows]
+
+    def paginate(self, page=1, limit=20, include_invalid=False):
+        """BlockchainNotifier.get_updates_paginated와 같은 형식의 페이지"""
+        if page < 1:
+            page = 1
+        if limit < 1:
+            limit = 20
+        if limit > 100:  # 최대 100개로 제한
+            limit = 100
+
+        # 유효한 업데이트만 볼 때는 valid_rank 기준으로 잘라 항상 꽉 찬 페이지를 반환
+        position = "idx" if include_invalid else "valid_rank"
+        start_index = (page - 1) * limit
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            total_count = conn.execute(f"SELECT COUNT({position}) FROM updates").fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM updates WHERE {position} >= ? AND {position} < ? ORDER BY {position}",
+                (start_index, start_index + limit),
+            ).fetchall()
+        total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
+
+        updates = [_row_to_update(row, with_hash=True) for row in rows]
+        return {
+            "updates": updates,
+            "pagination": {
+                "current_page": page,
+                "per_page": limit,
+                "total_count": total_count,
+                "total_pages": total_pages,
+                "has_next": page < total_pages,
+                "has_prev": page > 1,
+                "start_index": start_index + 1 if total_count > 0 and start_index < total_count else 0,
+                "end_index": start_index + len(updates) if updates else 0,
+            },
+        }
+
+
+    def page_after(self, after_idx=-1, limit=20, include_invalid=False, snapshot_block=None):
+        """
+        커서 방식 페이지: 체인 인덱스 after_idx 다음 항목부터 limit개.
+        - snapshot_block 이후에 등록된 항목은 제외해 스크롤 도중 새 등록이 끼어들지 않게 함
+          (snapshot_block 미지정 시 현재 체크포인트를 스냅샷으로 사용)
+        - 반환: {"updates", "last_index", "snapshot_block", "has_next", "per_page"}
+        """
+        if limit < 1:
+            limit = 20
+        if limit > 100:  # 최대 100개로 제한
+            limit = 100
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            if snapshot_block is None:
+                snapshot_block = int(self._get_state(conn, "checkpoint_block"))
+            query = "SELECT * FROM updates WHERE idx > ? AND block_number <= ?"
+            if not include_invalid:
+                query += " AND is_valid = 1"
+            # 다음 페이지 존재 여부 확인을 위해 1개 더 조회
+            rows = conn.execute(
+                query + " ORDER BY idx LIMIT ?", (after_idx, snapshot_block, limit + 1)
+            ).fetchall()
+
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "updates": [_row_to_update(row, with_hash=True) for row in rows],
+            "last_index": rows[-1]["idx"] if rows else after_idx,
+            "snapshot_block": snapshot_block,
+            "has_next": has_next,
+            "per_page": limit,
+        }
+
+
+def _info_columns(info):
+    """getUpdateInfo 결과 → (ipfs_hash, encrypted_key, hash_of_update, description, price, version, is_valid)"""
+    # info: [ipfsHash, encryptedKey, hashOfUpdate, description, price, version, isValid]
+    return (
+        info[0] if len(info) > 0 else "",
+        bytes(info[1]) if len(info) > 1 and info[1] else b"",
+        info[2] if len(info) > 2 else "",
+        info[3] if len(info) > 3 else "",
+        str(info[4]) if len(info) > 4 else "0",
+        info[5] if len(info) > 5 else "",
+        1 if (info[6] if len(info) > 6 else True) else 0,
+    )
+
+
+def _row_to_update(row, with_hash):
+    update = {
+        "uid": row["uid"],
+        "ipfs_hash": row["ipfs_hash"],
+        "encrypted_key": base64.b64encode(row["encrypted_key"]).decode() if row["encrypted_key"] else "",
+    }
+    if with_hash:
+        update["hash_of_update"] = row["hash_of_update"]
+    update.update(
+        {
+            "description": row["description"],
+            "price": float(int(row["price"])) / 1e18,
+            "version": row["version"],
+            "isValid": bool(row["is_valid"]),
+        }
+    )
+    return update
+
+
+class UpdateIndexSyncer:
+    """UpdateIndex를 주기적으로 동기화하는 백그라운드 스레드"""
+
+    def __init__(self, index, interval=UPDATE_INDEX_POLL_INTERVAL):
+        self.index = index
+        self.interval = interval
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="update-index-sync", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.index.sync_once()
+                self.last_error = None
+            except Exception as e:
+                if self.last_error != str(e):
+                    logger.warning(f"업데이트 인덱스 동기화 실패: {e}")
+                self.last_error = str(e)
+            time.sleep(self.interval)
+
+
+_index = None
+_syncer = None
+_index_lock = threading.Lock()
+
+
+def get_update_index():
+    """프로세스 전역 UpdateIndex (최초 호출 시 생성하고 백그라운드 동기화 시작)"""
+    global _index, _syncer
+    with _index_lock:
+        if _index is None:
+            _index = UpdateIndex()
+            _syncer = UpdateIndexSyncer(_index)
+        return _index
@@ -0,0 +1,170 @@
+import os
+import json
+import base64
+from charm.core.engine.util import objectToBytes, bytesToObject
+from charm.toolbox.pairinggroup import G1, G2, GT
+from crypto.cpabe.wire import CiphertextFormatError, read_bytes, read_varint, write_bytes, write_varint
+
+# 온체인에 저장하는 CP-ABE 암호문 형식: "json"(기존 JSON + base64) 또는 "binary"(압축 바이너리)
+CPABE_CIPHERTEXT_FORMAT = os.getenv("CPABE_CIPHERTEXT_FORMAT", "json").lower()
+
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+
+# 바이너리 형식 식별 바이트. JSON 형식은 항상 '{'(0x7b)로 시작하므로 구분 가능
+CIPHERTEXT_MAGIC = 0xCB
+CIPHERTEXT_VERSION = 1
+
+# BSW07 암호문 필드별 그룹 (바이너리 형식에서는 원소마다 타입을 저장하지 않음)
+_FIELD_TYPES = {"C_tilde": GT, "C": G1, "Cy": G1, "Cyp": G2}
+
+# 바이너리 형식 (version 1). 정수는 모두 unsigned LEB128 varint, 원소는 길이 + 압축 원소 바이트 (crypto/cpabe/wire.py).
+#
+#     magic(1) version(1)
+#     policy_len policy(utf-8, 정규형 정책 문자열)
+#     C_tilde  C
+#     attr_count  attr_name_len attr_name ...          ← 속성 이름 테이블 (중복 제거)
+#     share_count  (attr_ref dup_index Cy Cyp) ...     ← 공유 순서 = attributes 순서
+#
+# - attr_ref: 속성 이름 테이블 인덱스
+# - dup_index: 정책에 같은 속성이 여러 번 나올 때 charm이 붙이는 "_n" 접미사 (없으면 0, 있으면 n+1)
+
+
+def _element_bytes(element, group):
+    # group.serialize() → b"<type>:<base64(원소)>"
+    _, encoded = group.serialize(element).split(b":", 1)
+    return base64.b64decode(encoded)
+
+
+def _element(raw, group, element_type):
+    return group.deserialize(b"%d:" % element_type + base64.b64encode(raw))
+
+
+def _split_index(share_name):
+    """'ATTR_2' → ('ATTR', 3), 'ATTR' → ('ATTR', 0). 속성 이름에는 '_'가 들어가지 않음"""
+    name, sep, index = share_name.rpartition("_")
+    if sep and index.isdigit():
+        return name, int(index) + 1
+    return share_name, 0
+
+
+def encode_ciphertext(ciphertext, group):
+    """BSW07 암호문 dict(그룹 원소 포함) → 바이너리 형식 bytes"""
+    out = bytearray([CIPHERTEXT_MAGIC, CIPHERTEXT_VERSION])
+    write_bytes(out, ciphertext["policy"].encode("utf-8"))
+    write_bytes(out, _element_bytes(ciphertext["C_tilde"], group))
+    write_bytes(out, _element_bytes(ciphertext["C"], group))
+
+    shares = list(ciphertext["attributes"])
+    names = []
+    refs = {}
+    for share in shares:
+        name, _ = _split_index(share)
+        if name not in refs:
+            refs[name] = len(names)
+            names.append(name)
+
+    write_varint(out, len(names))
+    for name in names:
+        write_bytes(out, name.encode("utf-8"))
+
+    write_varint(out, len(shares))
+    for share in shares:
+        name, dup_index = _split_index(share)
+        write_varint(out, refs[name])
+        write_varint(out, dup_index)
+        write_bytes(out, _element_bytes(ciphertext["Cy"][share], group))
+        write_bytes(out, _element_bytes(ciphertext["Cyp"][share], group))
+    return bytes(out)
+
+
+def encode_ciphertext_json(ciphertext, group):
+    """BSW07 암호문 dict → 기존 JSON 형식 문자열 (그룹 원소는 base64(objectToBytes))"""
+
+    def serialize_element(obj):
+        if hasattr(obj, "initPP"):  # 그룹 원소(G1/G2/GT)
+            return base64.b64encode(objectToBytes(obj, group)).decode()
+        elif isinstance(obj, list):
+            return [serialize_element(e) for e in obj]
+        elif isinstance(obj, dict):
+            return {k: serialize_element(v) for k, v in obj.items()}
+        else:  # 문자열 등은 그대로
+            return obj
+
+    return json.dumps(serialize_element(ciphertext))
+
+
+def ciphertext_format(data):
+    """온체인 encryptedKey 바이트의 형식 ("binary" 또는 "json")"""
+    if isinstance(data, str):
+        return FORMAT_JSON
+    if data and data[0] == CIPHERTEXT_MAGIC:
+        return FORMAT_BINARY
+    return FORMAT_JSON
+
+
+def decode_ciphertext(data, group):
+    """
+    온체인 encryptedKey(바이너리 또는 JSON) → CPabe_BSW07.decrypt에 넣을 수 있는 암호문 dict.
+    디바이스는 형식을 몰라도 이 함수 하나로 복원 가능
+    """
+    if ciphertext_format(data) == FORMAT_JSON:
+        return _decode_json(data, group)
+
+    data = bytes(data)
+    version = data[1] if len(data) > 1 else None
+    if version != CIPHERTEXT_VERSION:
+        raise CiphertextFormatError(f"지원하지 않는 암호문 버전: {version}")
+    pos = 2
+    policy, pos = read_bytes(data, pos)
+    c_tilde, pos = read_bytes(data, pos)
+    c, pos = read_bytes(data, pos)
+
+    name_count, pos = read_varint(data, pos)
+    names = []
+    for _ in range(name_count):
+        name, pos = read_bytes(data, pos)
+        names.append(name.decode("utf-8"))
+
+    share_count, pos = read_varint(data, pos)
+    attributes, c_y, c_y_pr = [], {}, {}
+    for _ in range(share_count):
+        ref, pos = read_varint(data, pos)
+        dup_index, pos = read_varint(data, pos)
+        if ref >= len(names):
+            raise CiphertextFormatError(f"잘못된 속성 참조: {ref}")
+        share = names[ref] if dup_index == 0 else f"{names[ref]}_{dup_index - 1}"
+        y, pos = read_bytes(data, pos)
+        y_pr, pos = read_bytes(data, pos)
+        attributes.append(share)
+        c_y[share] = _element(y, group, _FIELD_TYPES["Cy"])
+        c_y_pr[share] = _element(y_pr, group, _FIELD_TYPES["Cyp"])
+    if pos != len(data):
+        raise CiphertextFormatError("암호문 끝에 해석되지 않은 바이트가 있습니다.")
+
+    return {
+        "C_tilde": _element(c_tilde, group, _FIELD_TYPES["C_tilde"]),
+        "C": _element(c, group, _FIELD_TYPES["C"]),
+        "Cy": c_y,
+        "Cyp": c_y_pr,
+        "policy": policy.decode("utf-8"),
+        "attributes": attributes,
+    }
+
+
+def _decode_json(data, group):
+    if isinstance(data, (bytes, bytearray)):
+        data = bytes(data).decode("utf-8")
+    try:
+        serialized = json.loads(data)
+    except ValueError as e:
+        raise CiphertextFormatError(f"JSON 암호문 해석 실패: {e}")
+
+    def deserialize(value, key=None):
+        if key in ("policy", "attributes"):
+            return value
+        if isinstance(value, dict):
+            return {k: deserialize(v, k if key is None else None) for k, v in value.items()}
+        return bytesToObject(base64.b64decode(value), group)
+
+    return deserialize(serialized)
@@ -1,32 +1,175 @@
-from charm.toolbox.pairinggroup import PairingGroup, GT
+from charm.toolbox.pairinggroup import PairingGroup, GT, G2, ZR
+from charm.toolbox.secretutil import SecretUtil
 from charm.schemes.abenc.abenc_bsw07 import CPabe_BSW07
 from charm.core.engine.util import objectToBytes, bytesToObject
+from crypto.cpabe.policy import CompiledPolicy, compile_policy, POLICY_CACHE_SIZE
+from crypto.cpabe.precompute import (
+    BASE_MATERIAL,
+    CPABE_PRECOMPUTE_POOL_SIZE,
+    EncryptionMaterialPool,
+)
+from crypto.cpabe.codec import (
+    CPABE_CIPHERTEXT_FORMAT,
+    FORMAT_BINARY,
+    decode_ciphertext,
+    encode_ciphertext,
+    encode_ciphertext_json,
+)
+from functools import lru_cache
 import os
 import json
 import logging
 import base64
+import threading
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# 사용할 페어링 곡선 (charm PairingGroup 이름). 키 파일에는 생성한 곡선이 함께 기록됨
+CPABE_CURVE = os.getenv("CPABE_CURVE", "SS512").upper()
+SUPPORTED_CURVES = ("SS512", "SS1024", "MNT159", "MNT201", "MNT224", "BN254")
+# 곡선 정보가 없는 기존 키 파일은 SS512로 생성된 것
+LEGACY_CURVE = "SS512"
+CURVE_TAG = "__curve__"
+
+# 프로세스 전역 CP-ABE 상태: 곡선별 PairingGroup/스킴은 한 번만 만들고, 키 파일은 변경될 때만 다시 읽음
+_contexts = {}  # 곡선 이름 → (PairingGroup, CPabe_BSW07, SecretUtil)
+_key_cache = {}  # 키 파일 절대 경로 → (파일 상태, 곡선, 복원된 키)
+_attribute_hashes = {}  # (곡선, 속성 이름) → H(속성) ∈ G2 (initPP 적용)
+_material_pools = {}  # 곡선 이름 → EncryptionMaterialPool
+_context_lock = threading.Lock()
+
+
+class CurveMismatchError(ValueError):
+    """키 파일이 현재 설정과 다른 곡선으로 생성됨"""
+
+
+def _shared_context(curve=None):
+    """곡선별 프로세스 전역 (PairingGroup, CPabe_BSW07, SecretUtil). 최초 호출 시 생성"""
+    curve = (curve or CPABE_CURVE).upper()
+    if curve not in SUPPORTED_CURVES:
+        raise ValueError(f"지원하지 않는 페어링 곡선입니다: {curve} (지원: {', '.join(SUPPORTED_CURVES)})")
+    with _context_lock:
+        context = _contexts.get(curve)
+        if context is None:
+            group = PairingGroup(curve)
+            context = (group, CPabe_BSW07(group), SecretUtil(group, verbose=False))
+            _contexts[curve] = context
+            logger.info(f"Charm-crypto 라이브러리 로드 성공. CP-ABE 기능 활성화됨. (곡선: {curve})")
+        return context
+
+
+@lru_cache(maxsize=POLICY_CACHE_SIZE)
+def _charm_policy(canonical, util):
+    """정규형 정책 문자열 → (charm 정책 트리, 속성 목록). 트리는 암호화 중 변경되지 않으므로 공유"""
+    tree = util.createPolicy(canonical)
+    return tree, tuple(util.getAttributeList(tree))
+
+
+def _attribute_hash(attribute, group, curve):
+    """H(속성) ∈ G2. 속성마다 한 번만 해시하고 initPP()로 거듭제곱 테이블을 미리 계산"""
+    with _context_lock:
+        element = _attribute_hashes.get((curve, attribute))
+    if element is not None:
+        return element
+    element = group.hash(attribute, G2)
+    element.initPP()
+    with _context_lock:
+        if len(_attribute_hashes) >= POLICY_CACHE_SIZE * 8:
+            _attribute_hashes.clear()
+        _attribute_hashes[(curve, attribute)] = element
+    return element
+
+
+def _material_pool(curve):
+    """곡선별 오프라인 암호화 재료 풀 (CPABE_PRECOMPUTE_POOL_SIZE가 0이면 None)"""
+    if CPABE_PRECOMPUTE_POOL_SIZE <= 0:
+        return None
+    with _context_lock:
+        pool = _material_pools.get(curve)
+        if pool is not None:
+            return pool
+
+    def produce(public_key_file, canonical):
+        tools = CPABETools(curve)
+        pk = tools.load_public_key(public_key_file)
+        if canonical is BASE_MATERIAL:
+            return tools._base_material(pk)
+        return tools._policy_material(pk, compile_policy(canonical))
+
+    with _context_lock:
+        return _material_pools.setdefault(curve, EncryptionMaterialPool(produce))
+
+
+def key_file_curve(serialized):
+    """직렬화된 키(dict)에 기록된 곡선 이름 (기록이 없으면 LEGACY_CURVE)"""
+    return str(serialized.get(CURVE_TAG) or LEGACY_CURVE).upper()
+
+
+def _check_curve(path, file_curve, curve):
+    if file_curve != curve:
+        raise CurveMismatchError(
+            f"키 파일 {path}은(는) {file_curve} 곡선으로 생성되었지만 현재 설정은 {curve}입니다. "
+            "CPABE_CURVE를 맞추거나 키를 다시 생성하세요."
+        )
+
+
+def _load_key_file(key_file, group, curve, preprocess=False):
+    """
+    JSON(base64) 키 파일을 복원해 캐시. 파일이 바뀌면(mtime/크기/inode) 자동으로 다시 읽음.
+    - 파일에 기록된 곡선(__curve__)이 curve와 다르면 CurveMismatchError
+    - preprocess=True면 각 그룹 원소에 initPP()를 실행해 고정 밑 거듭제곱 테이블을 미리 계산
+      (공개키 g, h, e(g,g)^alpha 등은 암호화마다 같은 밑으로 거듭제곱됨)
+    """
+    path = os.path.abspath(key_file)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    with _context_lock:
+        cached = _key_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        _check_curve(path, cached[1], curve)
+        return cached[2]
+
+    with open(path, "r") as f:
+        serialized = json.load(f)
+    file_curve = key_file_curve(serialized)
+    _check_curve(path, file_curve, curve)
+    key = {
+        k: bytesToObject(base64.b64decode(v), group)
+        for k, v in serialized.items()
+        if k != CURVE_TAG
+    }
+    if preprocess:
+        for element in key.values():
+            try:
+                element.initPP()
+            except Exception as e:
+                logger.debug(f"initPP 미지원 원소 건너뜀: {e}")
+
+    with _context_lock:
+        _key_cache[path] = (stamp, file_curve, key)
+    logger.info(f"CP-ABE 키 로드: {path} ({file_curve}){' (initPP 적용)' if preprocess else ''}")
+    return key
+
+
 class CPABETools:
-    def __init__(self):
+    def __init__(self, curve=None):
         """
         CP-ABE(BSW07) 스킴 초기화 클래스.
-        - PairingGroup("SS512")를 사용하여 안전한 암호연산 환경 생성
+        - PairingGroup(curve)를 사용하여 안전한 암호연산 환경 생성 (기본값: CPABE_CURVE, SS512)
         - CPabe_BSW07 스킴을 로딩하여 정책 기반 암호화/복호화 기능 사용 가능
+        - 그룹/스킴은 곡선별로 프로세스 전역 공유하므로 여러 번 생성해도 비용이 들지 않음
         """
-        self.group = PairingGroup("SS512")
-        self.cpabe = CPabe_BSW07(self.group)
+        self.curve = (curve or CPABE_CURVE).upper()
+        self.group, self.cpabe, self.util = _shared_context(self.curve)
         self.charm_installed = True
-        logger.info("Charm-crypto 라이브러리 로드 성공. CP-ABE 기능 활성화됨.")
 
     def setup(self, public_key_file, master_key_file):
         """
         시스템 전체에서 공통으로 사용할 공개키(pk), 마스터키(mk)를 생성.
         - pk는 공개되어도 괜찮음
         - mk는 비밀로 보관해야 하며, keygen에서만 사용됨
-        - objectToBytes → base64 인코딩하여 JSON 파일로 저장
+        - objectToBytes → base64 인코딩하여 JSON 파일로 저장 (__curve__에 곡선 이름 기록)
         """
         try:
             (pk, mk) = self.cpabe.setup()
@@ -34,6 +177,8 @@ class CPABETools:
             # 그룹 원소를 직렬화 후 base64 인코딩
             serialized_pk = {k: base64.b64encode(objectToBytes(v, self.group)).decode() for k, v in pk.items()}
             serialized_mk = {k: base64.b64encode(objectToBytes(v, self.group)).decode() for k, v in mk.items()}
+            serialized_pk[CURVE_TAG] = self.curve
+            serialized_mk[CURVE_TAG] = self.curve
 
             # JSON 저장
             with open(public_key_file, "w") as f:
@@ -47,43 +192,95 @@ class CPABETools:
             logger.error(f"CP-ABE 시스템 초기화 실패: {e}")
             return False
 
-    def encrypt(self, message, policy, public_key_file):
+    def encrypt(self, message, policy, public_key_file, output_format=None):
         """
         입력된 메시지를 접근 제어 정책(policy)에 따라 암호화.
         - message: GT 요소여야 함 (바이트일 경우 GT 요소로 변환)
-        - policy: 문자열 표현 (예: "ATTR1 and (ATTR2 or ATTR3)")
-        - 반환값: 암호문을 JSON(base64 직렬화) 형태로 반환
+        - policy: 문자열 표현 (예: "ATTR1 and (ATTR2 or ATTR3)") 또는 CompiledPolicy
+        - output_format: "json"(기본, CPABE_CIPHERTEXT_FORMAT) 또는 "binary"
+        - 반환값: json이면 JSON(base64 직렬화) 문자열, binary면 crypto.cpabe.codec 바이너리 bytes
         """
         try:
-            # 공개키 로드
-            with open(public_key_file, "r") as f:
-                serialized_pk = json.load(f)
-            pk = {k: bytesToObject(base64.b64decode(v), self.group) for k, v in serialized_pk.items()}
+            # 공개키 로드 (캐시 + 고정 밑 사전계산)
+            pk = self.load_public_key(public_key_file)
 
             # message가 bytes라면 int → GT 요소로 변환
             if isinstance(message, bytes):
                 message_value = int.from_bytes(message, "big")
                 message = self.group.init(GT, message_value)
 
-            # BSW07 암호화 실행
-            encrypted_result = self.cpabe.encrypt(pk, message, policy)
+            # BSW07 암호화 실행 (정책은 캐시된 파싱 결과 사용)
+            if not isinstance(policy, CompiledPolicy):
+                policy = compile_policy(policy)
+            encrypted_result = self._bsw07_encrypt(pk, message, policy, public_key_file)
 
-            # 재귀적으로 직렬화 (그룹 원소는 base64 문자열로 변환)
-            def serialize_element(obj):
-                if hasattr(obj, "initPP"):  # 그룹 원소(G1/G2/GT)
-                    return base64.b64encode(objectToBytes(obj, self.group)).decode()
-                elif isinstance(obj, list):
-                    return [serialize_element(e) for e in obj]
-                elif isinstance(obj, dict):
-                    return {k: serialize_element(v) for k, v in obj.items()}
-                else:  # 문자열 등은 그대로
-                    return obj
-
-            return json.dumps(serialize_element(encrypted_result))
+            if (output_format or CPABE_CIPHERTEXT_FORMAT) == FORMAT_BINARY:
+                return encode_ciphertext(encrypted_result, self.group)
+            return encode_ciphertext_json(encrypted_result, self.group)
         except Exception as e:
             logger.error(f"CP-ABE 암호화 실패: {e}")
             raise
 
+    def _bsw07_encrypt(self, pk, message, compiled, public_key_file=None):
+        """
+        CPabe_BSW07.encrypt와 같은 형식의 암호문 생성 (온라인 단계).
+        - 메시지와 무관한 부분은 사전계산 재료 풀에서 꺼내 쓰고, 없을 때만 여기서 계산
+        - 정책별 재료가 있으면 C_tilde = e(g,g)^(alpha*s) × M 곱셈 한 번으로 끝남
+        """
+        pool = _material_pool(self.curve) if public_key_file else None
+        if pool is None:
+            material = self._policy_material(pk, compiled)
+        else:
+            path = os.path.abspath(public_key_file)
+            with pool.online():
+                material, base = pool.take(path, compiled.canonical)
+                # 공개키가 바뀌기 전에 만든 재료는 사용하지 않음
+                if (material or base or {}).get("pk", pk) is not pk:
+                    pool.discard(path)
+                    material = base = None
+                if material is None:
+                    material = self._policy_material(pk, compiled, base)
+
+        return {
+            "C_tilde": material["mask"] * message,
+            "C": material["C"],
+            "Cy": material["Cy"],
+            "Cyp": material["Cyp"],
+            "policy": material["policy"],
+            "attributes": material["attributes"],
+        }
+
+    def _base_material(self, pk):
+        """정책과 무관한 오프라인 재료: s, C = h^s, 마스크 e(g,g)^(alpha*s)"""
+        s = self.group.random(ZR)
+        return {"pk": pk, "s": s, "C": pk["h"] ** s, "mask": pk["e_gg_alpha"] ** s}
+
+    def _policy_material(self, pk, compiled, base=None):
+        """
+        정책별 오프라인 재료: 기본 재료 + 리프별 Cy = g^share, Cyp = H(속성)^share.
+        - 정책 문자열을 매번 파싱하지 않고 캐시된 charm 정책 트리를 사용
+        - H(속성)도 속성별로 캐시된 원소 사용
+        """
+        base = base or self._base_material(pk)
+        policy_tree, attribute_list = _charm_policy(compiled.canonical, self.util)
+        shares = self.util.calculateSharesDict(base["s"], policy_tree)
+
+        C_y, C_y_pr = {}, {}
+        for i, share in shares.items():
+            j = self.util.strip_index(i)
+            C_y[i] = pk["g"] ** share
+            C_y_pr[i] = _attribute_hash(j, self.group, self.curve) ** share
+
+        return {
+            "pk": pk,
+            "mask": base["mask"],
+            "C": base["C"],
+            "Cy": C_y,
+            "Cyp": C_y_pr,
+            "policy": compiled.canonical,
+            "attributes": list(attribute_list),
+        }
+
     def generate_device_secret_key(self, public_key_file, master_key_file, attributes, device_secret_key_file):
         """
         속성(attribute) 집합을 기반으로 디바이스 비밀키 생성.
@@ -92,14 +289,9 @@ class CPABETools:
         - attributes: ["ATTR1", "ATTR2", ...]
         """
         try:
-            # 공개키, 마스터키 로드
-            with open(public_key_file, "r") as f:
-                serialized_pk = json.load(f)
-            with open(master_key_file, "r") as f:
-                serialized_mk = json.load(f)
-
-            pk = {k: bytesToObject(base64.b64decode(v), self.group) for k, v in serialized_pk.items()}
-            mk = {k: bytesToObject(base64.b64decode(v), self.group) for k, v in serialized_mk.items()}
+            # 공개키, 마스터키 로드 (파일이 바뀌지 않았으면 캐시 사용)
+            pk = self.load_public_key(public_key_file)
+            mk = _load_key_file(master_key_file, self.group, self.curve)
 
             # 디바이스 비밀키 생성
             device_secret_key = self.cpabe.keygen(pk, mk, attributes)
@@ -116,6 +308,7 @@ class CPABETools:
                     return obj
 
             serialized_key = serialize_element(device_secret_key)
+            serialized_key[CURVE_TAG] = self.curve
 
             # 파일 저장
             os.makedirs(os.path.dirname(device_secret_key_file), exist_ok=True)
@@ -123,6 +316,8 @@ class CPABETools:
                 json.dump(serialized_key, f)
 
             return device_secret_key
+        except CurveMismatchError:
+            raise
         except Exception as e:
             logger.error(f"개인 키 생성 실패: {e}")
             return None
@@ -130,11 +325,10 @@ class CPABETools:
     def load_public_key(self, public_key_file):
         """
         저장된 공개키(JSON base64)를 로드하여 복원.
+        - 프로세스 전역 캐시 사용 (파일이 바뀌면 자동으로 다시 로드)
+        - 원소마다 initPP()를 적용해 암호화 시 고정 밑 거듭제곱을 빠르게 계산
         """
-        with open(public_key_file, "r") as f:
-            serialized_pk = json.load(f)
-        pk = {k: bytesToObject(base64.b64decode(v), self.group) for k, v in serialized_pk.items()}
-        return pk
+        return _load_key_file(public_key_file, self.group, self.curve, preprocess=True)
 
     def load_device_secret_key(self, device_secret_key_file):
         """
@@ -142,9 +336,12 @@ class CPABETools:
         - 주의: 비밀키 내부에는 'S'라는 속성 리스트가 포함되어 있음
         → 이는 단순 문자열 리스트이므로 base64 decode 하면 오류 발생
         → 따라서 key_name == "S"일 때는 그대로 반환
+        - 키에 기록된 곡선(__curve__)이 현재 곡선과 다르면 CurveMismatchError
         """
         with open(device_secret_key_file, "r") as f:
             serialized_key = json.load(f)
+        _check_curve(device_secret_key_file, key_file_curve(serialized_key), self.curve)
+        serialized_key.pop(CURVE_TAG, None)
 
         def deserialize_element(obj, key_name=None):
             # 'S' 키는 속성 리스트 → 그대로 문자열 반환
@@ -165,6 +362,12 @@ class CPABETools:
 
         return deserialize_element(serialized_key)
 
+    def load_ciphertext(self, encrypted_key):
+        """
+        온체인 encryptedKey(JSON 또는 바이너리 형식)를 decrypt에 사용할 암호문 dict로 복원.
+        """
+        return decode_ciphertext(encrypted_key, self.group)
+
     def get_group(self):
         """
         PairingGroup 객체 반환 (외부에서 GT 요소 생성 등 활용 가능).
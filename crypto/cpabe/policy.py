@@ -0,0 +1,182 @@
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# 캐시에 보관하는 정책 수 (원문 → 정규형, 정규형 → 컴파일 결과 각각)
+POLICY_CACHE_SIZE = int(os.getenv("CPABE_POLICY_CACHE_SIZE", "1024"))
+
+# 속성 이름에 허용하는 문자.
+# charm 정책 파서의 속성 문자 집합에서 '_'(중복 속성 인덱스 구분자)와 '!'(부정)는 제외
+_ATTRIBUTE_CHARS = r"A-Za-z0-9\-./?@#$^&*%"
+_TOKEN_RE = re.compile(rf"\s*(?:(\()|(\))|([{_ATTRIBUTE_CHARS}]+)|(\S))")
+
+OP_AND = "and"
+OP_OR = "or"
+
+# 파싱 결과: canonical(정규형 정책 문자열), ast(트리), attributes(속성 이름 frozenset)
+CompiledPolicy = namedtuple("CompiledPolicy", ["canonical", "ast", "attributes"])
+
+
+class PolicyError(ValueError):
+    """정책 문자열 문법 오류"""
+
+
+def _tokenize(text):
+    """정책 문자열 → 토큰 목록 ("(", ")", ("op", "and"|"or"), ("attr", 이름))"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        lpar, rpar, word, other = match.groups()
+        if lpar:
+            tokens.append("(")
+        elif rpar:
+            tokens.append(")")
+        elif word:
+            # AND/OR는 단어 전체가 일치할 때만 연산자 (MOTOR, BRAND 등 속성 이름은 그대로)
+            lowered = word.lower()
+            if lowered in (OP_AND, OP_OR):
+                tokens.append(("op", lowered))
+            else:
+                tokens.append(("attr", word.upper()))
+        elif other:
+            raise PolicyError(f"정책에 사용할 수 없는 문자입니다: {other!r} ({text})")
+    return tokens
+
+
+class _Parser:
+    """
+    재귀 하강 파서. 우선순위는 and > or, 괄호로 묶을 수 있음.
+    AST 노드: ("attr", 이름) 또는 (연산자, (자식, ...)). 같은 연산자가 이어지면 한 노드로 평탄화
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise PolicyError("정책이 비어 있습니다.")
+        node = self._expr(OP_OR)
+        if self.pos != len(self.tokens):
+            raise PolicyError(f"정책 해석 실패: 예상하지 못한 토큰 {self._describe()} ({self.text})")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _describe(self):
+        token = self._peek()
+        if token is None:
+            return "정책 끝"
+        return repr(token if isinstance(token, str) else token[1])
+
+    def _expr(self, op):
+        # op가 or이면 and 항들을, and이면 원자들을 op로 연결
+        operand = (lambda: self._expr(OP_AND)) if op == OP_OR else self._atom
+        children = [operand()]
+        while self._peek() == ("op", op):
+            self.pos += 1
+            children.append(operand())
+        return _make(op, children)
+
+    def _atom(self):
+        token = self._peek()
+        if token == "(":
+            self.pos += 1
+            node = self._expr(OP_OR)
+            if self._peek() != ")":
+                raise PolicyError(f"닫는 괄호가 없습니다: {self._describe()} ({self.text})")
+            self.pos += 1
+            return node
+        if isinstance(token, tuple) and token[0] == "attr":
+            self.pos += 1
+            return token
+        raise PolicyError(f"속성이 와야 할 자리에 {self._describe()} ({self.text})")
+
+
+def _make(op, children):
+    """같은 연산자 자식은 평탄화하고, 중복 제거 후 정렬해 순서와 무관한 정규형 생성"""
+    flat = []
+    for child in children:
+        if child[0] == op:
+            flat.extend(child[1])
+        else:
+            flat.append(child)
+    unique = sorted(set(flat), key=_render)
+    if len(unique) == 1:
+        return unique[0]
+    return (op, tuple(unique))
+
+
+def _render(node):
+    """
+    AST → charm 정책 문자열.
+    charm 파서는 연산자 우선순위가 없으므로 모든 이항 연산을 괄호로 감싼 형태로 출력
+    """
+    if node[0] == "attr":
+        return node[1]
+    op, children = node
+    rendered = [_render(child) for child in children]
+    text = rendered[-1]
+    for part in reversed(rendered[:-1]):
+        text = f"({part} {op} {text})"
+    return text
+
+
+def _attributes(node):
+    if node[0] == "attr":
+        return frozenset([node[1]])
+    return frozenset().union(*(_attributes(child) for child in node[1]))
+
+
+@lru_cache(maxsize=POLICY_CACHE_SIZE)
+def _compile_canonical(canonical):
+    ast = _Parser(canonical).parse()
+    return CompiledPolicy(canonical, ast, _attributes(ast))
+
+
+@lru_cache(maxsize=POLICY_CACHE_SIZE)
+def compile_policy(text):
+    """
+    정책 문자열을 파싱해 CompiledPolicy 반환 (LRU 캐시).
+    - 속성 이름은 대문자, 연산자는 소문자로 정규화하고 자식 순서를 정렬하므로
+      표기만 다른 같은 정책은 하나의 캐시 항목을 공유
+    - 문법 오류는 PolicyError(ValueError)
+    """
+    if not isinstance(text, str):
+        raise PolicyError(f"정책은 문자열이어야 합니다: {text!r}")
+    canonical = _render(_Parser(text).parse())
+    return _compile_canonical(canonical)
+
+
+@lru_cache(maxsize=POLICY_CACHE_SIZE)
+def _compile_items(items):
+    parts = []
+    for key, value in items:
+        if value.strip():  # 값이 비어있지 않은 경우만 처리
+            parts.append(compile_policy(value).ast)
+    if not parts:
+        raise PolicyError("정책이 비어 있습니다.")
+    # 모든 조건을 and로 연결
+    return _compile_canonical(_render(_make(OP_AND, parts)))
+
+
+def compile_policy_dict(policy_dict):
+    """
+    {"model": "VS500", "option": "EXCLUSIVE OR PRESTIGE", ...} 형식의 정책을 모두 and로 묶어 컴파일.
+    - 값이 빈 항목은 무시
+    """
+    for key, value in policy_dict.items():
+        if not isinstance(value, str):
+            raise PolicyError(f"'{key}' 속성 값은 문자열이어야 합니다.")
+    return _compile_items(tuple(sorted(policy_dict.items())))
+
+
+def cache_info():
+    """정책 캐시 적중 통계"""
+    return {
+        "text": compile_policy.cache_info()._asdict(),
+        "canonical": _compile_canonical.cache_info()._asdict(),
+        "dict": _compile_items.cache_info()._asdict(),
+    }
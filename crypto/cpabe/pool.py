@@ -0,0 +1,187 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from crypto.cpabe.cpabe import CPABETools, _shared_context
+from crypto.cpabe.policy import CompiledPolicy, compile_policy
+
+logger = logging.getLogger(__name__)
+
+# CP-ABE 암호화/키 생성을 실행하는 워커 프로세스 수 (0이면 요청 스레드에서 직접 실행)
+CPABE_POOL_WORKERS = int(os.getenv("CPABE_POOL_WORKERS", str(os.cpu_count() or 1)))
+# 실행 중 + 대기 중인 작업의 최대 개수
+CPABE_POOL_QUEUE_MAX = int(os.getenv("CPABE_POOL_QUEUE_MAX", str(max(1, CPABE_POOL_WORKERS) * 4)))
+# 대기열이 가득 찼을 때 빈 자리를 기다리는 시간(초)
+CPABE_POOL_SUBMIT_TIMEOUT = float(os.getenv("CPABE_POOL_SUBMIT_TIMEOUT", "10"))
+# 작업 하나의 결과를 기다리는 최대 시간(초)
+CPABE_JOB_TIMEOUT = float(os.getenv("CPABE_JOB_TIMEOUT", "30"))
+
+
+class CPABEPoolBusyError(RuntimeError):
+    """CP-ABE 작업 대기열이 가득 차 새 작업을 받을 수 없음"""
+
+
+# ---- 워커 프로세스 쪽 ----
+
+_worker_tools = None
+
+
+def _init_worker(public_key_file):
+    """워커 시작 시 PairingGroup/스킴을 만들고 공개키를 미리 로드(initPP 포함)"""
+    global _worker_tools
+    _worker_tools = CPABETools()
+    if public_key_file and os.path.exists(public_key_file):
+        try:
+            _worker_tools.load_public_key(public_key_file)
+        except Exception as e:
+            logger.warning(f"CP-ABE 워커 공개키 사전 로드 실패: {e}")
+
+
+def _worker():
+    if _worker_tools is None:
+        _init_worker(None)
+    return _worker_tools
+
+
+def _encrypt_job(message_bytes, policy, public_key_file):
+    tools = _worker()
+    message = tools.group.deserialize(message_bytes)
+    return tools.encrypt(message, policy, public_key_file)
+
+
+def _keygen_job(public_key_file, master_key_file, attributes, device_secret_key_file):
+    tools = _worker()
+    key = tools.generate_device_secret_key(
+        public_key_file, master_key_file, attributes, device_secret_key_file
+    )
+    return key is not None
+
+
+# ---- 요청 프로세스 쪽 ----
+
+
+class CPABEWorkerPool:
+    """
+    CP-ABE 암호화/키 생성을 별도 프로세스에서 실행하는 풀.
+    - 페어링 연산은 GIL을 잡고 있으므로 요청 스레드는 결과만 기다리고, 처리량은 코어 수만큼 확장
+    - 워커는 시작 시 그룹과 공개키를 미리 준비 (이후 키 파일이 바뀌면 워커가 다시 로드)
+    - 실행 중 + 대기 작업 수는 queue_max로 제한, 작업마다 CPABE_JOB_TIMEOUT 적용
+    - 시간 초과된 작업은 cancel로 멈출 수 없으므로 워커 프로세스를 종료하고 풀을 다시 생성
+    - 워커가 비정상 종료되면 풀을 다시 생성하고 작업을 한 번 재시도
+    """
+
+    def __init__(self, workers=CPABE_POOL_WORKERS, queue_max=CPABE_POOL_QUEUE_MAX, public_key_file=None):
+        self.workers = workers
+        self.public_key_file = public_key_file
+        self._slots = threading.BoundedSemaphore(queue_max)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # 요청 처리 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.public_key_file,),
+                )
+                logger.info(f"CP-ABE 워커 프로세스 풀 시작: {self.workers}개")
+            return self._executor
+
+    def _reset_executor(self, executor, kill=False):
+        """
+        executor를 버리고 다음 작업에서 새 풀을 생성.
+        - kill: 실행 중인 작업의 워커 프로세스도 종료 (같은 풀의 다른 작업은 BrokenProcessPool로 재시도)
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if kill:
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=CPABE_POOL_SUBMIT_TIMEOUT):
+            raise CPABEPoolBusyError("CP-ABE 작업 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(fn, *args)
+                    return future.result(timeout=CPABE_JOB_TIMEOUT)
+                except BrokenProcessPool:
+                    # 이미 깨진 풀에 submit했거나 실행 중 워커가 종료됨
+                    logger.error("CP-ABE 워커 프로세스가 비정상 종료됨, 풀 재생성")
+                    self._reset_executor(executor)
+                    if attempt:
+                        raise
+                except FutureTimeoutError:
+                    # 실행 중인 작업은 취소되지 않으므로 워커를 종료해야 프로세스와 대기열 자리가 돌아옴
+                    logger.error(f"CP-ABE 작업 시간 초과 ({CPABE_JOB_TIMEOUT}초), 워커 프로세스 재시작")
+                    self._reset_executor(executor, kill=True)
+                    raise TimeoutError(f"CP-ABE 작업 시간 초과 ({CPABE_JOB_TIMEOUT}초)")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def encrypt(self, message, policy, public_key_file):
+        """
+        CPABETools.encrypt와 같은 결과(JSON 문자열 또는 바이너리 bytes)를 워커 프로세스에서 계산.
+        - message: GT 원소 (직렬화해서 전달)
+        - policy: 문자열 또는 CompiledPolicy. 문법 오류는 전송 전에 이 프로세스에서 PolicyError로 발생
+        """
+        if not isinstance(policy, CompiledPolicy):
+            policy = compile_policy(policy)
+        if self.workers <= 0:
+            return CPABETools().encrypt(message, policy, public_key_file)
+        group = _shared_context()[0]
+        return self._run(_encrypt_job, group.serialize(message), policy.canonical, public_key_file)
+
+    def generate_device_secret_key(self, public_key_file, master_key_file, attributes, device_secret_key_file):
+        """
+        워커 프로세스에서 디바이스 비밀키를 생성해 파일로 저장하고, 저장된 키를 복원해 반환 (실패 시 None)
+        """
+        if self.workers <= 0:
+            return CPABETools().generate_device_secret_key(
+                public_key_file, master_key_file, list(attributes), device_secret_key_file
+            )
+        created = self._run(
+            _keygen_job, public_key_file, master_key_file, list(attributes), device_secret_key_file
+        )
+        if not created:
+            return None
+        return CPABETools().load_device_secret_key(device_secret_key_file)
+
+    def status(self):
+        with self._lock:
+            return {"workers": self.workers, "in_flight": self._in_flight, "started": self._executor is not None}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_cpabe_pool(public_key_file=None):
+    """프로세스 전역 CPABEWorkerPool (최초 호출 시 생성, 워커는 첫 작업 때 시작)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CPABEWorkerPool(public_key_file=public_key_file)
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,148 @@
+import os
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 미리 계산해 두는 암호화 재료의 최대 개수 (0이면 오프라인 사전계산 사용 안 함)
+CPABE_PRECOMPUTE_POOL_SIZE = int(os.getenv("CPABE_PRECOMPUTE_POOL_SIZE", "64"))
+# 정책(또는 정책 무관 기본 재료)마다 쌓아 두는 재료 수
+CPABE_PRECOMPUTE_PER_POLICY = int(os.getenv("CPABE_PRECOMPUTE_PER_POLICY", "4"))
+# 사전계산 대상으로 추적하는 최근 사용 정책 수
+CPABE_PRECOMPUTE_POLICIES = int(os.getenv("CPABE_PRECOMPUTE_POLICIES", "16"))
+
+# 정책과 무관한 기본 재료 (s, h^s, e(g,g)^(alpha*s))의 정책 자리 표시
+BASE_MATERIAL = None
+
+
+class EncryptionMaterialPool:
+    """
+    CP-ABE 오프라인/온라인 암호화용 사전계산 재료 풀 (스레드 안전).
+    - 정책별 재료: 메시지와 무관한 암호문 전체(C, Cy, Cyp)와 마스크 e(g,g)^(alpha*s)
+      → 온라인 암호화는 C_tilde = 마스크 × M 곱셈 한 번
+    - 기본 재료: s, h^s, e(g,g)^(alpha*s) → 처음 보는 정책은 리프별 거듭제곱만 온라인에서 계산
+    - 백그라운드 생산자는 진행 중인 온라인 암호화가 없을 때만 재료를 하나씩 만듦
+    - 재료는 한 번 꺼내면 다시 사용하지 않음 (같은 s 재사용 금지)
+    """
+
+    def __init__(
+        self,
+        produce,
+        size=CPABE_PRECOMPUTE_POOL_SIZE,
+        per_policy=CPABE_PRECOMPUTE_PER_POLICY,
+        policies_max=CPABE_PRECOMPUTE_POLICIES,
+    ):
+        """produce(public_key_file, canonical 또는 BASE_MATERIAL) → 재료 dict"""
+        self.produce = produce
+        self.size = size
+        self.per_policy = per_policy
+        self.policies_max = policies_max
+        self._cond = threading.Condition()
+        self._materials = {}  # (public_key_file, canonical) → deque(재료)
+        self._demand = OrderedDict()  # 최근 사용 순서의 (public_key_file, canonical)
+        self._total = 0
+        self._active = 0
+        self._stats = {"hits": 0, "base_hits": 0, "misses": 0, "produced": 0}
+        self._thread = None
+
+    @contextmanager
+    def online(self):
+        """온라인 암호화 구간. 이 구간 동안 생산자는 새 재료를 만들지 않음"""
+        with self._cond:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def take(self, public_key_file, canonical):
+        """
+        (정책별 재료, 기본 재료) 중 사용할 수 있는 것 하나를 꺼냄. 없으면 (None, None).
+        꺼낸 정책은 다음 사전계산 대상으로 등록
+        """
+        self._start()
+        with self._cond:
+            self._touch((public_key_file, canonical))
+            self._touch((public_key_file, BASE_MATERIAL))
+            material = self._pop((public_key_file, canonical))
+            if material is not None:
+                self._stats["hits"] += 1
+                self._cond.notify_all()
+                return material, None
+            base = self._pop((public_key_file, BASE_MATERIAL))
+            self._stats["base_hits" if base is not None else "misses"] += 1
+            self._cond.notify_all()
+            return None, base
+
+    def discard(self, public_key_file):
+        """공개키가 바뀌었을 때 해당 키로 만든 재료를 모두 버림"""
+        with self._cond:
+            for key in [k for k in self._materials if k[0] == public_key_file]:
+                self._total -= len(self._materials.pop(key))
+
+    def status(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                available=self._total,
+                policies=len(self._demand),
+                size=self.size,
+            )
+
+    def _touch(self, key):
+        self._demand[key] = True
+        self._demand.move_to_end(key)
+        while len(self._demand) > self.policies_max:
+            old, _ = self._demand.popitem(last=False)
+            self._total -= len(self._materials.pop(old, ()))
+
+    def _pop(self, key):
+        queue = self._materials.get(key)
+        if not queue:
+            return None
+        self._total -= 1
+        return queue.popleft()
+
+    def _next_job(self):
+        """재료가 가장 적은 정책 (기본 재료 우선). 풀이 가득 찼으면 None"""
+        if self._total >= self.size:
+            return None
+        best, best_rank = None, None
+        for key in reversed(self._demand):
+            count = len(self._materials.get(key, ()))
+            if count >= self.per_policy:
+                continue
+            # 같은 개수면 모든 정책에 쓰이는 기본 재료를 먼저 채움
+            rank = (count, key[1] is not BASE_MATERIAL)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = key, rank
+        return best
+
+    def _start(self):
+        with self._cond:
+            if self._thread is None and self.size > 0:
+                self._thread = threading.Thread(target=self._run, name="cpabe-precompute", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._active > 0 or self._next_job() is None:
+                    self._cond.wait()
+                key = self._next_job()
+            try:
+                material = self.produce(*key)
+            except Exception as e:
+                logger.warning(f"CP-ABE 암호화 재료 사전계산 실패: {e}")
+                with self._cond:
+                    self._demand.pop(key, None)
+                continue
+            with self._cond:
+                if key in self._demand and self._total < self.size:
+                    self._materials.setdefault(key, deque()).append(material)
+                    self._total += 1
+                    self._stats["produced"] += 1
@@ -0,0 +1,47 @@
+# CP-ABE 바이너리 암호문 형식(crypto/cpabe/codec.py)의 기본 필드 인코딩.
+# 그룹 원소와 무관한 부분만 모아 charm 없이도 사용/검증할 수 있게 함
+# - 정수: unsigned LEB128 varint (7비트씩, 하위 비트부터, 최상위 비트 = 다음 바이트 있음)
+# - 바이트열: varint 길이 + 내용
+
+
+class CiphertextFormatError(ValueError):
+    """암호문 바이트를 해석할 수 없음"""
+
+
+def write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise CiphertextFormatError("암호문이 중간에 끝났습니다.")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            raise CiphertextFormatError("잘못된 길이 필드")
+
+
+def write_bytes(out, raw):
+    write_varint(out, len(raw))
+    out.extend(raw)
+
+
+def read_bytes(data, pos):
+    length, pos = read_varint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise CiphertextFormatError("암호문이 중간에 끝났습니다.")
+    return bytes(data[pos:end]), end
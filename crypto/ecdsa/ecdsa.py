@@ -1,13 +1,18 @@
 import base64
 import json
-from charm.toolbox.pairinggroup import PairingGroup
 from web3 import Web3
 from eth_abi.packed import encode_packed
 from eth_account import Account
 from eth_account.messages import encode_defunct
+from crypto.cpabe.cpabe import CPABE_CURVE, _shared_context
+from crypto.ecdsa.message_codec import MessageCodec
 
-# 전역적으로 PairingGroup 객체 생성
-GLOBAL_GROUP = PairingGroup("SS512")
+# 전역적으로 PairingGroup 객체 생성 (CP-ABE와 같은 곡선/그룹 인스턴스 공유)
+GLOBAL_GROUP = _shared_context(CPABE_CURVE)[0]
+# 페어링 그룹 원소 타입 (직렬화할 때마다 원소를 새로 만들지 않도록 한 번만 확인)
+ELEMENT_TYPE = type(GLOBAL_GROUP.random())
+# 서명 메시지용 결정적 바이너리 코덱
+MESSAGE_CODEC = MessageCodec(GLOBAL_GROUP, ELEMENT_TYPE)
 
 
 class ECDSATools:
@@ -29,7 +34,7 @@ class ECDSATools:
         def encode_custom(obj):
             if isinstance(obj, bytes):
                 return {"__bytes__": base64.b64encode(obj).decode()}
-            elif isinstance(obj, type(GLOBAL_GROUP.random())):  # PairingGroup 요소 변환
+            elif isinstance(obj, ELEMENT_TYPE):  # PairingGroup 요소 변환
                 return {"__element__": base64.b64encode(GLOBAL_GROUP.serialize(obj)).decode()}
             elif isinstance(obj, set):  # set을 list로 변환
                 return list(obj)
@@ -50,7 +55,25 @@ class ECDSATools:
         return json.loads(message_json, object_hook=decode_custom)
 
     @staticmethod
-    def sign_message(message_tuple, private_key_hex):
+    def encode_message(message):
+        """
+        메시지를 결정적 바이너리(CBOR 부분집합)로 직렬화.
+        - 같은 값은 항상 같은 바이트 (맵 키/set 원소 정렬), bytes/set/그룹 원소를 그대로 표현
+        - serialize_message(JSON)보다 작고 빠름. crypto/ecdsa/message_codec.py 참고
+        """
+        return MESSAGE_CODEC.encode(message)
+
+    @staticmethod
+    def decode_message(message_bytes):
+        """encode_message 결과 복원 (tuple은 list로 복원됨)"""
+        return MESSAGE_CODEC.decode(message_bytes)
+
+    @staticmethod
+    def message_hash(message_tuple):
+        """
+        서명 대상 해시: keccak256(encodePacked(uid, ipfsHash, encryptedKey, hashOfUpdate, description, price, version))
+        - encrypted_key는 bytes 그대로 넣음 (문자열이면 UTF-8 bytes로 변환)
+        """
         uid, ipfs_hash, encrypted_key, hash_of_update, description, price, version = message_tuple
 
         # 반드시 encrypted_key는 bytes 그대로 encodePacked에 넣기
@@ -59,9 +82,13 @@ class ECDSATools:
 
         message_bytes = encode_packed(
             ["string", "string", "bytes", "string", "string", "uint256", "string"],
-            [uid, ipfs_hash, encrypted_key, hash_of_update, description, int(price), version],
+            [uid, ipfs_hash, bytes(encrypted_key), hash_of_update, description, int(price), version],
         )
-        message_hash = Web3.keccak(message_bytes)
+        return Web3.keccak(message_bytes)
+
+    @staticmethod
+    def sign_message(message_tuple, private_key_hex):
+        message_hash = ECDSATools.message_hash(message_tuple)
 
         # Ethereum Signed Message prefix 적용
         signable_message = encode_defunct(primitive=message_hash)
@@ -70,19 +97,14 @@ class ECDSATools:
         return signed.signature  # 65바이트 (r, s, v)
 
     @staticmethod
-    def verify_signature(message_tuple, signature, expected_address):
-        """Ethereum 표준 형식(R 32B + S 32B + V 1B) 서명 검증"""
-        uid, ipfs_hash, encrypted_key, hash_of_update, description, price, version = message_tuple
-
-        # Ethereum 메시지 해시 생성
-        message_bytes = encode_packed(
-            ["string", "string", "string", "string", "string", "uint256", "string"],
-            [uid, ipfs_hash, encrypted_key, hash_of_update, description, int(price), version],
-        )
-        message_hash = Web3.keccak(message_bytes)
-        signable_message = encode_defunct(primitive=message_hash)
+    def recover_signer(message_hash, signature):
+        """sign_message로 만든 서명에서 서명자 주소 복원 (message_hash는 message_hash() 결과)"""
+        signable_message = encode_defunct(primitive=bytes(message_hash))
+        return Account.recover_message(signable_message, signature=bytes(signature))
 
+    @staticmethod
+    def verify_signature(message_tuple, signature, expected_address):
+        """Ethereum 표준 형식(R 32B + S 32B + V 1B) 서명 검증 (sign_message와 같은 인코딩 사용)"""
+        recovered = ECDSATools.recover_signer(ECDSATools.message_hash(message_tuple), signature)
         # recover된 주소와 비교
-        recovered = Account.recover_message(signable_message, signature=signature)
-        print("Recovered address:", recovered)
         return recovered.lower() == expected_address.lower()
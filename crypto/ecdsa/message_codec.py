@@ -0,0 +1,260 @@
+import struct
+
+# 결정적(deterministic) 바이너리 메시지 코덱. RFC 8949 CBOR의 부분집합을 사용하고,
+# 같은 값은 항상 같은 바이트가 되도록 core deterministic encoding 규칙을 따름
+# - 정수는 가장 짧은 길이, 2^64 이상/미만 범위는 bignum 태그(2/3)
+# - 실수는 항상 float64
+# - 맵 키는 인코딩된 키 바이트의 사전순
+# - set은 태그 258 + 인코딩된 원소 바이트 사전순 배열
+# - tuple/list는 배열 (디코딩하면 list)
+# - 페어링 그룹 원소는 TAG_ELEMENT + group.serialize() 바이트
+
+TAG_POSITIVE_BIGNUM = 2
+TAG_NEGATIVE_BIGNUM = 3
+TAG_SET = 258
+# 페어링 그룹 원소 (CBOR 미등록 태그 범위)
+TAG_ELEMENT = 40401
+
+_MAJOR_UINT = 0x00
+_MAJOR_NEGINT = 0x20
+_MAJOR_BYTES = 0x40
+_MAJOR_TEXT = 0x60
+_MAJOR_ARRAY = 0x80
+_MAJOR_MAP = 0xA0
+_MAJOR_TAG = 0xC0
+
+_FALSE = b"\xf4"
+_TRUE = b"\xf5"
+_NULL = b"\xf6"
+_FLOAT64 = 0xFB
+
+_pack_b = struct.Struct(">B").pack
+_pack_h = struct.Struct(">H").pack
+_pack_i = struct.Struct(">I").pack
+_pack_q = struct.Struct(">Q").pack
+_unpack_h = struct.Struct(">H").unpack_from
+_unpack_i = struct.Struct(">I").unpack_from
+_unpack_q = struct.Struct(">Q").unpack_from
+_pack_d = struct.Struct(">d").pack
+_unpack_d = struct.Struct(">d").unpack_from
+
+
+class MessageCodecError(ValueError):
+    """메시지를 인코딩/디코딩할 수 없음"""
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _head(out, major, value):
+    if value < 24:
+        out.append(major | value)
+    elif value < 0x100:
+        out.append(major | 24)
+        out += _pack_b(value)
+    elif value < 0x10000:
+        out.append(major | 25)
+        out += _pack_h(value)
+    elif value < 0x100000000:
+        out.append(major | 26)
+        out += _pack_i(value)
+    else:
+        out.append(major | 27)
+        out += _pack_q(value)
+
+
+class MessageCodec:
+    """
+    서명 대상 메시지용 결정적 바이너리 코덱.
+    - element_type/group: 페어링 그룹 원소 타입과 직렬화에 쓸 그룹 (생성 시 한 번만 확인)
+    """
+
+    def __init__(self, group=None, element_type=None):
+        self.group = group
+        self.element_type = element_type
+
+    def encode(self, value):
+        out = bytearray()
+        self._encode(value, out)
+        return bytes(out)
+
+    def decode(self, data):
+        data = memoryview(data)
+        value, pos = self._decode(data, 0)
+        if pos != len(data):
+            raise MessageCodecError("메시지 끝에 해석되지 않은 바이트가 있습니다.")
+        return value
+
+    # ---- 인코딩 ----
+
+    def _encode(self, value, out):
+        # 자주 나오는 타입부터 확인 (bool은 int의 하위 타입이므로 int보다 먼저)
+        kind = type(value)
+        if kind is str:
+            raw = value.encode("utf-8")
+            _head(out, _MAJOR_TEXT, len(raw))
+            out += raw
+        elif kind is bytes or kind is bytearray or kind is memoryview:
+            _head(out, _MAJOR_BYTES, len(value))
+            out += value
+        elif kind is bool:
+            out += _TRUE if value else _FALSE
+        elif kind is int:
+            self._encode_int(value, out)
+        elif value is None:
+            out += _NULL
+        elif kind is list or kind is tuple:
+            _head(out, _MAJOR_ARRAY, len(value))
+            for item in value:
+                self._encode(item, out)
+        elif kind is dict:
+            self._encode_map(value, out)
+        elif kind is set or kind is frozenset:
+            _head(out, _MAJOR_TAG, TAG_SET)
+            items = sorted(self.encode(item) for item in value)
+            _head(out, _MAJOR_ARRAY, len(items))
+            for item in items:
+                out += item
+        elif kind is float:
+            out.append(_FLOAT64)
+            out += _pack_d(value)
+        elif self.element_type is not None and kind is self.element_type:
+            raw = self.group.serialize(value)
+            _head(out, _MAJOR_TAG, TAG_ELEMENT)
+            _head(out, _MAJOR_BYTES, len(raw))
+            out += raw
+        elif isinstance(value, int):
+            self._encode_int(int(value), out)
+        elif isinstance(value, (bytes, bytearray)):
+            self._encode(bytes(value), out)
+        elif isinstance(value, str):
+            self._encode(str(value), out)
+        else:
+            raise MessageCodecError(f"인코딩할 수 없는 타입: {kind.__name__}")
+
+    def _encode_int(self, value, out):
+        if value >= 0:
+            if value < 0x10000000000000000:
+                _head(out, _MAJOR_UINT, value)
+                return
+            tag, magnitude = TAG_POSITIVE_BIGNUM, value
+        else:
+            if -1 - value < 0x10000000000000000:
+                _head(out, _MAJOR_NEGINT, -1 - value)
+                return
+            tag, magnitude = TAG_NEGATIVE_BIGNUM, -1 - value
+        raw = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, "big")
+        _head(out, _MAJOR_TAG, tag)
+        _head(out, _MAJOR_BYTES, len(raw))
+        out += raw
+
+    def _encode_map(self, value, out):
+        _head(out, _MAJOR_MAP, len(value))
+        if all(type(k) is str for k in value):
+            # 문자열 키만 있으면 (길이, 바이트) 정렬이 인코딩 바이트 사전순과 같음
+            keys = [(k.encode("utf-8"), k) for k in value]
+            for raw, key in sorted(keys, key=lambda item: (len(item[0]), item[0])):
+                _head(out, _MAJOR_TEXT, len(raw))
+                out += raw
+                self._encode(value[key], out)
+            return
+        for raw, key in sorted((self.encode(k), k) for k in value):
+            out += raw
+            self._encode(value[key], out)
+
+    # ---- 디코딩 ----
+
+    def _read_head(self, data, pos):
+        if pos >= len(data):
+            raise MessageCodecError("메시지가 중간에 끝났습니다.")
+        initial = data[pos]
+        major, info = initial & 0xE0, initial & 0x1F
+        pos += 1
+        if info < 24:
+            return major, info, pos
+        try:
+            if info == 24:
+                return major, data[pos], pos + 1
+            if info == 25:
+                return major, _unpack_h(data, pos)[0], pos + 2
+            if info == 26:
+                return major, _unpack_i(data, pos)[0], pos + 4
+            if info == 27:
+                return major, _unpack_q(data, pos)[0], pos + 8
+        except (IndexError, struct.error):
+            raise MessageCodecError("메시지가 중간에 끝났습니다.")
+        raise MessageCodecError(f"지원하지 않는 길이 형식: {info}")
+
+    def _read_raw(self, data, pos, length):
+        end = pos + length
+        if end > len(data):
+            raise MessageCodecError("메시지가 중간에 끝났습니다.")
+        return data[pos:end], end
+
+    def _decode(self, data, pos):
+        if pos < len(data):
+            initial = data[pos]
+            if initial == 0xF4:
+                return False, pos + 1
+            if initial == 0xF5:
+                return True, pos + 1
+            if initial == 0xF6:
+                return None, pos + 1
+            if initial == _FLOAT64:
+                raw, end = self._read_raw(data, pos + 1, 8)
+                return _unpack_d(raw)[0], end
+
+        major, value, pos = self._read_head(data, pos)
+        if major == _MAJOR_UINT:
+            return value, pos
+        if major == _MAJOR_NEGINT:
+            return -1 - value, pos
+        if major == _MAJOR_BYTES:
+            raw, pos = self._read_raw(data, pos, value)
+            return raw.tobytes(), pos
+        if major == _MAJOR_TEXT:
+            raw, pos = self._read_raw(data, pos, value)
+            try:
+                return str(raw, "utf-8"), pos
+            except UnicodeDecodeError:
+                raise MessageCodecError("문자열이 올바른 UTF-8이 아닙니다.")
+        if major == _MAJOR_ARRAY:
+            items = []
+            for _ in range(value):
+                item, pos = self._decode(data, pos)
+                items.append(item)
+            return items, pos
+        if major == _MAJOR_MAP:
+            result = {}
+            for _ in range(value):
+                key, pos = self._decode(data, pos)
+                if not _hashable(key):
+                    raise MessageCodecError(f"맵 키로 사용할 수 없는 타입: {type(key).__name__}")
+                result[key], pos = self._decode(data, pos)
+            return result, pos
+        if major == _MAJOR_TAG:
+            inner, pos = self._decode(data, pos)
+            if value == TAG_SET:
+                if type(inner) is not list or not all(_hashable(item) for item in inner):
+                    raise MessageCodecError("set 태그에는 해시 가능한 원소의 배열이 와야 합니다.")
+                return set(inner), pos
+            if value in (TAG_POSITIVE_BIGNUM, TAG_NEGATIVE_BIGNUM, TAG_ELEMENT) and type(inner) is not bytes:
+                raise MessageCodecError(f"태그 {value}에는 바이트 문자열이 와야 합니다.")
+            if value == TAG_POSITIVE_BIGNUM:
+                return int.from_bytes(inner, "big"), pos
+            if value == TAG_NEGATIVE_BIGNUM:
+                return -1 - int.from_bytes(inner, "big"), pos
+            if value == TAG_ELEMENT:
+                if self.group is None:
+                    raise MessageCodecError("그룹 원소를 복원할 PairingGroup이 없습니다.")
+                try:
+                    return self.group.deserialize(inner), pos
+                except Exception as e:
+                    raise MessageCodecError(f"그룹 원소를 복원할 수 없습니다: {e}")
+            raise MessageCodecError(f"지원하지 않는 태그: {value}")
+        raise MessageCodecError(f"지원하지 않는 타입: {major >> 5}")
@@ -1,5 +1,6 @@
 import hashlib
 import logging
+from crypto.hash.merkle import MerkleHasher, MERKLE_CHUNK_SIZE, MERKLE_HASH_WORKERS
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -16,7 +17,6 @@ class HashTools:
             with open(file_path, "rb") as f:
                 chunk = f.read(chunk_size)
                 while chunk:
-                    print(f"Chunk Read ({len(chunk)} bytes): {chunk[:10]}...")  # 로그 추가
                     hash_obj.update(chunk)
                     chunk = f.read(chunk_size)
 
@@ -24,3 +24,22 @@ class HashTools:
         except Exception as e:
             logger.error(f"파일 SHA3 해시 계산 중 오류: {e}")
             return None
+
+    @staticmethod
+    def merkle_hash_file(file_path, chunk_size=MERKLE_CHUNK_SIZE, workers=MERKLE_HASH_WORKERS):
+        """
+        파일을 chunk_size 청크로 나눠 병렬로 해시하고 SHA3-256 머클 루트 계산
+        :return: (루트 hex, 매니페스트 dict), 실패 시 (None, None)
+        """
+        try:
+            hasher = MerkleHasher(chunk_size, workers)
+            with open(file_path, "rb") as f:
+                chunk = f.read(chunk_size)
+                while chunk:
+                    hasher.update(chunk)
+                    chunk = f.read(chunk_size)
+
+            return hasher.hexdigest(), hasher.manifest()
+        except Exception as e:
+            logger.error(f"파일 머클 해시 계산 중 오류: {e}")
+            return None, None
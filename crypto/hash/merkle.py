@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 업데이트 무결성 해시 방식: "sha3"   = 암호문 전체에 대한 SHA3-256 (기존 방식)
+#                           "merkle" = 고정 크기 청크의 SHA3-256 머클 루트 + 매니페스트
+UPDATE_HASH_MODE = os.getenv("UPDATE_HASH_MODE", "sha3").lower()
+# 머클 리프 하나가 덮는 암호문 크기 (디바이스가 검증/재개하는 단위)
+MERKLE_CHUNK_SIZE = int(os.getenv("MERKLE_CHUNK_SIZE", str(1024 * 1024)))
+# 청크 해시를 병렬로 계산하는 스레드 수 (hashlib은 큰 입력을 해시하는 동안 GIL을 놓음)
+MERKLE_HASH_WORKERS = int(os.getenv("MERKLE_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+MANIFEST_VERSION = 1
+MANIFEST_ALGORITHM = "sha3-256-merkle"
+# IPFS 디렉토리 안에 암호문과 함께 올리는 매니페스트 파일명 접미사
+MANIFEST_SUFFIX = ".manifest.json"
+
+# 리프와 내부 노드의 도메인 분리 (RFC 6962와 같은 방식, 리프/노드 해시 혼동 방지)
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ManifestError(ValueError):
+    """매니페스트 형식이 잘못되었거나 루트/청크 해시가 일치하지 않음"""
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, MERKLE_HASH_WORKERS), thread_name_prefix="merkle-hash")
+        return _executor
+
+
+def leaf_hash(chunk):
+    return hashlib.sha3_256(_LEAF_PREFIX + chunk).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha3_256(_NODE_PREFIX + left + right).digest()
+
+
+def merkle_root(leaves):
+    """
+    리프 해시 목록의 머클 루트.
+    - 짝이 없는 마지막 노드는 복제하지 않고 그대로 윗단으로 올림 (복제 방식의 루트 충돌 방지)
+    - 빈 파일은 빈 청크 하나로 취급
+    """
+    level = list(leaves) or [leaf_hash(b"")]
+    while len(level) > 1:
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+class MerkleHasher:
+    """
+    hashlib 객체처럼 update()/hexdigest()로 쓰는 청크 머클 해시 계산기.
+    - update()로 들어온 바이트를 chunk_size 단위로 잘라 스레드 풀에서 리프 해시를 계산
+    - 대기 중인 청크는 workers의 두 배까지만 보관 (메모리 사용량은 파일 크기와 무관)
+    - hexdigest()를 처음 호출하면 남은 조각을 마지막 청크로 확정하고 이후 update()는 거부
+    """
+
+    def __init__(self, chunk_size=MERKLE_CHUNK_SIZE, workers=MERKLE_HASH_WORKERS):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size는 0보다 커야 합니다.")
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._max_pending = max(1, workers) * 2
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._leaves = []
+        self._root = None
+
+    def update(self, data):
+        if self._root is not None:
+            raise ValueError("이미 확정된 머클 해시입니다.")
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._submit(bytes(self._buffer[: self.chunk_size]))
+            del self._buffer[: self.chunk_size]
+
+    def _submit(self, chunk):
+        while len(self._pending) >= self._max_pending:
+            self._leaves.append(self._pending.popleft().result())
+        self._pending.append(_get_executor().submit(leaf_hash, chunk))
+
+    def _finalize(self):
+        if self._root is None:
+            if self._buffer or not (self._pending or self._leaves):
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._leaves.append(self._pending.popleft().result())
+            self._root = merkle_root(self._leaves)
+        return self._root
+
+    def digest(self):
+        return self._finalize()
+
+    def hexdigest(self):
+        return self._finalize().hex()
+
+    @property
+    def leaves(self):
+        self._finalize()
+        return list(self._leaves)
+
+    def manifest(self):
+        """디바이스가 청크 단위로 검증/재개할 때 쓰는 매니페스트 dict"""
+        return build_manifest(self.leaves, self.chunk_size, self.size)
+
+
+def build_manifest(leaves, chunk_size, size):
+    return {
+        "version": MANIFEST_VERSION,
+        "algorithm": MANIFEST_ALGORITHM,
+        "chunk_size": chunk_size,
+        "size": size,
+        "root": merkle_root(leaves).hex(),
+        "chunks": [leaf.hex() for leaf in leaves],
+    }
+
+
+def encode_manifest(manifest):
+    """매니페스트 JSON 바이트 (키 정렬, 공백 없음 → 같은 매니페스트는 같은 바이트)"""
+    return json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode()
+
+
+def load_manifest(data, expected_root=None):
+    """
+    매니페스트를 읽고 청크 해시 목록으로 루트를 다시 계산해 검증.
+    - expected_root: 온체인 hash_of_update (주어지면 일치해야 함)
+    :return: (매니페스트 dict, 리프 해시 bytes 목록)
+    """
+    try:
+        manifest = json.loads(data)
+        if manifest.get("algorithm") != MANIFEST_ALGORITHM:
+            raise ManifestError(f"지원하지 않는 매니페스트 알고리즘: {manifest.get('algorithm')}")
+        chunk_size, size = int(manifest["chunk_size"]), int(manifest["size"])
+        leaves = [bytes.fromhex(leaf) for leaf in manifest["chunks"]]
+    except (ValueError, KeyError, TypeError) as e:
+        if isinstance(e, ManifestError):
+            raise
+        raise ManifestError(f"매니페스트 형식 오류: {e}")
+
+    if chunk_size <= 0 or len(leaves) != max(1, -(-size // chunk_size)):
+        raise ManifestError("청크 개수가 파일 크기와 맞지 않습니다.")
+    root = merkle_root(leaves).hex()
+    if root != manifest.get("root") or (expected_root is not None and root != expected_root.lower()):
+        raise ManifestError("매니페스트의 머클 루트가 일치하지 않습니다.")
+    return manifest, leaves
+
+
+def verify_chunk(leaves, index, chunk):
+    """index번째 청크가 매니페스트의 리프 해시와 일치하는지 확인"""
+    return 0 <= index < len(leaves) and leaf_hash(chunk) == leaves[index]
+
+
+def new_update_hasher(mode=None):
+    """UPDATE_HASH_MODE에 맞는 암호문 해시 객체 (sha3: hashlib, merkle: MerkleHasher)"""
+    if (mode or UPDATE_HASH_MODE) == "merkle":
+        return MerkleHasher()
+    return hashlib.sha3_256()
+
+
+def manifest_bytes(hash_obj):
+    """해시 객체가 MerkleHasher면 인코딩된 매니페스트, 아니면 None"""
+    if isinstance(hash_obj, MerkleHasher):
+        return encode_manifest(hash_obj.manifest())
+    return None
@@ -0,0 +1,95 @@
+import os
+import lzma
+import logging
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성: 없으면 zstd 대신 압축 없이 진행
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# AES 암호화 전에 평문을 압축하는 코덱: "none" / "zstd" / "lzma"
+UPDATE_COMPRESSION = os.getenv("UPDATE_COMPRESSION", "none").lower()
+# 압축 레벨 (비우면 코덱 기본값: zstd 9, lzma 6)
+UPDATE_COMPRESSION_LEVEL = os.getenv("UPDATE_COMPRESSION_LEVEL", "")
+
+CODEC_NONE = "none"
+CODEC_ZSTD = "zstd"
+CODEC_LZMA = "lzma"
+SUPPORTED_CODECS = (CODEC_NONE, CODEC_ZSTD, CODEC_LZMA)
+DEFAULT_LEVELS = {CODEC_ZSTD: 9, CODEC_LZMA: 6}
+LEVEL_RANGES = {CODEC_ZSTD: (1, 22), CODEC_LZMA: (0, 9)}
+
+
+class CompressionError(ValueError):
+    """지원하지 않는 코덱/레벨이거나 코덱 라이브러리를 사용할 수 없음"""
+
+
+def resolve_compression(codec, level=None):
+    """
+    (코덱, 레벨) 검증 후 정규화. 압축하지 않으면 (CODEC_NONE, None).
+    - level이 None이면 코덱 기본 레벨
+    """
+    codec = (codec or CODEC_NONE).lower()
+    if codec not in SUPPORTED_CODECS:
+        raise CompressionError(f"지원하지 않는 압축 코덱: {codec} (지원: {', '.join(SUPPORTED_CODECS)})")
+    if codec == CODEC_NONE:
+        return CODEC_NONE, None
+    if codec == CODEC_ZSTD and zstandard is None:
+        raise CompressionError("zstd 압축에는 zstandard 패키지가 필요합니다.")
+    level = DEFAULT_LEVELS[codec] if level is None else int(level)
+    low, high = LEVEL_RANGES[codec]
+    if not low <= level <= high:
+        raise CompressionError(f"{codec} 압축 레벨은 {low}~{high} 사이여야 합니다: {level}")
+    return codec, level
+
+
+_configured = None
+
+
+def configured_compression():
+    """
+    UPDATE_COMPRESSION / UPDATE_COMPRESSION_LEVEL 설정 (최초 호출 시 한 번 검증).
+    - 설정이 잘못되었거나 코덱 라이브러리가 없으면 경고 후 압축하지 않음
+    """
+    global _configured
+    if _configured is None:
+        try:
+            _configured = resolve_compression(UPDATE_COMPRESSION, UPDATE_COMPRESSION_LEVEL or None)
+        except (CompressionError, ValueError) as e:
+            logger.warning(f"압축 설정을 사용할 수 없어 압축 없이 진행합니다: {e}")
+            _configured = (CODEC_NONE, None)
+    return _configured
+
+
+def new_compressor(codec, level):
+    """compress(data)/flush()를 지원하는 스트리밍 압축기 (CODEC_NONE이면 None)"""
+    if codec == CODEC_NONE:
+        return None
+    if codec == CODEC_ZSTD:
+        # 프레임 헤더에 원본 크기를 알 수 없으므로 체크섬만 기록
+        return zstandard.ZstdCompressor(level=level, write_checksum=True).compressobj()
+    if codec == CODEC_LZMA:
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ, check=lzma.CHECK_CRC64, preset=level)
+    raise CompressionError(f"지원하지 않는 압축 코덱: {codec}")
+
+
+def new_decompressor(codec):
+    """decompress(data)를 지원하는 스트리밍 해제기 (디바이스 측 복원/검증용, CODEC_NONE이면 None)"""
+    if codec == CODEC_NONE:
+        return None
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise CompressionError("zstd 해제에는 zstandard 패키지가 필요합니다.")
+        return zstandard.ZstdDecompressor().decompressobj()
+    if codec == CODEC_LZMA:
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    raise CompressionError(f"지원하지 않는 압축 코덱: {codec}")
+
+
+def compression_metadata(codec, level):
+    """update.json에 기록하는 압축 정보 (압축하지 않으면 None)"""
+    if codec == CODEC_NONE:
+        return None
+    return {"codec": codec, "level": level}
@@ -1,4 +1,5 @@
 import os
+import hashlib
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 from charm.toolbox.pairinggroup import GT  # GT 직접 가져오기
@@ -9,6 +10,9 @@ from charm.core.engine.util import objectToBytes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 스트리밍 암호화 시 원본에서 한 번에 읽는 크기 (블록 경계에 맞지 않는 나머지는 StreamingEncryptor가 보관하므로 임의 크기 가능)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 class SymmetricCrypto:
     """대칭키 암호화/복호화를 위한 클래스"""
 
@@ -20,10 +24,15 @@ class SymmetricCrypto:
 
         kbj_bytes = group.serialize(kbj)
         # aes_key = kbj_bytes[:32]  # AES 256-bit (32바이트) 키 생성
-        aes_key = sha256(objectToBytes(kbj, group)).digest()[:32]
+        aes_key = SymmetricCrypto.derive_key(kbj, group)
 
         return kbj, aes_key
 
+    @staticmethod
+    def derive_key(kbj, group):
+        """GT 원소 kbj → AES-256 키 (generate_key와 같은 유도 방식)"""
+        return sha256(objectToBytes(kbj, group)).digest()[:32]
+
     @staticmethod
     def encrypt_file(file_path, key):
         """파일을 대칭키로 AES CBC 모드로 암호화"""
@@ -42,4 +51,96 @@ class SymmetricCrypto:
         with open(encrypted_file_path, "wb") as file:
             file.write(iv + encrypted_data)  # IV + 암호문 저장
 
-        return encrypted_file_path
\ No newline at end of file
+        return encrypted_file_path
+
+    @staticmethod
+    def encrypt_stream(src, dst, key, hash_obj=None, chunk_size=STREAM_CHUNK_SIZE, compressor=None):
+        """
+        입력 스트림을 고정 크기 청크 단위로 AES CBC 암호화하여 출력 스트림에 기록.
+        - 출력 형식은 encrypt_file과 동일 (IV + PKCS7 패딩된 암호문)
+        - hash_obj가 주어지면 출력에 기록되는 바이트를 그대로 해시에 반영
+        - compressor가 주어지면 평문을 압축한 뒤 암호화
+        - 메모리 사용량은 chunk_size에 비례하며 파일 크기와 무관
+        :return: 기록한 암호문 총 바이트 수
+        """
+        encryptor = StreamingEncryptor(key, dst, hash_obj, compressor)
+        chunk = src.read(chunk_size)
+        while chunk:
+            encryptor.update(chunk)
+            chunk = src.read(chunk_size)
+        return encryptor.finalize()
+
+    @staticmethod
+    def encrypt_file_with_hash(file_path, key, chunk_size=STREAM_CHUNK_SIZE, hash_obj=None, compressor=None):
+        """
+        파일을 한 번만 읽고 한 번만 쓰면서 암호화와 SHA3-256 해시를 동시에 수행.
+        - encrypt_file + HashTools.sha3_hash_file 조합과 동일한 결과를 반환
+        - hash_obj: 기본 SHA3-256 대신 사용할 해시 객체 (MerkleHasher 등)
+        - compressor: 암호화 전에 적용할 스트리밍 압축기 (crypto.symmetric.compression.new_compressor)
+        :return: (암호화 파일 경로, 암호문 해시 hex digest)
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
+
+        if hash_obj is None:
+            hash_obj = hashlib.sha3_256()
+        encrypted_file_path = f"{file_path}.enc"
+        with open(file_path, "rb") as src, open(encrypted_file_path, "wb") as dst:
+            SymmetricCrypto.encrypt_stream(src, dst, key, hash_obj, chunk_size, compressor)
+
+        return encrypted_file_path, hash_obj.hexdigest()
+
+
+class StreamingEncryptor:
+    """
+    평문을 임의 크기 조각으로 받아 AES CBC 암호문을 출력 스트림에 점진적으로 기록하는 클래스.
+    - 블록 경계에 맞지 않는 나머지(최대 15바이트)만 내부에 보관
+    - finalize() 시 PKCS7 패딩을 적용하여 encrypt_file과 동일한 형식을 완성
+    - compressor가 주어지면 평문을 스트리밍 압축한 결과를 암호화 (finalize 시 압축기 flush)
+    """
+
+    def __init__(self, key, dst, hash_obj=None, compressor=None):
+        self.dst = dst
+        self.hash_obj = hash_obj
+        self.compressor = compressor
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self._buffer = b""
+        self._finalized = False
+
+        iv = os.urandom(16)  # AES 블록 크기 (16바이트 IV)
+        self._cipher = AES.new(key, AES.MODE_CBC, iv)
+        self._emit(iv)
+
+    def _emit(self, data):
+        self.dst.write(data)
+        if self.hash_obj is not None:
+            self.hash_obj.update(data)
+        self.bytes_written += len(data)
+
+    def update(self, data):
+        """평문 조각을 암호화하여 기록 (블록 단위로 나누어 떨어지는 부분만)"""
+        if self._finalized:
+            raise ValueError("이미 finalize된 암호화 스트림입니다.")
+        self.bytes_in += len(data)
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self._encrypt_blocks(data)
+
+    def _encrypt_blocks(self, data):
+        if self._buffer:
+            data = self._buffer + data
+        cut = len(data) - len(data) % AES.block_size
+        if cut:
+            self._emit(self._cipher.encrypt(data[:cut]))
+        self._buffer = data[cut:]
+
+    def finalize(self):
+        """남은 평문에 패딩을 적용해 마지막 블록을 기록하고 총 암호문 크기를 반환"""
+        if not self._finalized:
+            if self.compressor is not None:
+                self._encrypt_blocks(self.compressor.flush())
+            self._emit(self._cipher.encrypt(pad(self._buffer, AES.block_size)))
+            self._buffer = b""
+            self._finalized = True
+        return self.bytes_written
@@ -0,0 +1,151 @@
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+import ipfshttpclient
+from dotenv import load_dotenv
+
+# 환경변수 로드
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 동시에 열어둘 수 있는 keep-alive 세션 수
+POOL_MAX_SIZE = int(os.getenv("IPFS_POOL_SIZE", "4"))
+# 헬스 체크 주기(초)
+HEALTH_INTERVAL = float(os.getenv("IPFS_HEALTH_INTERVAL", "10"))
+# 모든 세션이 사용 중일 때 빈 세션을 기다리는 최대 시간(초)
+ACQUIRE_TIMEOUT = float(os.getenv("IPFS_POOL_ACQUIRE_TIMEOUT", "30"))
+
+
+class IPFSUnavailableError(ConnectionError):
+    """헬스 체크 결과 IPFS 노드가 응답하지 않는 상태"""
+
+
+class IPFSClientPool:
+    """
+    프로세스 전역에서 공유하는 ipfshttpclient keep-alive 세션 풀 (스레드 안전).
+    - 세션은 필요할 때 생성하고(버전 핸드셰이크는 세션당 1회), 사용 후 반납해 재사용
+    - 백그라운드 헬스 체크가 노드 상태를 주기적으로 확인
+    - 노드가 다운된 동안에는 연결을 시도하지 않고 즉시 IPFSUnavailableError 발생
+    """
+
+    def __init__(self, ipfs_api=None, max_size=POOL_MAX_SIZE, health_interval=HEALTH_INTERVAL):
+        if ipfs_api is None:
+            ipfs_api = os.getenv("IPFS_API_URL", "/ip4/127.0.0.1/tcp/5001")
+        self.ipfs_api = ipfs_api
+        self.health_interval = health_interval
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._wakeup = threading.Event()
+        self.healthy = True
+        self.last_error = None
+        self.last_check = None
+
+        # 최초 상태를 바로 확인한 뒤 주기적으로 갱신
+        self.check_health()
+        self._monitor = threading.Thread(target=self._health_loop, name="ipfs-health", daemon=True)
+        self._monitor.start()
+
+    def _connect(self):
+        client = ipfshttpclient.connect(self.ipfs_api, session=True)
+        logger.info(f"IPFS 세션 생성: {self.ipfs_api}")
+        return client
+
+    @contextmanager
+    def client(self):
+        """
+        풀에서 세션 하나를 빌려 사용 (with 블록 종료 시 반납).
+        - 블록 안에서 연결 오류가 나면 해당 세션은 폐기되고 즉시 헬스 체크를 다시 실행
+        """
+        if not self.healthy:
+            raise IPFSUnavailableError(f"IPFS 노드에 연결할 수 없습니다: {self.last_error}")
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise TimeoutError("사용 가능한 IPFS 세션이 없습니다.")
+
+        client = None
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = self._connect()
+            yield client
+        except (ipfshttpclient.exceptions.ConnectionError, ipfshttpclient.exceptions.TimeoutError) as e:
+            self._discard(client)
+            client = None
+            self.healthy = False
+            self.last_error = str(e)
+            self._wakeup.set()
+            raise
+        finally:
+            # 응답 오류 등 연결 외 예외는 세션 자체의 문제가 아니므로 재사용
+            if client is not None:
+                self._idle.put(client)
+            self._slots.release()
+
+    def _discard(self, client):
+        if client is None:
+            return
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def check_health(self):
+        """노드 상태 확인. 실패 시 유휴 세션을 모두 닫아 다음 사용 시 새로 연결되게 함"""
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = self._connect()
+            try:
+                client.version()
+            except Exception:
+                self._discard(client)
+                raise
+            self._idle.put(client)
+            if not self.healthy:
+                logger.info(f"IPFS 노드 복구 확인: {self.ipfs_api}")
+            self.healthy = True
+            self.last_error = None
+        except Exception as e:
+            if self.healthy:
+                logger.error(f"IPFS 헬스 체크 실패: {e}")
+            self.healthy = False
+            self.last_error = str(e)
+            while True:
+                try:
+                    self._discard(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        self.last_check = time.time()
+        return self.healthy
+
+    def _health_loop(self):
+        while True:
+            self._wakeup.wait(self.health_interval)
+            self._wakeup.clear()
+            self.check_health()
+
+    def status(self):
+        return {
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "last_check": self.last_check,
+            "idle_sessions": self._idle.qsize(),
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ipfs_pool():
+    """프로세스 전역 IPFSClientPool (최초 호출 시 생성)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = IPFSClientPool()
+        return _pool
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from dotenv import load_dotenv
+
+# 환경변수 로드
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 동시에 실행할 DHT provide 요청 수
+PROVIDE_CONCURRENCY = int(os.getenv("IPFS_PROVIDE_CONCURRENCY", "4"))
+# CID당 최대 시도 횟수
+PROVIDE_MAX_ATTEMPTS = int(os.getenv("IPFS_PROVIDE_MAX_ATTEMPTS", "5"))
+# 재시도 기본 대기 시간(초). 시도마다 2배씩 증가
+PROVIDE_RETRY_BASE_DELAY = float(os.getenv("IPFS_PROVIDE_RETRY_DELAY", "5"))
+# provide 요청 하나의 최대 대기 시간(초). DHT 공지는 수십 초가 걸릴 수 있음
+PROVIDE_TIMEOUT = float(os.getenv("IPFS_PROVIDE_TIMEOUT", "120"))
+# 상태 조회용으로 보관하는 CID 수 (초과 시 오래된 완료 항목부터 제거)
+PROVIDE_STATUS_MAX = 10000
+
+PROVIDE_QUEUED = "queued"
+PROVIDE_RUNNING = "providing"
+PROVIDE_RETRYING = "retrying"
+PROVIDE_DONE = "provided"
+PROVIDE_FAILED = "failed"
+
+
+def api_url_from_multiaddr(addr):
+    """
+    ipfshttpclient 형식의 multiaddr를 HTTP API 기본 URL로 변환
+    - /dns/ipfs/tcp/5001/http   → http://ipfs:5001
+    - /ip4/127.0.0.1/tcp/5001   → http://127.0.0.1:5001
+    - http://host:5001 형식은 그대로 사용
+    """
+    if addr.startswith(("http://", "https://")):
+        return addr.rstrip("/")
+
+    parts = [p for p in addr.split("/") if p]
+    host, port, scheme = None, "5001", "http"
+    for proto, value in zip(parts[0::2], parts[1::2]):
+        if proto in ("ip4", "dns", "dns4", "dns6"):
+            host = value
+        elif proto == "ip6":
+            host = f"[{value}]"
+        elif proto == "tcp":
+            port = value
+    if parts and parts[-1] in ("http", "https"):
+        scheme = parts[-1]
+    if host is None:
+        raise ValueError(f"지원하지 않는 IPFS API 주소 형식입니다: {addr}")
+    return f"{scheme}://{host}:{port}"
+
+
+class DHTProvider:
+    """
+    IPFS 노드 HTTP API(/api/v0/routing/provide)로 CID를 DHT에 공지하는 백그라운드 큐.
+    - 같은 CID가 대기/실행 중이면 중복 요청을 하나로 합침
+    - 최대 PROVIDE_CONCURRENCY개까지 동시에 실행
+    - 실패 시 지수 백오프로 재시도하며 CID별 상태를 조회할 수 있음
+    """
+
+    def __init__(self, ipfs_api=None, concurrency=PROVIDE_CONCURRENCY):
+        if ipfs_api is None:
+            ipfs_api = os.getenv("IPFS_API_URL", "/ip4/127.0.0.1/tcp/5001")
+        self.base_url = api_url_from_multiaddr(ipfs_api)
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dht-provide")
+        self._slots = threading.Semaphore(concurrency)
+        self._cond = threading.Condition()
+        self._schedule = []  # (실행 시각, 순번, cid) 최소 힙
+        self._seq = 0
+        self._active = set()  # 대기 또는 실행 중인 CID (중복 합치기용)
+        self._status = {}
+        # kubo 0.18 미만은 /dht/provide만 지원
+        self._endpoint = "routing/provide"
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="dht-provide-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def enqueue(self, cid):
+        """CID를 provide 대기열에 추가 (이미 대기/실행 중이면 합쳐짐)"""
+        with self._cond:
+            if cid in self._active:
+                return self._status[cid]["status"]
+            self._active.add(cid)
+            self._prune_status()
+            self._status.pop(cid, None)
+            self._status[cid] = {
+                "cid": cid,
+                "status": PROVIDE_QUEUED,
+                "attempts": 0,
+                "last_error": None,
+                "updated_at": time.time(),
+            }
+            self._push(cid, time.time())
+            return PROVIDE_QUEUED
+
+    def status(self, cid):
+        """CID의 provide 상태 반환 (요청된 적 없으면 None)"""
+        with self._cond:
+            entry = self._status.get(cid)
+            return dict(entry) if entry else None
+
+    def _prune_status(self):
+        # dict는 삽입 순서를 유지하므로 앞쪽이 가장 오래된 항목
+        excess = len(self._status) - PROVIDE_STATUS_MAX
+        if excess <= 0:
+            return
+        for cid in [c for c in self._status if c not in self._active][:excess]:
+            del self._status[cid]
+
+    def _push(self, cid, run_at):
+        self._seq += 1
+        heapq.heappush(self._schedule, (run_at, self._seq, cid))
+        self._cond.notify()
+
+    def _set(self, cid, **fields):
+        with self._cond:
+            entry = self._status[cid]
+            entry.update(fields)
+            entry["updated_at"] = time.time()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._schedule or self._schedule[0][0] > time.time():
+                    timeout = self._schedule[0][0] - time.time() if self._schedule else None
+                    self._cond.wait(timeout)
+                _, _, cid = heapq.heappop(self._schedule)
+            # 동시 실행 수 제한: 슬롯이 빌 때까지 다음 CID를 꺼내지 않음
+            self._slots.acquire()
+            self._executor.submit(self._provide, cid)
+
+    def _provide(self, cid):
+        try:
+            with self._cond:
+                attempts = self._status[cid]["attempts"] + 1
+            self._set(cid, status=PROVIDE_RUNNING, attempts=attempts)
+            try:
+                self._call_provide(cid)
+            except Exception as e:
+                if attempts >= PROVIDE_MAX_ATTEMPTS:
+                    logger.error(f"DHT provide 최종 실패: {cid} ({attempts}회) - {e}")
+                    self._set(cid, status=PROVIDE_FAILED, last_error=str(e))
+                    with self._cond:
+                        self._active.discard(cid)
+                    return
+                delay = PROVIDE_RETRY_BASE_DELAY * (2 ** (attempts - 1))
+                logger.warning(f"DHT provide 실패, {delay:.0f}초 후 재시도: {cid} - {e}")
+                self._set(cid, status=PROVIDE_RETRYING, last_error=str(e))
+                with self._cond:
+                    self._push(cid, time.time() + delay)
+                return
+
+            logger.info(f"DHT provide 완료: {cid}")
+            self._set(cid, status=PROVIDE_DONE, last_error=None)
+            with self._cond:
+                self._active.discard(cid)
+        finally:
+            self._slots.release()
+
+    def _call_provide(self, cid):
+        url = f"{self.base_url}/api/v0/{self._endpoint}"
+        resp = self._session.post(url, params={"arg": cid}, timeout=PROVIDE_TIMEOUT)
+        if resp.status_code == 404 and self._endpoint == "routing/provide":
+            self._endpoint = "dht/provide"
+            return self._call_provide(cid)
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.text.strip()[:200]}")
+        # 응답은 줄 단위 JSON 스트림. 명령 자체의 오류는 {"Type": "error", "Message": ...}로 포함됨
+        # (개별 피어 조회 실패 이벤트는 정상적인 DHT 동작이므로 무시)
+        for line in resp.text.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and event.get("Type") == "error":
+                raise RuntimeError(event.get("Message", line.strip()[:200]))
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_dht_provider():
+    """프로세스 전역 DHTProvider (최초 호출 시 생성)"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = DHTProvider()
+        return _provider
@@ -1,10 +1,10 @@
-import ipfshttpclient
-import hashlib
 import os
-import subprocess
+import io
 import logging
-import time
 from dotenv import load_dotenv
+from ipfs.pool import IPFSClientPool, get_ipfs_pool
+from ipfs.provider import get_dht_provider
+from crypto.hash.merkle import MANIFEST_SUFFIX
 
 # 환경변수 로드
 load_dotenv()
@@ -15,72 +15,117 @@ logger = logging.getLogger(__name__)
 
 
 class IPFSUploader:
-    """IPFS에 실제 파일을 업로드하고 DHT 등록 및 핀 처리를 수행하는 클래스"""
+    """IPFS에 실제 파일을 업로드하고 핀 처리 및 DHT 등록 요청을 수행하는 클래스"""
 
-    def __init__(self, ipfs_api=None):
-        """IPFS 클라이언트 초기화"""
-        if ipfs_api is None:
-            ipfs_api = os.getenv("IPFS_API_URL", "/ip4/127.0.0.1/tcp/5001")
-        try:
-            self.client = ipfshttpclient.connect(ipfs_api)
-            logger.info(f"IPFS 클라이언트 연결 성공: {ipfs_api}")
-            self.ipfs_available = True
-        except Exception as e:
-            logger.error(f"IPFS 클라이언트 연결 실패: {e}")
-            self.ipfs_available = False
-
-    def upload_file(self, file_path):
+    def __init__(self, ipfs_api=None, pool=None):
+        """
+        IPFS 클라이언트 초기화
+        - 기본적으로 프로세스 전역 세션 풀을 사용하므로 업로드마다 연결/핸드셰이크를 하지 않음
+        - ipfs_api를 지정하면 해당 노드 전용 풀을 새로 만듦
+        """
+        if pool is None:
+            pool = IPFSClientPool(ipfs_api) if ipfs_api is not None else get_ipfs_pool()
+        self.pool = pool
+        self.ipfs_available = pool.healthy
+        if not self.ipfs_available:
+            logger.error(f"IPFS 노드 사용 불가: {pool.last_error}")
+
+    def upload_file(self, file_path, manifest=None, attachments=None):
         """
         파일을 IPFS에 업로드하고 DHT 등록 및 핀(Pin) 처리
         :param file_path: 업로드할 로컬 파일 경로
+        :param manifest: 같은 디렉토리에 "<파일명>.manifest.json"으로 함께 올릴 청크 매니페스트 바이트
+        :param attachments: 같은 디렉토리에 함께 올릴 [(파일명, bytes 또는 파일 객체)] (델타 패치, update.json 등)
         :return: {cid, file_name, sha3}
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
 
         try:
-            if self.ipfs_available:
-                logger.info(f"IPFS에 파일 업로드 시작: {file_path}")
-
+            logger.info(f"IPFS에 파일 업로드 시작: {file_path}")
+            file_name = os.path.basename(file_path)
+            with self.pool.client() as client:
                 # wrap-with-directory 옵션 → 파일명 보존
-                result = self.client.add(file_path, wrap_with_directory=True)
+                files = [file_path] + self._extra_files(file_name, manifest, attachments)
+                result = client.add(*files, wrap_with_directory=True)
+                return self._publish(client, result, file_name)
+
+        except Exception as e:
+            logger.error(f"IPFS 업로드 중 오류 발생: {e}")
+            return None
+
+    def upload_stream(self, stream, file_name, manifest=None, attachments=None):
+        """
+        파일 유사 객체(암호문 스풀 등)를 디스크에 쓰지 않고 그대로 IPFS에 업로드
+        :param stream: read()를 지원하는 객체
+        :param file_name: 디렉토리 안에 보존할 파일명
+        :param manifest: 같은 디렉토리에 함께 올릴 청크 매니페스트 바이트
+        :param attachments: 같은 디렉토리에 함께 올릴 [(파일명, bytes 또는 파일 객체)]
+        :return: {cid, file_name}
+        """
+        try:
+            logger.info(f"IPFS에 스트림 업로드 시작: {file_name}")
+            with self.pool.client() as client:
+                files = [_NamedStream(stream, file_name)] + self._extra_files(file_name, manifest, attachments)
+                result = client.add(*files, wrap_with_directory=True)
+                return self._publish(client, result, file_name)
 
-                """
-                result는 배열 형태로 반환됨 (디렉토리와 파일 CID 모두 포함)
-                [
-                    {'Name': '파일명.py.enc', 'Hash': 'QmFileCID', 'Size': '1234'},
-                    {'Name': '', 'Hash': 'QmDirCID', 'Size': '2345'}
-                ]
-                """
-                # 디렉토리 CID (블록체인에 저장할 값)
-                dir_entry = next(r for r in result if r["Name"] == "")
-                dir_cid = dir_entry["Hash"]
+        except Exception as e:
+            logger.error(f"IPFS 업로드 중 오류 발생: {e}")
+            return None
 
-                # 파일명은 따로 기록용
-                file_entry = next(r for r in result if r["Name"] != "")
-                file_name = file_entry["Name"]
+    @staticmethod
+    def _extra_files(file_name, manifest, attachments):
+        extra = list(attachments or ())
+        if manifest is not None:
+            extra.insert(0, (f"{file_name}{MANIFEST_SUFFIX}", manifest))
+        return [
+            _NamedStream(io.BytesIO(data) if isinstance(data, bytes) else data, name) for name, data in extra
+        ]
 
-                # 블록체인에 저장할 해시값은 디렉토리 CID
-                cid = dir_cid
+    def _publish(self, client, result, file_name=None):
+        """
+        add 결과에서 디렉토리 CID를 추출하고 핀 처리 후 DHT 등록을 백그라운드 큐에 맡김
+        result는 배열 형태로 반환됨 (디렉토리와 파일 CID 모두 포함)
+        [
+            {'Name': '파일명.py.enc', 'Hash': 'QmFileCID', 'Size': '1234'},
+            {'Name': '', 'Hash': 'QmDirCID', 'Size': '2345'}
+        ]
+        """
+        # 디렉토리 CID (블록체인에 저장할 값)
+        dir_entry = next(r for r in result if r["Name"] == "")
+        dir_cid = dir_entry["Hash"]
 
-                logger.info(f"파일 업로드 완료 CID: {cid}, 파일명: {file_name}")
+        # 파일명은 따로 기록용 (매니페스트를 함께 올린 경우 암호문 항목을 고름)
+        file_entry = next(
+            (r for r in result if file_name is not None and r["Name"] == file_name),
+            next(r for r in result if r["Name"] != ""),
+        )
+        file_name = file_entry["Name"]
 
-                # DHT 등록
-                logger.info("DHT에 CID 등록 중")
-                subprocess.run(["ipfs", "dht", "provide", cid], capture_output=True, text=True)
-                time.sleep(5)
-                logger.info("DHT 등록 완료") # DHT 등록이 퍼질 시간을 줌
+        # 블록체인에 저장할 해시값은 디렉토리 CID
+        cid = dir_cid
 
-                # 핀 추가 (파일을 노드에 유지)
-                logger.info("핀 설정 중")
-                self.client.pin.add(cid)
-                logger.info("핀 설정 완료")
+        logger.info(f"파일 업로드 완료 CID: {cid}, 파일명: {file_name}")
 
-                return {"cid": cid, "file_name": file_name,}
+        # 핀 추가 (파일을 노드에 유지)
+        logger.info("핀 설정 중")
+        client.pin.add(cid)
+        logger.info("핀 설정 완료")
 
-            else:
-                raise ConnectionError("IPFS 노드에 연결할 수 없습니다.")
+        # DHT 등록은 백그라운드 provider 큐에서 HTTP API로 처리 (업로드 응답을 기다리게 하지 않음)
+        provide_status = get_dht_provider().enqueue(cid)
+        logger.info(f"DHT 등록 요청: {cid} ({provide_status})")
 
-        except Exception as e:
-            logger.error(f"IPFS 업로드 중 오류 발생: {e}")
-            return None
+        return {"cid": cid, "file_name": file_name, "provide_status": provide_status}
+
+
+class _NamedStream:
+    """ipfshttpclient가 멀티파트 파일명으로 사용할 name 속성을 가진 스트림 래퍼"""
+
+    def __init__(self, stream, name):
+        self._stream = stream
+        self.name = name
+
+    def read(self, size=-1):
+        return self._stream.read(size)
@@ -1,8 +1,11 @@
 from flask import Flask
 from flask_cors import CORS
 from api.routes import api_bp
+from services.ingest import IngestRequest
 
 app = Flask(__name__)
+# 업로드 본문을 평문 임시파일 없이 바로 암호화하도록 요청 클래스 교체
+app.request_class = IngestRequest
 CORS(app)
 app.register_blueprint(api_bp)
 
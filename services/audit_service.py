@@ -0,0 +1,420 @@
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+import threading
+import multiprocessing
+import requests
+from concurrent.futures import ProcessPoolExecutor
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from blockchain.contract import resolve_update_contract
+from blockchain.receipt_tracker import get_receipt_tracker, normalize_tx_hash
+from blockchain.update_index import UPDATE_INDEX_LOG_RANGE
+from crypto.ecdsa.ecdsa import ECDSATools
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 읽는 업데이트 수 (getUpdateIdByIndex / getUpdateInfo 배치 단위)
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+# 서명자 복원을 나눠 실행하는 프로세스 수 (0이면 현재 프로세스에서 실행)
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", str(os.cpu_count() or 1)))
+# 프로세스 하나에 넘기는 서명 수
+AUDIT_CHUNK_SIZE = 64
+# 등록 이벤트 조회를 시작할 블록 (컨트랙트 배포 블록). 비우면 eth_getCode 이진 탐색으로 찾음
+AUDIT_START_BLOCK = os.getenv("AUDIT_START_BLOCK", "")
+
+REGISTER_FUNCTION = "registerUpdate"
+
+AUDIT_OK = "ok"
+AUDIT_MISMATCH = "signer_mismatch"
+AUDIT_INVALID = "invalid_signature"
+AUDIT_MISSING = "missing_signature"
+
+# 백그라운드 감사 상태
+AUDIT_RUNNING = "running"
+AUDIT_SUCCEEDED = "succeeded"
+AUDIT_FAILED = "failed"
+
+
+def _recover_chunk(items):
+    """워커 프로세스: [(message_hash, signature)] → [서명자 주소 또는 ("error", 메시지)]"""
+    results = []
+    for message_hash, signature in items:
+        try:
+            results.append(ECDSATools.recover_signer(message_hash, signature))
+        except Exception as e:
+            results.append(("error", str(e)))
+    return results
+
+
+def _info_digest(uid, info):
+    """서명 대상 값이 바뀌었는지 확인하기 위한 요약값"""
+    digest = hashlib.sha256()
+    for value in (uid, *info[:6]):
+        digest.update(value if isinstance(value, bytes) else str(value).encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SignatureAuditor:
+    """
+    등록된 모든 업데이트의 제조사 서명 감사.
+    - 한 블록 기준으로 업데이트 정보를 AUDIT_BATCH_SIZE개씩 읽고, sign_message와 같은 인코딩으로
+      (uid, ipfsHash, encryptedKey, hashOfUpdate, description, price, version) 해시를 다시 계산
+    - 서명은 registerUpdate 트랜잭션 입력에서 가져옴
+      (이 서버가 보낸 트랜잭션은 ReceiptTracker 기록, 그 외에는 컨트랙트 이벤트로 tx 해시를 찾음)
+    - 서명자 복원은 프로세스 풀에서 병렬 실행하고, 결과는 (uid, 등록 블록)별로 캐시
+    - 복원한 서명자가 컨트랙트 manufacturer와 다르면 불일치로 보고
+    - API에서는 start()로 백그라운드 스레드에서 실행하고 status()로 진행 상태/보고서를 조회
+    """
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, workers=AUDIT_WORKERS):
+        self.batch_size = batch_size
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._results = {}  # (uid, 등록 블록) → (정보 요약값, 결과)
+        self._registrations = {}  # uid → (tx 해시, 블록 번호)
+        self._scanned_to = None  # 등록 이벤트를 확인한 마지막 블록
+        self._deployed_at = None  # 컨트랙트 배포 블록 (이벤트 조회 시작점)
+        self._contract_address = None
+        self._manufacturer = None
+        self._state_lock = threading.Lock()
+        self._current = None  # 마지막으로 시작한 백그라운드 감사 상태
+        self.last_report = None
+
+    def run(self):
+        """전체 감사 실행 후 보고서 반환 (동시에 한 번만 실행)"""
+        with self._lock:
+            report = self._run()
+            self.last_report = report
+            return report
+
+    def start(self):
+        """백그라운드 스레드에서 감사를 시작하고 감사 id 반환 (이미 실행 중이면 그 감사의 id)"""
+        with self._state_lock:
+            if self._current is not None and self._current["status"] == AUDIT_RUNNING:
+                return self._current["audit_id"]
+            state = {
+                "audit_id": uuid.uuid4().hex,
+                "status": AUDIT_RUNNING,
+                "started_at": time.time(),
+                "finished_at": None,
+                "report": None,
+                "error": None,
+            }
+            self._current = state
+        threading.Thread(target=self._run_background, args=(state,), name="signature-audit", daemon=True).start()
+        return state["audit_id"]
+
+    def _run_background(self, state):
+        try:
+            report = self.run()
+        except Exception:
+            logger.exception("서명 감사 실패")
+            update = {"status": AUDIT_FAILED, "error": "서명 감사에 실패했습니다. 관리자에게 문의하세요."}
+        else:
+            update = {"status": AUDIT_SUCCEEDED, "report": report}
+        with self._state_lock:
+            state.update(update, finished_at=time.time())
+
+    def status(self, audit_id=None):
+        """마지막으로 시작한 감사의 상태 (audit_id가 주어지면 그 감사일 때만, 없으면 None)"""
+        with self._state_lock:
+            if self._current is None or audit_id not in (None, self._current["audit_id"]):
+                return None
+            return dict(self._current)
+
+    def _run(self):
+        started = time.time()
+        resolved = resolve_update_contract()
+        web3, contract, reader = resolved["web3"], resolved["contract"], resolved["reader"]
+        if self._contract_address != contract.address:
+            self._results.clear()
+            self._registrations.clear()
+            self._scanned_to = None
+            self._deployed_at = None
+            self._contract_address = contract.address
+
+        block = web3.eth.block_number
+        manufacturer = contract.functions.manufacturer().call(block_identifier=block)
+        if self._manufacturer != manufacturer:
+            # 기대 서명자가 바뀌면 캐시된 판정은 더 이상 유효하지 않음
+            self._results.clear()
+            self._manufacturer = manufacturer
+        count = reader.get_count(block=block)
+
+        report = {
+            "block": block,
+            "contract": contract.address,
+            "manufacturer": manufacturer,
+            "total": count,
+            "ok": 0,
+            "cached": 0,
+            "unreadable": 0,
+            "mismatches": [],
+        }
+        pending = []
+        for start in range(0, count, self.batch_size):
+            rows = reader.read_range(start, min(start + self.batch_size, count), block=block)
+            updates = []
+            for idx, uid, info in rows:
+                if uid is None or info is None:
+                    report["unreadable"] += 1
+                    logger.warning(f"서명 감사: 인덱스 {idx} 조회 실패")
+                    continue
+                updates.append((idx, uid, info))
+            pending.extend(self._prepare_batch(web3, contract, updates, block, report))
+
+        # 캐시에 없는 서명만 모아서 한 번에 병렬 복원
+        recovered = self._recover([item[-1] for item in pending])
+        for (idx, uid, key, digest, tx_hash, _), signer in zip(pending, recovered):
+            if isinstance(signer, tuple):
+                result = self._result(idx, uid, AUDIT_INVALID, tx_hash=tx_hash, reason=signer[1])
+            elif signer.lower() != manufacturer.lower():
+                result = self._result(idx, uid, AUDIT_MISMATCH, tx_hash=tx_hash, signer=signer)
+            else:
+                result = self._result(idx, uid, AUDIT_OK, tx_hash=tx_hash, signer=signer)
+            self._store(report, key, digest, result)
+        report["mismatches"].sort(key=lambda item: item["index"])
+
+        report["elapsed"] = round(time.time() - started, 3)
+        level = logging.WARNING if report["mismatches"] else logging.INFO
+        logger.log(
+            level,
+            f"서명 감사 완료: block={block} total={count} ok={report['ok']} "
+            f"mismatches={len(report['mismatches'])} cached={report['cached']}",
+        )
+        return report
+
+    def _prepare_batch(self, web3, contract, updates, block, report):
+        """
+        캐시된 결과와 서명을 찾을 수 없는 항목은 바로 보고서에 기록하고,
+        서명자 복원이 필요한 항목 [(idx, uid, 캐시 키, 요약값, tx 해시, (message_hash, 서명))] 반환
+        """
+        self._find_registrations(web3, contract, [uid for _, uid, _ in updates], block)
+
+        unchecked = []
+        for idx, uid, info in updates:
+            registration = self._registrations.get(uid)
+            digest = _info_digest(uid, info)
+            key = (uid, registration[1] if registration else None)
+            cached = self._results.get(key)
+            if cached is not None and cached[0] == digest:
+                report["cached"] += 1
+                self._record(report, cached[1])
+            else:
+                unchecked.append((idx, uid, info, registration, key, digest))
+
+        tx_inputs = self._get_transaction_inputs(
+            web3, [registration[0] for _, _, _, registration, _, _ in unchecked if registration]
+        )
+        pending = []
+        for idx, uid, info, registration, key, digest in unchecked:
+            # 서명을 찾지 못한 경우는 일시적인 조회 실패일 수 있으므로 캐시하지 않음
+            if registration is None:
+                self._record(report, self._result(idx, uid, AUDIT_MISSING, reason="등록 트랜잭션을 찾을 수 없음"))
+                continue
+            signature = self._signature_from_input(contract, tx_inputs.get(registration[0]))
+            if signature is None:
+                self._record(
+                    report,
+                    self._result(idx, uid, AUDIT_MISSING, tx_hash=registration[0], reason="트랜잭션 입력에서 서명을 찾을 수 없음"),
+                )
+                continue
+            # sign_message와 같은 튜플: (uid, ipfsHash, encryptedKey, hashOfUpdate, description, price, version)
+            message = (uid, info[0], info[1], info[2], info[3], info[4], info[5])
+            message_hash = bytes(ECDSATools.message_hash(message))
+            pending.append((idx, uid, key, digest, registration[0], (message_hash, signature)))
+        return pending
+
+    def _result(self, idx, uid, status, **fields):
+        return dict({"index": idx, "uid": uid, "status": status}, **fields)
+
+    def _store(self, report, key, digest, result):
+        self._results[key] = (digest, result)
+        self._record(report, result)
+
+    def _record(self, report, result):
+        if result["status"] == AUDIT_OK:
+            report["ok"] += 1
+        else:
+            report["mismatches"].append(result)
+
+    # ---- 서명자 복원 ----
+
+    def _recover(self, items):
+        if not items:
+            return []
+        chunks = [items[i:i + AUDIT_CHUNK_SIZE] for i in range(0, len(items), AUDIT_CHUNK_SIZE)]
+        if self.workers <= 0 or len(chunks) == 1:
+            return [signer for chunk in chunks for signer in _recover_chunk(chunk)]
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            return [signer for result in pool.map(_recover_chunk, chunks) for signer in result]
+
+    # ---- 등록 트랜잭션 / 서명 조회 ----
+
+    def _find_registrations(self, web3, contract, uids, block):
+        """uid별 registerUpdate 트랜잭션 (tx 해시, 블록 번호) 확보"""
+        missing = [uid for uid in uids if uid not in self._registrations]
+        if not missing:
+            return
+        # 이 서버가 이 컨트랙트로 보낸 트랜잭션은 ReceiptTracker에 기록되어 있음
+        for uid, found in get_receipt_tracker().mined_by_uid(REGISTER_FUNCTION, contract.address).items():
+            self._registrations.setdefault(uid, found)
+        if all(uid in self._registrations for uid in missing):
+            return
+        self._scan_registration_events(web3, contract, block)
+
+    def _scan_registration_events(self, web3, contract, block):
+        """uid 인자가 있는 등록 이벤트를 마지막으로 확인한 블록 이후부터 수집"""
+        events = {}
+        for abi in contract.abi:
+            if abi.get("type") == "event" and "cancel" not in abi["name"].lower():
+                if any(arg.get("name") == "uid" for arg in abi.get("inputs", [])):
+                    events[event_abi_to_log_topic(abi)] = contract.events[abi["name"]]()
+        if self._scanned_to is None:
+            start = self._deployment_block(web3, contract, block)
+        else:
+            start = self._scanned_to + 1
+        if not events or start > block:
+            return
+        while start <= block:
+            end = min(start + UPDATE_INDEX_LOG_RANGE - 1, block)
+            logs = web3.eth.get_logs({"address": contract.address, "fromBlock": start, "toBlock": end})
+            for log in logs:
+                event = events.get(bytes(log["topics"][0])) if log["topics"] else None
+                if event is None:
+                    continue
+                try:
+                    uid = event.process_log(log)["args"].get("uid")
+                except Exception:
+                    continue
+                if isinstance(uid, str):
+                    # 같은 uid가 다시 등록된 경우 최신 등록을 사용
+                    self._registrations[uid] = (normalize_tx_hash(log["transactionHash"]), log["blockNumber"])
+            start = end + 1
+        self._scanned_to = block
+
+    def _deployment_block(self, web3, contract, block):
+        """
+        컨트랙트 배포 블록 (AUDIT_START_BLOCK 또는 eth_getCode 이진 탐색, 약 log2(block)회 호출).
+        과거 상태를 조회할 수 없는 노드에서는 0부터 조회
+        """
+        if self._deployed_at is None:
+            if AUDIT_START_BLOCK:
+                self._deployed_at = int(AUDIT_START_BLOCK)
+            else:
+                low, high = 0, block
+                try:
+                    while low < high:
+                        mid = (low + high) // 2
+                        if web3.eth.get_code(contract.address, block_identifier=mid):
+                            high = mid
+                        else:
+                            low = mid + 1
+                except Exception as e:
+                    logger.warning(f"컨트랙트 배포 블록 조회 실패, 0번 블록부터 이벤트를 조회합니다: {e}")
+                    low = 0
+                self._deployed_at = low
+        return self._deployed_at
+
+    def _get_transaction_inputs(self, web3, tx_hashes):
+        """tx 해시 → 트랜잭션 입력 bytes. JSON-RPC 배치로 묶어 조회하고 실패하면 개별 조회"""
+        inputs = {}
+        endpoint = getattr(web3.provider, "endpoint_uri", None)
+        for offset in range(0, len(tx_hashes), self.batch_size):
+            chunk = tx_hashes[offset:offset + self.batch_size]
+            if endpoint:
+                payload = [
+                    {"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionByHash", "params": [h]}
+                    for i, h in enumerate(chunk)
+                ]
+                try:
+                    resp = self._session.post(endpoint, json=payload, timeout=30)
+                    resp.raise_for_status()
+                    body = resp.json()
+                    if isinstance(body, list):
+                        for item in body:
+                            idx = item.get("id")
+                            tx = item.get("result")
+                            if isinstance(idx, int) and 0 <= idx < len(chunk) and tx:
+                                inputs[chunk[idx]] = Web3.to_bytes(hexstr=tx["input"])
+                except Exception as e:
+                    logger.warning(f"트랜잭션 배치 조회 실패, 개별 조회로 대체: {e}")
+
+            for h in chunk:
+                if h in inputs:
+                    continue
+                try:
+                    inputs[h] = bytes(web3.eth.get_transaction(h)["input"])
+                except Exception as e:
+                    logger.warning(f"트랜잭션 조회 실패: {h} - {e}")
+        return inputs
+
+    def _signature_from_input(self, contract, tx_input):
+        if not tx_input:
+            return None
+        try:
+            func, args = contract.decode_function_input(tx_input)
+        except Exception:
+            return None
+        if func.fn_name != REGISTER_FUNCTION:
+            return None
+        signature = args.get("signature")
+        if signature is None:
+            # 인자 이름이 다른 경우 마지막 bytes 인자를 서명으로 사용
+            signature = list(args.values())[-1]
+        return bytes(signature) if isinstance(signature, (bytes, bytearray)) else None
+
+
+_auditor = None
+_auditor_lock = threading.Lock()
+
+
+def get_signature_auditor():
+    """프로세스 전역 SignatureAuditor (결과 캐시 공유)"""
+    global _auditor
+    with _auditor_lock:
+        if _auditor is None:
+            _auditor = SignatureAuditor()
+        return _auditor
+
+
+def main(argv=None):
+    """
+    CLI: python -m services.audit_service [--batch-size N] [--workers N] [--json]
+    불일치가 있으면 종료 코드 1
+    """
+    parser = argparse.ArgumentParser(description="등록된 모든 업데이트의 제조사 서명 감사")
+    parser.add_argument("--batch-size", type=int, default=AUDIT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=AUDIT_WORKERS)
+    parser.add_argument("--json", action="store_true", help="보고서를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    report = SignatureAuditor(batch_size=args.batch_size, workers=args.workers).run()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"block {report['block']} / contract {report['contract']} / manufacturer {report['manufacturer']}\n"
+            f"total {report['total']}, ok {report['ok']}, mismatches {len(report['mismatches'])}, "
+            f"unreadable {report['unreadable']} ({report['elapsed']}s)"
+        )
+        for item in report["mismatches"]:
+            detail = item.get("signer") or item.get("reason", "")
+            print(f"  [{item['status']}] #{item['index']} {item['uid']} {item.get('tx_hash', '')} {detail}")
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
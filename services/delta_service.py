@@ -0,0 +1,292 @@
+import os
+import re
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+
+try:
+    import bsdiff4
+except ImportError:  # 선택 의존성: 없으면 델타 단계를 건너뜀
+    bsdiff4 = None
+
+from crypto.symmetric.symmetric import SymmetricCrypto
+
+logger = logging.getLogger(__name__)
+
+# 이전 버전 대비 바이너리 델타 생성: "on" / "off" (on이면 업로드 평문을 기준본으로 보관)
+UPDATE_DELTA_MODE = os.getenv("UPDATE_DELTA_MODE", "off").lower()
+# 델타 기준본(이전 버전 평문)과 인덱스를 보관하는 디렉토리
+DELTA_BASE_DIR = os.getenv("DELTA_BASE_DIR", os.path.join(os.path.dirname(__file__), "../delta_bases"))
+# 제품별로 보관하는 최근 기준본 수
+DELTA_BASE_KEEP = int(os.getenv("DELTA_BASE_KEEP", "3"))
+# 패치가 전체 이미지의 이 비율보다 크면 델타를 게시하지 않음
+DELTA_MAX_RATIO = float(os.getenv("DELTA_MAX_RATIO", "0.5"))
+# bsdiff는 기준본과 새 버전을 모두 메모리에 올리고 기준본 크기의 약 16배인 접미사 배열을 만들므로
+# (업로드 작업 스레드 안에서 실행) 이보다 큰 파일은 델타 생성 안 함. 64 MiB 기준 최대 약 1.2 GB 사용
+DELTA_MAX_FILE_BYTES = int(os.getenv("DELTA_MAX_FILE_BYTES", str(64 * 1024 * 1024)))
+
+DELTA_ALGORITHM = "bsdiff4"
+# IPFS 디렉토리 안에서 암호화된 패치 파일명 접미사와 메타데이터 파일명
+DELTA_SUFFIX = ".delta.enc"
+UPDATE_METADATA_NAME = "update.json"
+UPDATE_METADATA_VERSION = 1
+
+_warned_missing = False
+
+
+def delta_enabled():
+    """UPDATE_DELTA_MODE=on이고 bsdiff4를 사용할 수 있는지"""
+    global _warned_missing
+    if UPDATE_DELTA_MODE != "on":
+        return False
+    if bsdiff4 is None:
+        if not _warned_missing:
+            logger.warning("UPDATE_DELTA_MODE=on이지만 bsdiff4가 설치되지 않아 델타 생성을 건너뜁니다.")
+            _warned_missing = True
+        return False
+    return True
+
+
+def product_of(original_filename):
+    """update_uid(<name>_v<version>)의 <name> 부분"""
+    return original_filename.split(".")[0]
+
+
+def _version_key(version):
+    """"1.10.2" > "1.9" 처럼 숫자 단위로 비교하는 정렬 키"""
+    return tuple((0, int(p)) if p.isdigit() else (1, p) for p in re.findall(r"\d+|[A-Za-z]+", version))
+
+
+class BaseCapture:
+    """
+    업로드 평문을 기준본 저장소의 임시파일에 기록하면서 평문 SHA3-256을 계산.
+    - stream 모드: EncryptedUpload가 암호화와 함께 write()로 평문을 넘김
+    - disk 모드: from_file()로 이미 저장된 평문 파일을 가리킴 (파일은 소유하지 않음)
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha3_256()
+        self._owned = True
+        self.size = 0
+
+    @classmethod
+    def from_file(cls, file_path, chunk_size=1024 * 1024):
+        capture = cls.__new__(cls)
+        capture.path = file_path
+        capture._file = None
+        capture._hash = hashlib.sha3_256()
+        capture._owned = False
+        capture.size = 0
+        with open(file_path, "rb") as f:
+            chunk = f.read(chunk_size)
+            while chunk:
+                capture._hash.update(chunk)
+                capture.size += len(chunk)
+                chunk = f.read(chunk_size)
+        return capture
+
+    def write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def plain_hash(self):
+        return self._hash.hexdigest()
+
+    def claim(self, destination):
+        """기준본 저장 위치로 옮김 (소유하지 않은 파일은 복사)"""
+        self.finish()
+        if self._owned:
+            os.replace(self.path, destination)
+            self._owned = False
+        else:
+            shutil.copyfile(self.path, destination)
+        self.path = destination
+
+    def discard(self):
+        self.finish()
+        if self._owned:
+            self._owned = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class DeltaBaseStore:
+    """
+    제품별 이전 버전 평문(델타 기준본) 저장소.
+    - 파일은 <root>/<제품>/<평문 SHA3>.bin, 인덱스는 <root>/index.db (SQLite)
+    - 기준본에는 게시된 IPFS CID와 uid를 함께 기록해 디바이스가 어떤 버전에 대한 패치인지 알 수 있게 함
+    - 제품별로 최근 keep개 버전만 유지
+    """
+
+    def __init__(self, root=DELTA_BASE_DIR, keep=DELTA_BASE_KEEP):
+        self.root = root
+        self.keep = max(1, keep)
+        self.db_path = os.path.join(root, "index.db")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bases (
+                    product TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    uid TEXT NOT NULL,
+                    ipfs_hash TEXT NOT NULL,
+                    file_name TEXT,
+                    plain_sha3 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (product, version)
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def capture(self):
+        """새 업로드 평문을 받을 BaseCapture"""
+        return BaseCapture(os.path.join(self.root, "incoming"))
+
+    def previous(self, product, version):
+        """같은 제품에서 version보다 낮은 가장 최신 기준본 (버전을 비교할 수 없으면 가장 최근 것)"""
+        with self._connect() as conn:
+            rows = [
+                dict(r)
+                for r in conn.execute(
+                    "SELECT * FROM bases WHERE product = ? AND version != ? ORDER BY created_at DESC",
+                    (product, version),
+                )
+            ]
+        rows = [r for r in rows if os.path.exists(r["path"])]
+        target = _version_key(version)
+        older = [r for r in rows if _version_key(r["version"]) < target]
+        if older:
+            return max(older, key=lambda r: _version_key(r["version"]))
+        return rows[0] if rows and not target else None
+
+    def commit(self, capture, product, version, uid, ipfs_hash, file_name):
+        """게시가 끝난 업로드 평문을 다음 버전의 기준본으로 저장"""
+        directory = os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "_", product))
+        os.makedirs(directory, exist_ok=True)
+        capture.claim(os.path.join(directory, f"{capture.plain_hash}.bin"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO bases (product, version, uid, ipfs_hash, file_name, plain_sha3, "
+                "size, path, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (product, version, uid, ipfs_hash, file_name, capture.plain_hash, capture.size, capture.path, time.time()),
+            )
+            rows = conn.execute(
+                "SELECT version, path FROM bases WHERE product = ? ORDER BY created_at DESC", (product,)
+            ).fetchall()
+            expired = rows[self.keep:]
+            conn.executemany(
+                "DELETE FROM bases WHERE product = ? AND version = ?", [(product, r["version"]) for r in expired]
+            )
+            kept = {r["path"] for r in rows[: self.keep]}
+        for path in {r["path"] for r in expired} - kept:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def compute_delta(store, capture, product, version, aes_key):
+    """
+    이전 버전 기준본 대비 bsdiff4 패치를 만들고 전체 이미지와 같은 AES 키로 암호화.
+    :return: (델타 dict 또는 None, 건너뛴 이유)
+    """
+    base = store.previous(product, version)
+    if base is None:
+        return None, "이전 버전 기준본 없음"
+    if capture.size > DELTA_MAX_FILE_BYTES or base["size"] > DELTA_MAX_FILE_BYTES:
+        return None, "파일이 DELTA_MAX_FILE_BYTES보다 큼"
+    if base["plain_sha3"] == capture.plain_hash:
+        return None, "기준본과 내용이 같음"
+
+    capture.finish()
+    patch_path = f"{capture.path}.{os.getpid()}.{threading.get_ident()}.patch"
+    try:
+        bsdiff4.file_diff(base["path"], capture.path, patch_path)
+        patch_size = os.path.getsize(patch_path)
+        if patch_size > capture.size * DELTA_MAX_RATIO:
+            return None, f"패치가 전체 이미지의 {DELTA_MAX_RATIO:g}배보다 큼 ({patch_size} bytes)"
+        encrypted_path, patch_hash = SymmetricCrypto.encrypt_file_with_hash(patch_path, aes_key)
+    finally:
+        if os.path.exists(patch_path):
+            os.remove(patch_path)
+
+    return {
+        "path": encrypted_path,
+        "sha3": patch_hash,
+        "patch_size": patch_size,
+        "base": {
+            "uid": base["uid"],
+            "version": base["version"],
+            "ipfs_hash": base["ipfs_hash"],
+            "file_name": base["file_name"],
+            "plain_sha3": base["plain_sha3"],
+        },
+    }, None
+
+
+def build_update_metadata(
+    uid, file_name, file_hash, plain_sha3=None, compression=None, delta=None, delta_file_name=None
+):
+    """
+    IPFS 디렉토리에 함께 올리는 update.json.
+    - 디렉토리 CID가 서명/등록되므로 이 파일의 압축/델타/기준본 정보도 함께 보호됨
+    - compression: 전체 이미지를 복호화한 뒤 해제할 코덱/레벨 (델타 패치는 압축하지 않은 평문 기준)
+    - 디바이스는 base.plain_sha3로 설치된 버전을 확인하고, 패치 적용 결과를 plain_sha3로 검증
+    """
+    metadata = {
+        "version": UPDATE_METADATA_VERSION,
+        "uid": uid,
+        "file": file_name,
+        "hash_of_update": file_hash,
+        "plain_sha3": plain_sha3,
+        "compression": compression,
+        "delta": None,
+    }
+    if delta is not None:
+        metadata["delta"] = {
+            "algorithm": DELTA_ALGORITHM,
+            "file": delta_file_name,
+            "sha3": delta["sha3"],
+            "patch_size": delta["patch_size"],
+            "base": delta["base"],
+        }
+    return json.dumps(metadata, sort_keys=True, separators=(",", ":")).encode()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_delta_store():
+    """프로세스 전역 DeltaBaseStore (최초 호출 시 생성)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DeltaBaseStore()
+        return _store
@@ -0,0 +1,145 @@
+import os
+import copy
+import logging
+import tempfile
+from flask import Request
+from crypto.symmetric.symmetric import SymmetricCrypto, StreamingEncryptor, STREAM_CHUNK_SIZE
+from crypto.cpabe.cpabe import CPABETools
+from crypto.hash.merkle import new_update_hasher, manifest_bytes
+from crypto.symmetric.compression import configured_compression, new_compressor, compression_metadata
+from services.delta_service import delta_enabled, get_delta_store
+
+logger = logging.getLogger(__name__)
+
+# 업로드 수집 방식: "stream" = 평문을 디스크에 쓰지 않고 요청 본문에서 바로 암호화
+#                  "disk"   = 기존 방식 (uploads/에 평문 저장 후 암호화)
+INGEST_MODE = os.getenv("UPLOAD_INGEST_MODE", "stream").lower()
+
+# 암호문을 메모리에 유지하는 최대 크기. 이보다 작은 업로드는 파일시스템을 전혀 사용하지 않음
+SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class EncryptedUpload:
+    """
+    업로드 본문을 받는 즉시 AES 암호화 + SHA3-256 해시(UPDATE_HASH_MODE=merkle이면 머클 루트)를 수행하는 파일 유사 객체.
+    - werkzeug 멀티파트 파서가 write()로 평문 조각을 넘기면 암호문만 스풀에 기록
+    - 스풀은 SPOOL_MAX_BYTES 이하일 때 메모리에만 존재 (초과분은 암호문만 임시파일로)
+    - 파싱이 끝나면 read()는 암호문(IV + 암호문)을 반환하므로 그대로 IPFS add에 전달 가능
+    - capture(BaseCapture)가 주어지면 평문을 델타 기준본 저장소에도 기록 (UPDATE_DELTA_MODE=on)
+    - UPDATE_COMPRESSION이 설정되면 평문을 스트리밍 압축한 뒤 암호화 (capture에는 압축 전 평문)
+    """
+
+    def __init__(self, group, spool_max_bytes=SPOOL_MAX_BYTES, capture=None):
+        kbj, aes_key = SymmetricCrypto.generate_key(group)
+        # 그룹 원소는 다른 PairingGroup 인스턴스와 섞이지 않도록 직렬화 형태로 보관
+        self.kbj_bytes = group.serialize(kbj)
+        self.name = "upload.enc"
+        self._hash = new_update_hasher()
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+        self._codec, self._level = configured_compression()
+        self._encryptor = StreamingEncryptor(
+            aes_key, self._spool, self._hash, new_compressor(self._codec, self._level)
+        )
+        self._finished = False
+        self.capture = capture
+
+    @classmethod
+    def from_stream(cls, src, group, chunk_size=STREAM_CHUNK_SIZE, capture=None):
+        """이미 열린 평문 스트림(FileStorage.stream 등)을 읽어 암호화된 업로드 생성"""
+        upload = cls(group, capture=capture)
+        chunk = src.read(chunk_size)
+        while chunk:
+            upload.write(chunk)
+            chunk = src.read(chunk_size)
+        upload.finish()
+        return upload
+
+    def write(self, data):
+        self._encryptor.update(data)
+        if self.capture is not None:
+            self.capture.write(data)
+        return len(data)
+
+    def finish(self):
+        """마지막 블록을 기록하고 읽기 위치를 처음으로 되돌림 (여러 번 호출해도 안전)"""
+        if not self._finished:
+            self._encryptor.finalize()
+            if self.capture is not None:
+                self.capture.finish()
+            self._finished = True
+        self._spool.seek(0)
+
+    def seek(self, offset, whence=0):
+        # werkzeug는 파일 파트 수신이 끝나면 seek(0)을 호출함 → 이 시점에 암호화 완료
+        if not self._finished:
+            self.finish()
+        return self._spool.seek(offset, whence)
+
+    def tell(self):
+        return self._spool.tell()
+
+    def read(self, size=-1):
+        if not self._finished:
+            self.finish()
+        return self._spool.read(size)
+
+    def readline(self, size=-1):
+        if not self._finished:
+            self.finish()
+        return self._spool.readline(size)
+
+    @property
+    def file_hash(self):
+        return self._hash.hexdigest()
+
+    @property
+    def manifest(self):
+        """머클 모드일 때 IPFS 디렉토리에 함께 올릴 매니페스트 바이트 (아니면 None)"""
+        return manifest_bytes(self._hash)
+
+    @property
+    def size(self):
+        return self._encryptor.bytes_written
+
+    @property
+    def plain_size(self):
+        return self._encryptor.bytes_in
+
+    @property
+    def compression(self):
+        """update.json에 기록할 압축 코덱/레벨 (압축하지 않으면 None)"""
+        return compression_metadata(self._codec, self._level)
+
+    @property
+    def in_memory(self):
+        return not getattr(self._spool, "_rolled", False)
+
+    def detach(self):
+        """
+        스풀 소유권을 새 객체로 넘기고 이 객체의 close()는 아무 일도 하지 않게 만듦.
+        - werkzeug는 요청 종료 시 request.files를 모두 닫으므로, 요청 이후에도
+          암호문이 필요한 경우(비동기 업로드 작업 등) 반드시 detach() 후 사용
+        """
+        owner = copy.copy(self)
+        self._spool = None
+        return owner
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            # 기준본으로 저장되지 않은 평문 임시파일 정리
+            if self.capture is not None:
+                self.capture.discard()
+
+
+class IngestRequest(Request):
+    """
+    업로드 파일 파트를 EncryptedUpload로 직접 스트리밍하는 Flask Request.
+    - 요청 본문이 평문 임시파일로 스풀링되지 않도록 werkzeug의 파일 스트림 팩토리를 교체
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if INGEST_MODE != "stream":
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        capture = get_delta_store().capture() if delta_enabled() else None
+        return EncryptedUpload(CPABETools().get_group(), capture=capture)
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.update_service import UpdateService, UpdatePipelineError, UPLOAD_STAGES
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태 저장소 경로 (프로세스 재시작 후에도 조회 가능하도록 SQLite 사용)
+JOB_DB_PATH = os.getenv(
+    "UPLOAD_JOB_DB", os.path.join(os.path.dirname(__file__), "../jobs.db")
+)
+# 동시에 실행되는 업로드 파이프라인 수
+JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "4"))
+# 대기 + 실행 중인 작업의 최대 개수 (초과 시 새 업로드 거절)
+JOB_QUEUE_MAX = int(os.getenv("UPLOAD_JOB_QUEUE_MAX", "32"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_INTERRUPTED = "interrupted"
+
+
+class JobQueueFullError(Exception):
+    """대기열이 가득 차 새 작업을 받을 수 없음"""
+
+
+class JobStore:
+    """업로드 작업 상태를 SQLite에 저장/조회하는 클래스 (스레드 안전)"""
+
+    def __init__(self, db_path=JOB_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS upload_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stages TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    owner_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, job_id):
+        now = time.time()
+        stages = {stage: {"status": "pending"} for stage in UPLOAD_STAGES}
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO upload_jobs (job_id, status, stages, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, json.dumps(stages), os.getpid(), now, now),
+            )
+
+    def get(self, job_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id, status, stages, result, error, created_at, updated_at "
+                "FROM upload_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "stages": json.loads(row[2]),
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def update_stage(self, job_id, stage, status, **info):
+        """단계 상태 갱신. info(파일 해시, CID, tx 해시 등)는 해당 단계에 함께 기록"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT stages FROM upload_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row[0])
+            entry = stages.setdefault(stage, {})
+            entry["status"] = status
+            entry[f"{status}_at"] = now
+            entry.update(info)
+            conn.execute(
+                "UPDATE upload_jobs SET stages = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(stages), now, job_id),
+            )
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE upload_jobs SET status = ?, result = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+
+    def set_status(self, job_id, status):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE upload_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), job_id),
+            )
+
+    def mark_interrupted(self):
+        """
+        종료된 프로세스가 남긴 미완료 작업을 interrupted로 표시.
+        - 암호문 스풀과 대칭키(kbj)는 메모리에만 존재하므로 재시작 후 이어서 실행할 수 없음
+        - 같은 DB를 쓰는 다른 워커 프로세스(gunicorn -w N)의 작업은 건드리지 않음
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, owner_pid FROM upload_jobs WHERE status IN (?, ?)",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+            orphaned = [job_id for job_id, pid in rows if not _process_alive(pid)]
+            conn.executemany(
+                "UPDATE upload_jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                [
+                    (
+                        JOB_INTERRUPTED,
+                        "서버 재시작으로 작업이 중단되었습니다. 다시 업로드하세요.",
+                        time.time(),
+                        job_id,
+                    )
+                    for job_id in orphaned
+                ],
+            )
+            return len(orphaned)
+
+
+def _process_alive(pid):
+    if not pid or pid == os.getpid():
+        # 현재 프로세스는 방금 시작했으므로 같은 pid의 기록은 이전 프로세스의 것
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class UploadJobManager:
+    """
+    업로드 파이프라인(IPFS, CP-ABE, 서명, 블록체인 등록)을 제한된 워커 풀에서 실행.
+    - 요청 스레드는 prepare_upload까지만 수행하고 즉시 job_id를 반환
+    - 단계별 진행 상황과 최종 결과(uid, CID, tx 해시)는 JobStore에 기록
+    """
+
+    def __init__(self, store=None, workers=JOB_WORKERS, queue_max=JOB_QUEUE_MAX):
+        self.store = store or JobStore()
+        interrupted = self.store.mark_interrupted()
+        if interrupted:
+            logger.warning(f"재시작 전 미완료 업로드 작업 {interrupted}건을 interrupted로 표시")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-job")
+        self._slots = threading.BoundedSemaphore(queue_max)
+
+    def submit(self, upload):
+        """prepare_upload 결과를 작업으로 등록하고 job_id 반환"""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFullError("업로드 작업 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.")
+        job_id = uuid.uuid4().hex
+        try:
+            self.store.create(job_id)
+            # 요청 스레드에서 이미 끝난 단계 기록
+            self.store.update_stage(job_id, "encrypt", "done", file_hash=upload["ingest"]["file_hash"])
+            self._executor.submit(self._run, job_id, upload)
+        except Exception:
+            self._slots.release()
+            raise
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def _run(self, job_id, upload):
+        try:
+            self.store.set_status(job_id, JOB_RUNNING)
+
+            def progress(stage, status, **info):
+                self.store.update_stage(job_id, stage, status, **info)
+
+            result = UpdateService.publish_update(upload, progress=progress)
+            self.store.finish(job_id, JOB_SUCCEEDED, result=result)
+        except UpdatePipelineError as e:
+            self.store.finish(job_id, JOB_FAILED, error=e.public_message)
+        except Exception as e:
+            logger.exception(f"업로드 작업 실패: {job_id}")
+            self.store.finish(job_id, JOB_FAILED, error=str(e))
+        finally:
+            stream = upload["ingest"].get("stream")
+            if stream is not None:
+                stream.close()
+            self._slots.release()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """프로세스 전역 UploadJobManager (최초 호출 시 생성)"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = UploadJobManager()
+        return _job_manager
@@ -2,13 +2,27 @@ import os
 import uuid
 import base64
 import logging
-import re
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify
 from werkzeug.utils import secure_filename
 from crypto.symmetric.symmetric import SymmetricCrypto
-from crypto.hash.hash import HashTools
+from crypto.symmetric.compression import configured_compression, new_compressor, compression_metadata
 from crypto.cpabe.cpabe import CPABETools
+from crypto.cpabe.policy import compile_policy_dict
+from crypto.cpabe.pool import get_cpabe_pool
+from crypto.hash.merkle import new_update_hasher, manifest_bytes
 from ipfs.upload import IPFSUploader
+from services.ingest import EncryptedUpload, INGEST_MODE
+from services.delta_service import (
+    BaseCapture,
+    DELTA_SUFFIX,
+    UPDATE_METADATA_NAME,
+    build_update_metadata,
+    compute_delta,
+    delta_enabled,
+    get_delta_store,
+    product_of,
+)
 from blockchain.contract import BlockchainNotifier
 from crypto.ecdsa.ecdsa import ECDSATools
 from eth_account import Account  # [추가]
@@ -18,6 +32,32 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
+class UpdatePipelineError(Exception):
+    """
+    업로드 파이프라인 단계 실패.
+    - stage: 실패한 단계 이름 (UPLOAD_STAGES 중 하나)
+    - public_message: 클라이언트에 그대로 노출해도 되는 일반화된 메시지
+    """
+
+    def __init__(self, stage, public_message):
+        super().__init__(public_message)
+        self.stage = stage
+        self.public_message = public_message
+
+
+# 업로드 파이프라인 단계 (진행 상황 보고 순서)
+UPLOAD_STAGES = ("encrypt", "delta", "ipfs", "cpabe", "sign", "register")
+
+# 배치 업로드에서 항목별 암호화/IPFS/CP-ABE/서명을 동시에 처리하는 스레드 수
+BATCH_UPLOAD_WORKERS = int(os.getenv("BATCH_UPLOAD_WORKERS", "4"))
+# 배치 업로드 한 번에 받을 수 있는 최대 파일 수
+BATCH_UPLOAD_MAX_ITEMS = int(os.getenv("BATCH_UPLOAD_MAX_ITEMS", "100"))
+
+
+def _no_report(stage, status, **info):
+    pass
+
+
 class UpdateService:
     @staticmethod
     def process_update_upload(
@@ -30,6 +70,26 @@ class UpdateService:
         key_dir,
         cache_file=None,
     ):
+        """업로드 요청을 받은 스레드에서 전체 파이프라인을 동기적으로 실행"""
+        upload = UpdateService.prepare_upload(
+            file, version, description, price_eth, policy_dict, upload_folder
+        )
+        try:
+            return UpdateService.publish_update(upload)
+        except UpdatePipelineError as e:
+            return jsonify({"error": e.public_message}), 500
+
+    @staticmethod
+    def prepare_upload(
+        file, version, description, price_eth, policy_dict, upload_folder, progress=None, cpabe=None
+    ):
+        """
+        요청이 살아있는 동안 수행해야 하는 단계 (정책 검증 + 본문 암호화/해시).
+        - 반환된 dict는 요청 종료 후에도 publish_update에 그대로 넘길 수 있음
+        - cpabe: 여러 업로드가 공유할 CPABETools (없으면 새로 생성)
+        """
+        report = progress or (lambda stage, status, **info: None)
+
         attribute_policy = UpdateService.build_attribute_policy(policy_dict)
         logger.info(f"CP-ABE attribute_policy 정책: {attribute_policy}")
 
@@ -40,54 +100,197 @@ class UpdateService:
         except ValueError:
             price = 0
 
-        # 파일 저장
-        uid = f"update_{uuid.uuid4().hex}"
-        original_filename = secure_filename(file.filename)
-        file_ext = original_filename.rsplit(".", 1)[1].lower() if "." in original_filename else "bin"
-        temp_filename = f"{uid}.{file_ext}"
-        file_path = os.path.join(upload_folder, temp_filename)
-        os.makedirs(upload_folder, exist_ok=True)
-        file.save(file_path)
-
-        # CP-ABE 초기화 및 대칭키 kbj, aes_key 생성
-        cpabe = CPABETools()
+        # CP-ABE 초기화
+        if cpabe is None:
+            cpabe = CPABETools()
         cpabe_group = cpabe.get_group()
-        kbj, aes_key = SymmetricCrypto.generate_key(cpabe_group)
-        logger.info(f"대칭키 생성 완료 kbj: {kbj}, aes_key: {aes_key}")
 
-        # 바이너리를 대칭키로 암호화 Es(bj,kbj)
-        encrypted_file_path = SymmetricCrypto.encrypt_file(file_path, aes_key)
-        logger.info(f"파일 암호화 완료: {encrypted_file_path}")
+        # 파일 수집: 대칭키 kbj 생성 + 암호화 Es(bj,kbj) + SHA-3 해시 hEbj (단일 패스)
+        report("encrypt", "running")
+        try:
+            ingest = UpdateService.ingest_file(file, upload_folder, cpabe_group)
+        except Exception:
+            logger.exception("파일 암호화 실패")
+            report("encrypt", "failed")
+            raise UpdatePipelineError("encrypt", "파일 암호화에 실패했습니다. 관리자에게 문의하세요.")
+        report("encrypt", "done", file_hash=ingest["file_hash"])
 
-        # SHA-3 해시 생성 hEbj
-        file_hash = HashTools.sha3_hash_file(encrypted_file_path)
+        return {
+            "cpabe": cpabe,
+            "ingest": ingest,
+            "attribute_policy": attribute_policy,
+            "policy_dict": policy_dict,
+            "version": version,
+            "description": description,
+            "price": price,
+        }
+
+    @staticmethod
+    def publish_context(cpabe):
+        """
+        업로드 여러 건이 함께 쓸 수 있는 공통 준비 (공개키/마스터키, 서명 키, IPFS 업로더).
+        - 배치 업로드는 한 번만 만들어 모든 항목에 재사용
+        """
+        key_dir = os.path.join(os.path.dirname(__file__), "../crypto/keys")
+        public_key_file = os.path.join(key_dir, "public_key.bin")
+        master_key_file = os.path.join(key_dir, "master_key.bin")
+
+        # 공개키/마스터키 없으면 새로 생성
+        if not (os.path.exists(public_key_file) and os.path.exists(master_key_file)):
+            os.makedirs(key_dir, exist_ok=True)  # [추가]
+            cpabe.setup(public_key_file, master_key_file)
+            logger.info("CP-ABE 공개키/마스터키 새로 생성 완료")
+
+        # ECDSA 서명 키 (Ethereum 기반)
+        private_key_hex = os.environ.get("BLOCKCHAIN_PRIVATE_KEY")
+        if not private_key_hex:
+            private_key_hex, _ = ECDSATools.generate_key_pair()
+            logger.warning("환경 변수에 키가 없어 새 Ethereum 계정 생성")
+
+        # [추가] 트랜잭션도 반드시 같은 키로 보냄 (서명자 == msg.sender 보장)
+        sender_address = Account.from_key(private_key_hex).address
+        logger.info(f"[Signer/Sender] {sender_address}")
+
+        return {
+            "cpabe": cpabe,
+            "public_key_file": public_key_file,
+            "private_key_hex": private_key_hex,
+            "sender_address": sender_address,
+            "ipfs_uploader": IPFSUploader(),
+        }
+
+    @staticmethod
+    def publish_update(upload, progress=None, context=None):
+        """
+        암호화된 업로드를 IPFS에 올리고 CP-ABE 키 암호화, 서명, 블록체인 등록까지 수행.
+        - progress(stage, status, **info) 콜백으로 단계별 진행 상황 보고
+        - 실패 시 UpdatePipelineError 발생
+        """
+        report = progress or (lambda stage, status, **info: None)
+        if context is None:
+            context = UpdateService.publish_context(upload["cpabe"])
+
+        registration = UpdateService.prepare_registration(upload, context, report)
+        try:
+            # [추가] Notifier에 같은 키/주소를 명시적으로 전달
+            notifier = BlockchainNotifier(
+                account_address=context["sender_address"],
+                private_key=context["private_key_hex"],
+            )
+        except Exception:
+            logger.exception("블록체인 연결 실패")
+            UpdateService.release_delta_base(registration.get("delta_base"), commit=False)
+            report("register", "failed")
+            raise UpdatePipelineError("register", "블록체인 등록에 실패했습니다. 관리자에게 문의하세요.")
+        return UpdateService.register(registration, notifier, report)
+
+    @staticmethod
+    def prepare_registration(upload, context, report):
+        """IPFS 업로드, CP-ABE 키 암호화, 서명 단계. 블록체인 등록에 필요한 값을 반환"""
+        cpabe = context["cpabe"]
+        ingest = upload["ingest"]
+        version = upload["version"]
+        description = upload["description"]
+        price = upload["price"]
+
+        file_hash = ingest["file_hash"]
+        original_filename = ingest["original_filename"]
+        update_uid = UpdateService.update_uid(original_filename, version)
+
+        # 이전 버전 대비 바이너리 델타 (전체 이미지와 같은 디렉토리에 게시)
+        delta = UpdateService.build_delta(ingest, version, cpabe.get_group(), report)
+        delta_file_name = f"{ingest['file_name']}{DELTA_SUFFIX}" if delta is not None else None
+        attachments = [(delta_file_name, open(delta["path"], "rb"))] if delta is not None else []
+        # 압축 코덱/델타 정보는 update.json으로 같은 디렉토리에 게시 (디렉토리 CID가 서명 대상)
+        if delta is not None or ingest["compression"] is not None:
+            capture = ingest.get("capture")
+            metadata = build_update_metadata(
+                update_uid,
+                ingest["file_name"],
+                file_hash,
+                plain_sha3=capture.plain_hash if capture is not None else None,
+                compression=ingest["compression"],
+                delta=delta,
+                delta_file_name=delta_file_name,
+            )
+            attachments.append((UPDATE_METADATA_NAME, metadata))
 
         # IPFS에 암호화된 바이너리 업로드
+        report("ipfs", "running")
         try:
-            ipfs_uploader = IPFSUploader()
-            upload_result = ipfs_uploader.upload_file(encrypted_file_path)
+            ipfs_uploader = context["ipfs_uploader"]
+            if ingest["stream"] is not None:
+                upload_result = ipfs_uploader.upload_stream(
+                    ingest["stream"], ingest["file_name"], manifest=ingest["manifest"], attachments=attachments
+                )
+            else:
+                upload_result = ipfs_uploader.upload_file(
+                    ingest["encrypted_file_path"], manifest=ingest["manifest"], attachments=attachments
+                )
             if not upload_result:
                 raise Exception("IPFS 업로드 결과가 없습니다.")
             ipfs_hash = upload_result["cid"]
             file_name = upload_result["file_name"]
             logger.info(f"IPFS 업로드 완료: CID={ipfs_hash}, 파일명={file_name}")
+            # 게시한 평문은 블록체인 등록이 성공한 뒤에만 다음 버전의 델타 기준본으로 저장
+            # (스트림을 닫기 전에 넘겨받아야 평문 사본이 지워지지 않음)
+            delta_base = UpdateService.take_delta_base(ingest, version, update_uid, ipfs_hash, file_name)
         except Exception as e:
             logger.error(f"IPFS 업로드 실패: {e}")
-            return jsonify({"error": "IPFS 업로드에 실패했습니다. 관리자에게 문의하세요."}), 500
+            report("ipfs", "failed")
+            raise UpdatePipelineError("ipfs", "IPFS 업로드에 실패했습니다. 관리자에게 문의하세요.")
+        finally:
+            if ingest["stream"] is not None:
+                ingest["stream"].close()
+            if delta is not None:
+                attachments[0][1].close()
+                os.remove(delta["path"])
+        report("ipfs", "done", ipfs_hash=ipfs_hash)
 
-        # CP-ABE 키 생성
-        key_dir = os.path.join(os.path.dirname(__file__), "../crypto/keys")
-        public_key_file = os.path.join(key_dir, "public_key.bin")
-        master_key_file = os.path.join(key_dir, "master_key.bin")
+        try:
+            encrypted_key_bytes, signature = UpdateService.encrypt_and_sign(
+                upload, context, report, update_uid, ipfs_hash
+            )
+        except BaseException:
+            UpdateService.release_delta_base(delta_base, commit=False)
+            raise
 
-        # 공개키/마스터키 없으면 새로 생성
-        if not (os.path.exists(public_key_file) and os.path.exists(master_key_file)):
-            os.makedirs(key_dir, exist_ok=True)  # [추가]
-            cpabe.setup(public_key_file, master_key_file)
-            logger.info("CP-ABE 공개키/마스터키 새로 생성 완료")
+        return {
+            "uid": update_uid,
+            "ipfs_hash": ipfs_hash,
+            "encrypted_key": encrypted_key_bytes,
+            "file_hash": file_hash,
+            "description": description,
+            "price": price,
+            "version": version,
+            "signature": signature,
+            "delta": UpdateService.delta_summary(delta, delta_file_name) if delta is not None else None,
+            "compression": ingest["compression"],
+            "delta_base": delta_base,
+        }
+
+    @staticmethod
+    def encrypt_and_sign(upload, context, report, update_uid, ipfs_hash):
+        """CP-ABE 키 암호화와 서명 단계. (encrypted_key bytes, 서명) 반환"""
+        ingest = upload["ingest"]
+        attribute_policy = upload["attribute_policy"]
+        policy_dict = upload["policy_dict"]
+        version = upload["version"]
+        description = upload["description"]
+        price = upload["price"]
+        kbj = ingest["kbj"]
+        file_hash = ingest["file_hash"]
+
+        # CP-ABE 키 생성
+        report("cpabe", "running")
 
         # 속성 기반 키 생성 or 로드
-        user_attributes = UpdateService.extract_user_attributes(policy_dict)
+        try:
+            user_attributes = UpdateService.extract_user_attributes(policy_dict)
+        except ValueError as e:
+            logger.error(f"CP-ABE 속성 추출 실패: {e}")
+            report("cpabe", "failed")
+            raise UpdatePipelineError("cpabe", "CP-ABE 암호화에 실패했습니다. 관리자에게 문의하세요.")
         logger.info(f"추출된 user_attributes: {user_attributes}")
         
         # # 디바이스 CP-ABE 비밀키 생성/로드
@@ -100,102 +303,341 @@ class UpdateService:
         #     device_secret_key = cpabe.load_device_secret_key(device_secret_key_file)  # [추가] 기존 키 로드
         #     logger.info("기존 디바이스 비밀키 로드 완료")
 
-        # 대칭키 암호화
-        encrypted_key = cpabe.encrypt(kbj, attribute_policy, public_key_file)
-        encrypted_key_bytes = encrypted_key.encode() if encrypted_key else b""
+        # 대칭키 암호화 (페어링 연산은 워커 프로세스에서 실행하고 결과만 기다림)
+        try:
+            encrypted_key = get_cpabe_pool(context["public_key_file"]).encrypt(
+                kbj, attribute_policy, context["public_key_file"]
+            )
+        except Exception as e:
+            logger.error(f"CP-ABE 암호화 실패: {e}")
+            report("cpabe", "failed")
+            raise UpdatePipelineError("cpabe", "CP-ABE 암호화에 실패했습니다. 관리자에게 문의하세요.")
+        # CPABE_CIPHERTEXT_FORMAT=binary면 이미 bytes
+        if isinstance(encrypted_key, str):
+            encrypted_key = encrypted_key.encode()
+        encrypted_key_bytes = encrypted_key or b""
         if not encrypted_key_bytes:
-            raise Exception("CP-ABE 암호화 실패")
+            report("cpabe", "failed")
+            raise UpdatePipelineError("cpabe", "CP-ABE 암호화에 실패했습니다. 관리자에게 문의하세요.")
+        report("cpabe", "done")
 
-        update_uid = f"{original_filename.split('.')[0]}_v{version}"
         logger.debug(f"업데이트 UID 생성: {update_uid}")
 
         # ECDSA 서명 (Ethereum 기반)
-        private_key_hex = os.environ.get("BLOCKCHAIN_PRIVATE_KEY")
-        if not private_key_hex:
-            private_key_hex, _ = ECDSATools.generate_key_pair()
-            logger.warning("환경 변수에 키가 없어 새 Ethereum 계정 생성")
-
-        # [추가] 트랜잭션도 반드시 같은 키로 보냄 (서명자 == msg.sender 보장)
-        sender_address = Account.from_key(private_key_hex).address
-        logger.info(f"[Signer/Sender] {sender_address}")
+        report("sign", "running")
 
         # 서명 생성
         signature_message = (
             update_uid, ipfs_hash, encrypted_key_bytes,  # bytes로 일치
             file_hash, description, price, version
         )
-        signature = ECDSATools.sign_message(signature_message, private_key_hex)
+        try:
+            signature = ECDSATools.sign_message(signature_message, context["private_key_hex"])
+        except Exception:
+            logger.exception("서명 실패")
+            report("sign", "failed")
+            raise UpdatePipelineError("sign", "서명에 실패했습니다. 관리자에게 문의하세요.")
+        report("sign", "done", uid=update_uid)
+        return encrypted_key_bytes, signature
 
-        # 블록체인 등록
+    @staticmethod
+    def register(registration, notifier, report):
+        """서명까지 끝난 업데이트를 블록체인에 등록하고 업로드 결과 반환"""
+        report("register", "running")
         try:
-            # [추가] Notifier에 같은 키/주소를 명시적으로 전달
-            notifier = BlockchainNotifier(
-                account_address=sender_address,
-                private_key=private_key_hex
-            )
             tx_hash = notifier.register_update(
-                uid=update_uid,
-                ipfs_hash=ipfs_hash,
-                encrypted_key=encrypted_key_bytes,
-                hash_of_update=file_hash,
-                description=description,
-                price=price,
-                version=version,
-                signature=signature,
+                uid=registration["uid"],
+                ipfs_hash=registration["ipfs_hash"],
+                encrypted_key=registration["encrypted_key"],
+                hash_of_update=registration["file_hash"],
+                description=registration["description"],
+                price=registration["price"],
+                version=registration["version"],
+                signature=registration["signature"],
             )
             tx_hash_str = tx_hash.hex() if isinstance(tx_hash, bytes) else tx_hash
-
-            return {
-                "success": True,
-                "uid": update_uid,
-                "ipfs_hash": ipfs_hash,
-                "file_hash": file_hash,
-                "tx_hash": tx_hash_str,
-                "version": version,
-                "signature": base64.b64encode(signature).decode(),
-            }
         except Exception:
             # 서버 로그에는 스택트레이스까지 남겨 디버깅 가능하게 함
             logger.exception("블록체인 등록 실패")
+            UpdateService.release_delta_base(registration.get("delta_base"), commit=False)
+            report("register", "failed")
             # 클라이언트에는 민감정보 없는 일반화된 메시지만 반환
-            return jsonify({"error": "블록체인 등록에 실패했습니다. 관리자에게 문의하세요."}), 500
+            raise UpdatePipelineError("register", "블록체인 등록에 실패했습니다. 관리자에게 문의하세요.")
+        UpdateService.release_delta_base(registration.get("delta_base"), commit=True)
+        report("register", "done", tx_hash=tx_hash_str)
+
+        return {
+            "success": True,
+            "uid": registration["uid"],
+            "ipfs_hash": registration["ipfs_hash"],
+            "file_hash": registration["file_hash"],
+            "tx_hash": tx_hash_str,
+            "version": registration["version"],
+            "signature": base64.b64encode(registration["signature"]).decode(),
+            "delta": registration.get("delta"),
+            "compression": registration.get("compression"),
+        }
+
+    @staticmethod
+    def build_delta(ingest, version, group, report):
+        """
+        같은 제품의 이전 버전 평문 대비 bsdiff4 패치를 만들어 전체 이미지와 같은 키로 암호화.
+        - 델타를 만들 수 없거나 실패해도 전체 이미지 게시는 그대로 진행 (None 반환)
+        """
+        capture = ingest.get("capture")
+        if capture is None:
+            report("delta", "skipped")
+            return None
+        report("delta", "running")
+        try:
+            aes_key = SymmetricCrypto.derive_key(ingest["kbj"], group)
+            delta, reason = compute_delta(
+                get_delta_store(), capture, product_of(ingest["original_filename"]), version, aes_key
+            )
+        except Exception as e:
+            logger.exception("델타 생성 실패")
+            report("delta", "skipped", reason=f"델타 생성 실패: {e}")
+            return None
+        if delta is None:
+            logger.info(f"델타 생성 건너뜀: {reason}")
+            report("delta", "skipped", reason=reason)
+            return None
+        report("delta", "done", base_uid=delta["base"]["uid"], patch_size=delta["patch_size"])
+        return delta
+
+    @staticmethod
+    def take_delta_base(ingest, version, update_uid, ipfs_hash, file_name):
+        """
+        게시된 업로드 평문을 기준본 후보로 넘겨받음 (UPDATE_DELTA_MODE=on이 아니면 None).
+        - 스트림을 닫아도 평문 사본이 지워지지 않도록 EncryptedUpload에서 분리 (스트림을 닫기 전에 호출)
+        - register 성공 시 release_delta_base(commit=True), 그 외에는 commit=False로 정리
+        """
+        capture = ingest.get("capture")
+        if capture is None:
+            return None
+        if ingest["stream"] is not None:
+            ingest["stream"].capture = None
+        return {
+            "capture": capture,
+            "product": product_of(ingest["original_filename"]),
+            "version": version,
+            "uid": update_uid,
+            "ipfs_hash": ipfs_hash,
+            "file_name": file_name,
+        }
+
+    @staticmethod
+    def release_delta_base(delta_base, commit):
+        """등록된 업데이트의 평문만 다음 버전 델타의 기준본으로 저장하고 나머지는 삭제 (실패해도 업로드는 계속)"""
+        if delta_base is None:
+            return
+        capture = delta_base["capture"]
+        if commit:
+            try:
+                get_delta_store().commit(
+                    capture,
+                    delta_base["product"],
+                    delta_base["version"],
+                    delta_base["uid"],
+                    delta_base["ipfs_hash"],
+                    delta_base["file_name"],
+                )
+            except Exception:
+                logger.exception("델타 기준본 저장 실패")
+        capture.discard()
+
+    @staticmethod
+    def delta_summary(delta, delta_file_name):
+        base = delta["base"]
+        return {
+            "file": delta_file_name,
+            "sha3": delta["sha3"],
+            "patch_size": delta["patch_size"],
+            "base_uid": base["uid"],
+            "base_version": base["version"],
+            "base_ipfs_hash": base["ipfs_hash"],
+        }
+
+    @staticmethod
+    def update_uid(original_filename, version):
+        return f"{original_filename.split('.')[0]}_v{version}"
+
+    @staticmethod
+    def process_batch_upload(items, upload_folder, workers=BATCH_UPLOAD_WORKERS):
+        """
+        여러 업데이트를 한 요청에서 등록.
+        - items: [{"file", "version", "description", "price", "policy"}, ...]
+        - CP-ABE 도구, 키 파일, 서명 키, IPFS 세션, BlockchainNotifier는 한 번만 준비해 공유
+        - 암호화/IPFS/CP-ABE/서명 단계는 항목별로 병렬 실행
+        - 등록 트랜잭션은 영수증을 기다리지 않고 연속 nonce로 이어서 전송
+        - 항목별 결과(성공 시 업로드 결과, 실패 시 단계와 사유)를 입력 순서대로 반환
+        """
+        cpabe = CPABETools()
+        context = UpdateService.publish_context(cpabe)
+        results = [None] * len(items)
+
+        def fail(index, stage, message):
+            results[index] = {"index": index, "success": False, "stage": stage, "error": message}
+
+        # 같은 배치 안에서 uid가 겹치면 컨트랙트가 거부하므로 미리 실패 처리
+        seen_uids = {}
+        for index, item in enumerate(items):
+            uid = UpdateService.update_uid(secure_filename(item["file"].filename), item.get("version", ""))
+            if uid in seen_uids:
+                fail(index, "validate", f"같은 배치의 {seen_uids[uid]}번 항목과 uid({uid})가 겹칩니다.")
+            else:
+                seen_uids[uid] = index
+
+        def prepare(index, item):
+            upload = None
+            # 마지막으로 시작한 단계 (파이프라인 밖에서 실패해도 어느 단계였는지 보고)
+            progress = {"stage": "validate"}
+
+            def track(stage, status, **info):
+                progress["stage"] = stage
+
+            try:
+                upload = UpdateService.prepare_upload(
+                    item["file"],
+                    item.get("version", ""),
+                    item.get("description", ""),
+                    item.get("price", "0"),
+                    item.get("policy", {}),
+                    upload_folder,
+                    progress=track,
+                    cpabe=cpabe,
+                )
+                return UpdateService.prepare_registration(upload, context, track)
+            except UpdatePipelineError as e:
+                fail(index, e.stage, e.public_message)
+            except Exception as e:
+                if isinstance(e, ValueError) and progress["stage"] == "validate":
+                    # 정책 검증 오류는 요청한 값에 대한 설명이므로 그대로 반환
+                    fail(index, "validate", str(e))
+                else:
+                    logger.exception(f"배치 업로드 {index}번 항목 처리 실패")
+                    fail(index, progress["stage"], "업로드 처리에 실패했습니다. 관리자에게 문의하세요.")
+            finally:
+                stream = upload["ingest"].get("stream") if upload else None
+                if stream is not None:
+                    stream.close()
+            return None
+
+        pending = [(i, item) for i, item in enumerate(items) if results[i] is None]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as pool:
+            futures = [(i, pool.submit(prepare, i, item)) for i, item in pending]
+            registrations = [(i, future.result()) for i, future in futures]
+
+        registrations = [(i, reg) for i, reg in registrations if reg is not None]
+        if registrations:
+            try:
+                notifier = BlockchainNotifier(
+                    account_address=context["sender_address"],
+                    private_key=context["private_key_hex"],
+                )
+            except Exception:
+                logger.exception("블록체인 연결 실패")
+                for i, registration in registrations:
+                    UpdateService.release_delta_base(registration.get("delta_base"), commit=False)
+                    fail(i, "register", "블록체인 등록에 실패했습니다. 관리자에게 문의하세요.")
+                registrations = []
+
+            # 입력 순서대로 nonce를 이어 받아 전송 (앞 트랜잭션 채굴을 기다리지 않음)
+            for i, registration in registrations:
+                try:
+                    results[i] = {"index": i, **UpdateService.register(registration, notifier, _no_report)}
+                except UpdatePipelineError as e:
+                    fail(i, e.stage, e.public_message)
+
+        return results
+
+    @staticmethod
+    def ingest_file(file, upload_folder, group):
+        """
+        업로드 파일을 대칭키로 암호화하고 암호문의 SHA-3 해시를 계산
+        - stream 모드: 평문을 디스크에 쓰지 않고 암호문 스풀(EncryptedUpload)로 처리
+        - disk 모드: uploads/에 평문을 저장한 뒤 .enc 파일 생성 (기존 방식)
+        - UPDATE_HASH_MODE=merkle이면 file_hash는 청크 머클 루트, manifest는 IPFS에 함께 올릴 매니페스트
+        - UPDATE_DELTA_MODE=on이면 capture는 델타 계산/기준본 저장에 쓰는 평문 사본
+        - UPDATE_COMPRESSION이 설정되면 암호화 전에 압축하고 compression에 코덱/레벨을 기록
+        """
+        uid = f"update_{uuid.uuid4().hex}"
+        original_filename = secure_filename(file.filename)
+        file_ext = original_filename.rsplit(".", 1)[1].lower() if "." in original_filename else "bin"
+        temp_filename = f"{uid}.{file_ext}"
+
+        stream = getattr(file, "stream", file)
+        if isinstance(stream, EncryptedUpload):
+            # IngestRequest가 요청 본문 수신 중에 이미 암호화를 끝낸 경우
+            # 요청 종료 시 werkzeug가 파일을 닫아도 스풀이 유지되도록 소유권을 가져옴
+            upload = stream.detach()
+            upload.finish()
+        elif INGEST_MODE == "stream":
+            capture = get_delta_store().capture() if delta_enabled() else None
+            upload = EncryptedUpload.from_stream(stream, group, capture=capture)
+        else:
+            file_path = os.path.join(upload_folder, temp_filename)
+            os.makedirs(upload_folder, exist_ok=True)
+            file.save(file_path)
+
+            kbj, aes_key = SymmetricCrypto.generate_key(group)
+            hash_obj = new_update_hasher()
+            codec, level = configured_compression()
+            encrypted_file_path, file_hash = SymmetricCrypto.encrypt_file_with_hash(
+                file_path, aes_key, hash_obj=hash_obj, compressor=new_compressor(codec, level)
+            )
+            logger.info(f"파일 암호화 완료: {encrypted_file_path}, 해시: {file_hash}")
+            return {
+                "kbj": kbj,
+                "file_hash": file_hash,
+                "original_filename": original_filename,
+                "file_name": os.path.basename(encrypted_file_path),
+                "encrypted_file_path": encrypted_file_path,
+                "stream": None,
+                "manifest": manifest_bytes(hash_obj),
+                "capture": BaseCapture.from_file(file_path) if delta_enabled() else None,
+                "compression": compression_metadata(codec, level),
+            }
+
+        upload.name = f"{temp_filename}.enc"
+        logger.info(
+            f"파일 스트리밍 암호화 완료: {upload.name} ({upload.plain_size} → {upload.size} bytes, "
+            f"{'메모리' if upload.in_memory else '임시파일'}), 해시: {upload.file_hash}"
+        )
+        return {
+            "kbj": group.deserialize(upload.kbj_bytes),
+            "file_hash": upload.file_hash,
+            "original_filename": original_filename,
+            "file_name": upload.name,
+            "encrypted_file_path": None,
+            "stream": upload,
+            "manifest": upload.manifest,
+            "capture": upload.capture,
+            "compression": upload.compression,
+        }
+
     @staticmethod
     def build_attribute_policy(policy_dict):
+        """
+        정책 dict의 각 값을 파싱해 and로 묶은 정규형 CP-ABE 정책 문자열 반환.
+        - 파싱 결과는 crypto.cpabe.policy의 LRU 캐시에 보관되어 같은 정책은 다시 해석하지 않음
+        """
         # 필수 속성 검사
         required_keys = ["model", "serial"]
         for key in required_keys:
-            if key not in policy_dict or not policy_dict[key].strip():
+            value = policy_dict.get(key)
+            if not isinstance(value, str) or not value.strip():
                 raise ValueError(f"'{key}' 속성은 필수입니다.")
 
-        def parse_expression(expr: str) -> str:
-            expr = expr.strip()
-            expr = expr.replace("AND", "and").replace("OR", "or")
-            expr = re.sub(r"\s+", " ", expr)  # 중복 공백 제거
-            return expr
+        return compile_policy_dict(policy_dict).canonical
 
-        # 각 key-value를 개별 정책 문자열로 변환
-        expressions = []
-        for key, value in policy_dict.items():
-            if value.strip():  # 값이 비어있지 않은 경우만 처리
-                parsed = parse_expression(value)
-                expressions.append(f"({parsed})")
-
-        # 모든 조건을 and로 연결
-        full_policy = " and ".join(expressions)
-        return full_policy
-    
     @staticmethod
     def extract_user_attributes(policy_dict):
         """
-        각 policy_dict의 값에서 AND/OR/괄호 등을 제거하고 속성 리스트 추출
+        정책 dict에 등장하는 속성 이름 목록 (대문자, 중복 제거)
+        - 연산자는 단어 단위로만 인식하므로 MOTOR, BRAND 같은 속성 이름이 훼손되지 않음
         """
-        attributes = []
-        for value in policy_dict.values():
-            if not isinstance(value, str) or not value.strip():
-                continue
-            # AND, OR 제거, 괄호 제거 후 분할
-            expr = value.upper().replace("AND", " ").replace("OR", " ")
-            expr = re.sub(r"[()]", " ", expr)  # 괄호 제거
-            tokens = [token.strip() for token in expr.split() if token.strip()]
-            attributes.extend(tokens)
-        return list(set(attributes))  # 중복 제거
+        values = {k: v for k, v in policy_dict.items() if isinstance(v, str) and v.strip()}
+        if not values:
+            return []
+        return sorted(compile_policy_dict(values).attributes)
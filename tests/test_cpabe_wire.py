@@ -0,0 +1,47 @@
+import pytest
+
+from crypto.cpabe.wire import CiphertextFormatError, read_bytes, read_varint, write_bytes, write_varint
+
+
+@pytest.mark.parametrize(
+    "value, encoded",
+    [(0, "00"), (1, "01"), (127, "7f"), (128, "8001"), (300, "ac02"), (16384, "808001"), (2**63 - 1, "ffffffffffffffff7f")],
+)
+def test_varint_format(value, encoded):
+    out = bytearray()
+    write_varint(out, value)
+    assert out.hex() == encoded
+    assert read_varint(bytes.fromhex(encoded), 0) == (value, len(out))
+
+
+def test_varint_at_offset():
+    data = bytes.fromhex("ff" "ac02" "05")
+    assert read_varint(data, 1) == (300, 3)
+    assert read_varint(data, 3) == (5, 4)
+
+
+def test_varint_truncated():
+    with pytest.raises(CiphertextFormatError):
+        read_varint(bytes.fromhex("80"), 0)
+    with pytest.raises(CiphertextFormatError):
+        read_varint(b"", 0)
+
+
+def test_varint_too_long():
+    with pytest.raises(CiphertextFormatError):
+        read_varint(bytes.fromhex("ff" * 10 + "01"), 0)
+
+
+def test_bytes_round_trip():
+    out = bytearray()
+    write_bytes(out, b"")
+    write_bytes(out, b"x" * 200)
+    raw, pos = read_bytes(out, 0)
+    assert (raw, pos) == (b"", 1)
+    raw, pos = read_bytes(out, pos)
+    assert raw == b"x" * 200 and pos == len(out)
+
+
+def test_bytes_truncated():
+    with pytest.raises(CiphertextFormatError):
+        read_bytes(bytes.fromhex("0561626364"), 0)
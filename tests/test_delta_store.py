@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+pytest.importorskip("charm", reason="services.delta_service는 charm이 필요한 crypto.symmetric을 가져옴")
+
+from services.delta_service import DeltaBaseStore, _version_key  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DeltaBaseStore(root=str(tmp_path), keep=3)
+
+
+def _commit(store, version, content=None, product="fw"):
+    capture = store.capture()
+    capture.write(content if content is not None else f"{product}-{version}".encode())
+    store.commit(capture, product, version, f"{product}_v{version}", f"cid-{version}", f"{product}.bin.enc")
+
+
+def test_version_key_orders_numerically():
+    assert _version_key("1.10.2") > _version_key("1.9")
+    assert _version_key("2.0") > _version_key("1.99.99")
+    assert _version_key("1.2") < _version_key("1.2.1")
+
+
+def test_previous_picks_highest_lower_version(store):
+    for version in ("1.9", "1.2", "1.10"):
+        _commit(store, version)
+    assert store.previous("fw", "1.11")["version"] == "1.10"
+    assert store.previous("fw", "1.9.5")["version"] == "1.9"
+    assert store.previous("fw", "1.10")["version"] == "1.9"
+
+
+def test_previous_none_without_lower_version(store):
+    _commit(store, "2.0")
+    assert store.previous("fw", "1.0") is None
+    assert store.previous("other", "3.0") is None
+
+
+def test_previous_falls_back_to_latest_for_unversioned(store):
+    _commit(store, "1.0")
+    _commit(store, "1.1")
+    assert store.previous("fw", "")["version"] == "1.1"
+
+
+def test_previous_skips_missing_files(store):
+    _commit(store, "1.0")
+    _commit(store, "1.1")
+    os.remove(store.previous("fw", "2.0")["path"])
+    assert store.previous("fw", "2.0")["version"] == "1.0"
+
+
+def test_commit_keeps_recent_bases(store):
+    for version in ("1.0", "1.1", "1.2", "1.3"):
+        _commit(store, version)
+    assert store.previous("fw", "1.1") is None
+    base = store.previous("fw", "9")
+    assert base["version"] == "1.3"
+    with open(base["path"], "rb") as f:
+        assert f.read() == b"fw-1.3"
+    assert os.listdir(os.path.join(store.root, "incoming")) == []
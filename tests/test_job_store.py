@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# services.job_service는 업로드 파이프라인(charm, IPFS 클라이언트)을 함께 가져옴
+pytest.importorskip("charm")
+pytest.importorskip("ipfshttpclient")
+
+from services.job_service import (  # noqa: E402
+    JOB_FAILED,
+    JOB_INTERRUPTED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(db_path=str(tmp_path / "jobs.db"))
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _create(store, job_id, status, owner_pid):
+    store.create(job_id)
+    store.set_status(job_id, status)
+    with store._connect() as conn:
+        conn.execute("UPDATE upload_jobs SET owner_pid = ? WHERE job_id = ?", (owner_pid, job_id))
+
+
+def test_mark_interrupted_only_orphaned_unfinished_jobs(store):
+    dead = _dead_pid()
+    alive = os.getppid()
+    _create(store, "own-queued", JOB_QUEUED, os.getpid())  # 이전 프로세스가 같은 pid였던 기록
+    _create(store, "dead-running", JOB_RUNNING, dead)
+    _create(store, "alive-running", JOB_RUNNING, alive)  # 같은 DB를 쓰는 다른 워커
+    _create(store, "dead-succeeded", JOB_SUCCEEDED, dead)
+    _create(store, "dead-failed", JOB_FAILED, dead)
+
+    assert store.mark_interrupted() == 2
+    assert store.get("own-queued")["status"] == JOB_INTERRUPTED
+    assert store.get("dead-running")["status"] == JOB_INTERRUPTED
+    assert store.get("dead-running")["error"]
+    assert store.get("alive-running")["status"] == JOB_RUNNING
+    assert store.get("dead-succeeded")["status"] == JOB_SUCCEEDED
+    assert store.get("dead-failed")["status"] == JOB_FAILED
+    assert store.mark_interrupted() == 0
+
+
+def test_stage_updates(store):
+    store.create("job")
+    store.update_stage("job", "encrypt", "done", file_hash="ab")
+    job = store.get("job")
+    assert job["status"] == JOB_QUEUED
+    assert job["stages"]["encrypt"]["status"] == "done"
+    assert job["stages"]["encrypt"]["file_hash"] == "ab"
+    assert job["stages"]["register"]["status"] == "pending"
@@ -0,0 +1,113 @@
+import json
+import hashlib
+
+import pytest
+
+from crypto.hash.merkle import (
+    ManifestError,
+    MerkleHasher,
+    build_manifest,
+    encode_manifest,
+    leaf_hash,
+    load_manifest,
+    merkle_root,
+    new_update_hasher,
+    node_hash,
+    verify_chunk,
+)
+
+
+def _leaves(data, chunk_size):
+    return [leaf_hash(data[i:i + chunk_size]) for i in range(0, len(data), chunk_size)] or [leaf_hash(b"")]
+
+
+def test_root_of_empty_file_is_empty_chunk():
+    assert merkle_root([]) == leaf_hash(b"")
+
+
+def test_root_promotes_unpaired_node():
+    a, b, c = (leaf_hash(x) for x in (b"a", b"b", b"c"))
+    assert merkle_root([a]) == a
+    assert merkle_root([a, b, c]) == node_hash(node_hash(a, b), c)
+    assert merkle_root([a, b, c]) != merkle_root([a, b, c, c])
+
+
+def test_leaf_and_node_are_domain_separated():
+    a, b = leaf_hash(b"a"), leaf_hash(b"b")
+    assert leaf_hash(a + b) != node_hash(a, b)
+
+
+@pytest.mark.parametrize("size", [0, 1, 63, 64, 65, 1000])
+def test_hasher_matches_chunked_root(size):
+    data = bytes(range(256)) * 4
+    data = data[:size]
+    hasher = MerkleHasher(chunk_size=64, workers=2)
+    # update() 경계가 청크 경계와 맞지 않아도 결과는 같아야 함
+    for i in range(0, len(data), 7):
+        hasher.update(data[i:i + 7])
+    assert hasher.digest() == merkle_root(_leaves(data, 64))
+    assert hasher.leaves == _leaves(data, 64)
+    with pytest.raises(ValueError):
+        hasher.update(b"x")
+
+
+def test_sha3_mode_uses_plain_hash():
+    assert new_update_hasher("sha3").name == hashlib.sha3_256().name
+    assert isinstance(new_update_hasher("merkle"), MerkleHasher)
+
+
+def _manifest(data, chunk_size=64):
+    hasher = MerkleHasher(chunk_size=chunk_size, workers=1)
+    hasher.update(data)
+    return hasher, encode_manifest(hasher.manifest())
+
+
+def test_load_manifest_round_trip():
+    data = b"firmware" * 40
+    hasher, encoded = _manifest(data)
+    manifest, leaves = load_manifest(encoded, expected_root=hasher.hexdigest().upper())
+    assert manifest["size"] == len(data)
+    assert leaves == hasher.leaves
+    assert encode_manifest(build_manifest(leaves, 64, len(data))) == encoded
+
+
+def test_load_manifest_rejects_wrong_expected_root():
+    _, encoded = _manifest(b"firmware" * 40)
+    with pytest.raises(ManifestError):
+        load_manifest(encoded, expected_root="00" * 32)
+
+
+def test_load_manifest_rejects_tampered_chunk():
+    _, encoded = _manifest(b"firmware" * 40)
+    manifest = json.loads(encoded)
+    manifest["chunks"][1] = "00" * 32
+    with pytest.raises(ManifestError):
+        load_manifest(encode_manifest(manifest))
+
+
+def test_load_manifest_rejects_chunk_count_mismatch():
+    _, encoded = _manifest(b"firmware" * 40)
+    manifest = json.loads(encoded)
+    manifest["size"] += 64
+    with pytest.raises(ManifestError):
+        load_manifest(encode_manifest(manifest))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"not json", b"{}", b'{"algorithm": "sha3-256-merkle", "chunk_size": "x", "size": 1, "chunks": []}'],
+)
+def test_load_manifest_rejects_malformed(data):
+    with pytest.raises(ManifestError):
+        load_manifest(data)
+
+
+def test_verify_chunk():
+    data = bytes(range(256)) + b"tail"
+    hasher, _ = _manifest(data)
+    leaves = hasher.leaves
+    assert verify_chunk(leaves, 0, data[:64])
+    assert verify_chunk(leaves, len(leaves) - 1, data[(len(leaves) - 1) * 64:])
+    assert not verify_chunk(leaves, 1, data[:64])
+    assert not verify_chunk(leaves, len(leaves), b"")
+    assert not verify_chunk(leaves, -1, data[-64:])
@@ -0,0 +1,85 @@
+import pytest
+
+from crypto.ecdsa.message_codec import MessageCodec, MessageCodecError
+
+
+@pytest.fixture
+def codec():
+    return MessageCodec()
+
+
+@pytest.mark.parametrize(
+    "value, encoded",
+    [
+        # RFC 8949 부록 A의 예시 값
+        (0, "00"),
+        (23, "17"),
+        (24, "1818"),
+        (-1, "20"),
+        (2**64, "c249010000000000000000"),
+        (-(2**64) - 1, "c349010000000000000000"),
+        (1.5, "fb3ff8000000000000"),
+        (True, "f5"),
+        (None, "f6"),
+        ("a", "6161"),
+        (b"\x01", "4101"),
+        ([1], "8101"),
+        ({1, 2}, "d90102820102"),
+    ],
+)
+def test_encode_known_values(codec, value, encoded):
+    assert codec.encode(value).hex() == encoded
+    assert codec.decode(bytes.fromhex(encoded)) == value
+
+
+def test_round_trip_nested(codec):
+    value = {
+        "uid": "fw_v1.2",
+        "hash": b"\x00" * 32,
+        "price": 10**18,
+        "big": [2**70, -(2**70)],
+        "tags": {"a", "b"},
+        1: [None, False, 0.25],
+    }
+    assert codec.decode(codec.encode(value)) == value
+
+
+def test_tuple_decodes_as_list(codec):
+    assert codec.decode(codec.encode(("a", 1))) == ["a", 1]
+
+
+def test_encoding_is_deterministic(codec):
+    # 맵 키와 set 원소는 삽입 순서와 무관하게 같은 바이트
+    assert codec.encode({"b": 1, "a": 2, "aa": 3}) == codec.encode({"aa": 3, "a": 2, "b": 1})
+    assert codec.encode({3, 1, 2}) == codec.encode({2, 3, 1})
+    assert codec.encode({1: "x", "k": "y"}) == codec.encode({"k": "y", 1: "x"})
+
+
+def test_unsupported_type(codec):
+    with pytest.raises(MessageCodecError):
+        codec.encode(object())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "",  # 빈 메시지
+        "18",  # 길이 바이트 없음
+        "43ffff",  # 바이트열이 중간에 끝남
+        "8201",  # 배열 원소 부족
+        "0000",  # 끝에 남은 바이트
+        "1c",  # 지원하지 않는 길이 형식
+        "62c328",  # 잘못된 UTF-8
+        "a1810101",  # 리스트를 맵 키로 사용
+        "a1a00101",  # 맵을 맵 키로 사용
+        "c201",  # bignum 태그에 정수
+        "d9010201",  # set 태그에 배열이 아닌 값
+        "d9010281a0",  # set 원소가 해시 불가
+        "d8ff00",  # 지원하지 않는 태그
+        "d99dd14101",  # 그룹 없이 원소 태그
+        "f7",  # 지원하지 않는 simple 값
+    ],
+)
+def test_malformed_input_raises_codec_error(codec, data):
+    with pytest.raises(MessageCodecError):
+        codec.decode(bytes.fromhex(data))
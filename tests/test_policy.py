@@ -0,0 +1,56 @@
+import pytest
+
+from crypto.cpabe.policy import PolicyError, compile_policy, compile_policy_dict
+
+
+@pytest.mark.parametrize(
+    "text, canonical",
+    [
+        ("b and a", "(A and B)"),
+        ("A AND b", "(A and B)"),
+        ("a or b and c", "((B and C) or A)"),  # and가 or보다 먼저 묶임
+        ("(a or b) and c", "((A or B) and C)"),
+        ("(a and b) and c", "(A and (B and C))"),
+        ("a and a", "A"),
+        ("MOTOR and brand", "(BRAND and MOTOR)"),  # 연산자가 들어간 속성 이름은 그대로
+    ],
+)
+def test_canonical_form(text, canonical):
+    assert compile_policy(text).canonical == canonical
+
+
+def test_equivalent_policies_share_canonical_form():
+    assert compile_policy("(x or y) and z").canonical == compile_policy("Z AND (Y OR X)").canonical
+
+
+def test_canonical_form_parses_to_itself():
+    compiled = compile_policy("serial1 or (model and (opt1 or opt2))")
+    assert compile_policy(compiled.canonical) == compiled
+
+
+def test_attributes():
+    assert compile_policy("(a or b) and (b or c)").attributes == frozenset({"A", "B", "C"})
+
+
+@pytest.mark.parametrize("text", ["", "   ", "a and", "(a and b", "a b", "and a", "a $ b", "a_1", "()"])
+def test_syntax_errors(text):
+    with pytest.raises(PolicyError):
+        compile_policy(text)
+
+
+def test_non_string_policy():
+    with pytest.raises(PolicyError):
+        compile_policy(1)
+
+
+def test_policy_dict_joins_values_with_and():
+    compiled = compile_policy_dict({"model": "VS500", "serial": "S1", "option": "EXCLUSIVE OR PRESTIGE", "trim": " "})
+    assert compiled.canonical == "((EXCLUSIVE or PRESTIGE) and (S1 and VS500))"
+    assert compiled.attributes == frozenset({"VS500", "S1", "EXCLUSIVE", "PRESTIGE"})
+
+
+def test_policy_dict_errors():
+    with pytest.raises(PolicyError):
+        compile_policy_dict({"model": " "})
+    with pytest.raises(PolicyError):
+        compile_policy_dict({"model": 1})